@@ -8,8 +8,12 @@ import dash_leaflet as dl
 import datetime
 
 from pre_simulator import *
+import jobs
+import instrumentation
+import pipeline
 
-load_parameters = LoadParameters(
+# Load parameters until the user changes them, the parameters of each user are kept in their browser
+DEFAULT_LOAD_PARAMETERS = LoadParameters(
     monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],  # kWh
     occ_schedule=[1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0,
                   1.0, 1.0, 1.0, 1.0],  # frac
@@ -32,6 +36,8 @@ load_parameters = LoadParameters(
     en_washing_machine=1.0,
 )
 
+# Initial content of the page, the callbacks only send new values to the browser that asked for them so that the
+# workers can serve several users at once
 fig_energy = go.Figure()
 fig_finance = go.Figure()
 fig_profiles = go.Figure()
@@ -39,25 +45,20 @@ fig_bills = go.Figure()
 fig_load = go.Figure()
 fig_payback = go.Figure()
 
-autonomy = 0
-electric_bill_reduction = 0
-electric_energy_export = 0
-
-latitude = 45.9765878
-longitude = 7.6496971
+DEFAULT_LATITUDE = 45.9765878
+DEFAULT_LONGITUDE = 7.6496971
 
 app = dash.Dash(external_stylesheets=[dbc.themes.PULSE, dbc.icons.BOOTSTRAP],
                 prevent_initial_callbacks=True)
 server = app.server
+instrumentation.register(server)
+instrumentation.configure_logging()
 
 src_autonomy = app.get_asset_url('percent_autonomy_none.png')
 src_electric_bill_reduction = app.get_asset_url('percent_bill_reduction_none.png')
 src_electric_energy_export = app.get_asset_url('percent_elec_export_none.png')
 src_kwh_diagram = app.get_asset_url('kwh_template.png')
 
-simulating = False
-parameter_error = False
-
 # the style arguments for the sidebar. We use position:fixed and a fixed width
 SIDEBAR_STYLE = {
     "position": "fixed",
@@ -110,7 +111,7 @@ sidebar = html.Div(
                                     dbc.FormFloating(
                                         [
                                             dbc.Input(type="number", placeholder="34.123", id='input-latitude-modal',
-                                                      value=latitude),
+                                                      value=DEFAULT_LATITUDE),
                                             dbc.Label("Latitude (°)"),
                                         ]
                                     ),
@@ -122,7 +123,7 @@ sidebar = html.Div(
                                     dbc.FormFloating(
                                         [
                                             dbc.Input(type="number", placeholder="34.123", id='input-longitude-modal',
-                                                      value=longitude),
+                                                      value=DEFAULT_LONGITUDE),
                                             dbc.Label("Longitude (°)"),
                                         ]
                                     ),
@@ -168,7 +169,8 @@ sidebar = html.Div(
         ),
         dbc.FormFloating(
             [
-                dbc.Input(type="number", placeholder="34.123", id='input-latitude', value=45.9765878),
+                dbc.Input(type="number", placeholder="34.123", id='input-latitude', debounce=True,
+                          value=DEFAULT_LATITUDE),
                 dbc.Label("Latitude (°)"),
             ]
         ),
@@ -184,7 +186,8 @@ sidebar = html.Div(
         ),
         dbc.FormFloating(
             [
-                dbc.Input(type="number", placeholder="34.123", id='input-longitude', value=7.6496971),
+                dbc.Input(type="number", placeholder="34.123", id='input-longitude', debounce=True,
+                          value=DEFAULT_LONGITUDE),
                 dbc.Label("Longitude (°)"),
             ]
         ),
@@ -386,7 +389,13 @@ sidebar = html.Div(
             backdrop="static",
             keyboard=False,
         ),
-        dcc.Interval(id="interval-simulate", n_intervals=0, interval=500),
+        # Progress polls, only enabled while a simulation of this browser runs
+        dcc.Interval(id="interval-simulate", n_intervals=0, interval=500, disabled=True),
+        # ID of the simulation job of this browser, and of the last one whose results were displayed
+        dcc.Store(id='store-simulation-job'),
+        dcc.Store(id='store-simulation-done'),
+        # Load parameters of this browser, the defaults until the load modal is closed
+        dcc.Store(id='store-load-parameters'),
         dbc.Modal(
             [
                 dbc.ModalHeader(dbc.ModalTitle("Load parameters")),
@@ -920,9 +929,7 @@ def toggle_modal(n_open, is_open):
                Output("input-longitude-modal", "value"), ],
               [Input("map", "click_lat_lng")])
 def map_click(click_lat_lng):
-    global latitude, longitude
-    latitude = click_lat_lng[0]
-    longitude = click_lat_lng[1]
+    latitude, longitude = click_lat_lng
     return [dl.Marker(position=click_lat_lng,
                       children=dl.Tooltip("({:.3f}, {:.3f})".format(latitude, longitude)))], round(latitude, 7), round(
         longitude, 7)
@@ -931,12 +938,13 @@ def map_click(click_lat_lng):
 @app.callback(
     [Output("input-latitude", "value"),
      Output("input-longitude", "value"), ],
-    [Input("button-close-modal-location", "n_clicks")]
+    [Input("button-close-modal-location", "n_clicks")],
+    [State("input-latitude-modal", "value"),
+     State("input-longitude-modal", "value"), ]
 )
-def toggle_modal(n_clicks):
-    global latitude, longitude
+def toggle_modal(n_clicks, latitude, longitude):
     if n_clicks:
-        return round(latitude, 7), round(longitude, 7)
+        return latitude, longitude
 
 
 @app.callback(
@@ -961,7 +969,6 @@ def tooltip_cost(pv_capacity, battery_capacity):
      Input("input-longitude", "value"), ],
 )
 def toggle_popover(lat_val, long_val):
-    global parameter_error
     popover_location = False
     popover_latitude = False
     popover_longitude = False
@@ -973,24 +980,20 @@ def toggle_popover(lat_val, long_val):
         if lat_val < -90 or lat_val > 90:
             popover_latitude = True
             input_latitude_inv = True
-            parameter_error = True
             return popover_location, popover_latitude, popover_longitude, input_latitude_inv, input_longitude_inv
 
     if long_val is not None:
         if long_val < -180 or long_val > 180:
             popover_longitude = True
             input_longitude_inv = True
-            parameter_error = True
             return popover_location, popover_latitude, popover_longitude, input_latitude_inv, input_longitude_inv
 
     if not check_location(lat_val, long_val):
         popover_location = True
         input_latitude_inv = True
         input_longitude_inv = True
-        parameter_error = True
         return popover_location, popover_latitude, popover_longitude, input_latitude_inv, input_longitude_inv
 
-    parameter_error = False
     return popover_location, popover_latitude, popover_longitude, input_latitude_inv, input_longitude_inv
 
 
@@ -1001,13 +1004,10 @@ def toggle_popover(lat_val, long_val):
     [State("popover-pv-power", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value <= 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1019,13 +1019,10 @@ def toggle_popover(value, is_open):
     [State("popover-tilt", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0 or value > 90:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1037,13 +1034,10 @@ def toggle_popover(value, is_open):
     [State("popover-orientation", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0 or value > 360:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1055,13 +1049,10 @@ def toggle_popover(value, is_open):
     [State("popover-battery-capacity", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1073,13 +1064,10 @@ def toggle_popover(value, is_open):
     [State("popover-discharge-limit", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0 or value > 100:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1091,13 +1079,10 @@ def toggle_popover(value, is_open):
     [State("popover-cost", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value <= 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1109,13 +1094,10 @@ def toggle_popover(value, is_open):
     [State("popover-buy-rate", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1127,13 +1109,10 @@ def toggle_popover(value, is_open):
     [State("popover-year-built", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value > int(datetime.datetime.now().date().strftime("%Y")):
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1145,13 +1124,10 @@ def toggle_popover(value, is_open):
     [State("popover-floor-area", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value <= 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1163,13 +1139,10 @@ def toggle_popover(value, is_open):
     [State("popover-nb-occupants", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value <= 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1181,13 +1154,10 @@ def toggle_popover(value, is_open):
     [State("popover-nb-floor", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value <= 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1199,13 +1169,10 @@ def toggle_popover(value, is_open):
     [State("popover-t-hot", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0 or value > 50:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1217,13 +1184,10 @@ def toggle_popover(value, is_open):
     [State("popover-t-cold", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0 or value > 50:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1235,13 +1199,10 @@ def toggle_popover(value, is_open):
     [State("popover-sell-rate", "is_open")],
 )
 def toggle_popover(value, is_open):
-    global parameter_error
     if value is not None:
         if value < 0:
-            parameter_error = True
             return True, True
         else:
-            parameter_error = False
             return False, False
     return is_open, is_open
 
@@ -1252,16 +1213,12 @@ def toggle_popover(value, is_open):
     [State("popover-occupancy-schedule", "is_open")],
 )
 def toggle_popover(data, is_open):
-    global parameter_error
     if data is not None:
         if None in data[0].values() or '' in data[0].values():
-            parameter_error = True
             return True
         if not all(float(value) >= 0 and float(value) <= 100 for value in data[0].values()):
-            parameter_error = True
             return True
         else:
-            parameter_error = False
             return False
     return is_open
 
@@ -1272,16 +1229,12 @@ def toggle_popover(data, is_open):
     [State("popover-temperature-schedule", "is_open")],
 )
 def toggle_popover(data, is_open):
-    global parameter_error
     if data is not None:
         if None in data[0].values() or '' in data[0].values():
-            parameter_error = True
             return True
         if not all(value.lower() == 'on' or value.lower() == 'off' for value in data[0].values()):
-            parameter_error = True
             return True
         else:
-            parameter_error = False
             return False
     return is_open
 
@@ -1292,32 +1245,71 @@ def toggle_popover(data, is_open):
     [State("popover-consumption", "is_open")],
 )
 def toggle_popover(data, is_open):
-    global parameter_error
     if data is not None:
         if None in data[0].values() or '' in data[0].values():
-            parameter_error = True
             return True
         if not all(float(value) >= 0 for value in data[0].values()):
-            parameter_error = True
             return True
         else:
-            parameter_error = False
             return False
     return is_open
 
 
+@app.callback(
+    Output('store-simulation-job', 'data'),
+    [Input("button-simulate", "n_clicks")],
+    [State("input-latitude", "value"),
+     State("input-longitude", "value"),
+     State("input-pv-power", "value"),
+     State("input-tilt", "value"),
+     State("input-orientation", "value"),
+     State("input-battery-capacity", "value"),
+     State("input-discharge-limit", "value"),
+     State("input-buy-rate", "value"),
+     State("input-sell-rate", "value"),
+     State("input-cost", "value"),
+     State('store-load-parameters', 'data'), ],
+)
+def submit_simulation(n_clicks, latitude, longitude, pv_capacity, tilt, orientation, battery_capacity,
+                      discharge_cutoff, buy_rate, sell_rate, cost, load_parameters):
+    if n_clicks == 0:
+        return dash.no_update
+    load_parameters = DEFAULT_LOAD_PARAMETERS if load_parameters is None else LoadParameters(**load_parameters)
+    # The simulation runs in a background process, the web worker stays free to serve other requests
+    # The stages whose inputs did not change are reused from the previous simulations of that process
+    return jobs.submit(pipeline.simulate_system, latitude, longitude, pv_capacity, tilt, orientation, battery_capacity,
+                       discharge_cutoff, buy_rate, sell_rate, cost, load_parameters)
+
+
+# Runs in the browser, an idle page sends no request
+app.clientside_callback(
+    """
+    function(job_id, done_job_id) {
+        return !job_id || job_id === done_job_id;
+    }
+    """,
+    Output("interval-simulate", "disabled"),
+    [Input('store-simulation-job', 'data'),
+     Input('store-simulation-done', 'data'), ],
+)
+
+
 @app.callback(
     [Output("modal-simulate", "is_open"),
-     Output("text-computing", "children"),],
+     Output("text-computing", "children"),
+     Output('store-simulation-done', 'data'), ],
     [Input("interval-simulate", "n_intervals")],
+    [State('store-simulation-job', 'data'),
+     State('store-simulation-done', 'data'), ],
 )
-def toggle_modal(n):
-    global simulating
-    from pre_simulator import simulation_state
-    if simulating:
-        return True, simulation_state
-    else:
-        return False, ''
+def toggle_modal(n, job_id, done_job_id):
+    # The job status is shared by every worker, the poll can land on any of them
+    if job_id is None or job_id == done_job_id:
+        return False, '', dash.no_update
+    status = jobs.get_status(job_id)
+    if status is None or status['state'] in (jobs.DONE, jobs.FAILED):
+        return False, '', job_id
+    return True, status['stage'] or 'Starting simulation...', dash.no_update
 
 
 @app.callback(
@@ -1343,117 +1335,83 @@ def toggle_modal(n):
      Output("description-profiles", "children"),
      Output('dynamic-button-container', 'children'),
      Output('spinner-simulate', 'children'), ],
-    [Input("button-simulate", "n_clicks")],
-    [State("input-latitude", "value"),
-     State("input-longitude", "value"),
-     State("input-pv-power", "value"),
-     State("input-tilt", "value"),
-     State("input-orientation", "value"),
-     State("input-battery-capacity", "value"),
-     State("input-discharge-limit", "value"),
-     State("input-buy-rate", "value"),
-     State("input-sell-rate", "value"),
-     State("input-cost", "value"),
-     State('dynamic-button-container', 'children'), ],
+    [Input('store-simulation-done', 'data')],
+    [State('dynamic-button-container', 'children'), ],
 )
-def simulate(n_clicks, latitude, longitude, pv_capacity, tilt, orientation, battery_capacity, discharge_cutoff,
-             buy_rate, sell_rate, cost, children):
-    global fig_energy, fig_finance, fig_profiles, fig_payback, fig_bills, fig_load, autonomy, electric_bill_reduction, electric_energy_export, src_autonomy, src_electric_bill_reduction, src_electric_energy_export, src_kwh_diagram, simulating
-    if n_clicks == 0:
-        return fig_energy, fig_energy, fig_finance, fig_finance, fig_payback, fig_payback, fig_profiles, fig_profiles, fig_bills, fig_load, src_autonomy, src_electric_bill_reduction, src_electric_energy_export, src_kwh_diagram, "", "", "", "", "", "", children, ''
-    else:
-        # print('simulate')
-        simulating = True
-        battery_initial_SOC = discharge_cutoff
-        output = compute_monthly_output(latitude, longitude, pv_capacity * 1000, battery_capacity * 1000,
-                                        discharge_cutoff, battery_initial_SOC,
-                                        load_parameters, tilt, orientation, buy_rate / 100, sell_rate / 100)
-
-        time_start = time.time()
-
-        fig_energy = create_fig_energy(output)
-        fig_finance = create_fig_financial(output)
-        fig_profiles = create_fig_profiles(output)
-        fig_bills = create_fig_bills(output.annual_elec_bill_wo_sys, output.annual_elec_bill_w_sys)
-        fig_load = create_fig_load(output.annual_pv_production, output.annual_import, output.annual_pv_to_batt,
-                                   output.annual_export)
-        fig_payback = create_fig_payback(output, cost, buy_rate, sell_rate, rate_escalation=0.10)
-
-        autonomy = int(round(100 * (output.annual_load + output.annual_import) / output.annual_load, 0))
-        savings_pv = output.annual_elec_bill_wo_sys - output.annual_import * buy_rate
-        savings_export = output.annual_export * sell_rate
-        electric_bill_reduction_pv = int(round(100 * savings_pv / output.annual_elec_bill_wo_sys, 0))
-        electric_bill_reduction_export = int(round(100 * savings_export / output.annual_elec_bill_wo_sys, 0))
-        electric_bill_reduction = int(round(
-            100 * (output.annual_elec_bill_wo_sys - output.annual_elec_bill_w_sys) / output.annual_elec_bill_wo_sys, 0))
-        electric_energy_export = int(round(100 * output.annual_export / output.annual_pv_production, 0))
-
-        contents = create_fig_percent(autonomy, electric_bill_reduction, electric_energy_export)
-
-        src_autonomy = contents[0]
-        src_electric_bill_reduction = contents[1]
-        src_electric_energy_export = contents[2]
-
-        src_kwh_diagram = create_kwh_diagram(round(output.annual_pv_production, 0), round(output.annual_import, 0),
-                                             round(output.annual_export, 0), round(output.annual_batt_to_system, 0),
-                                             round(output.annual_load, 0))
-
-        time_end = time.time()
-        # print("Time difference between start and end of figures:", time_end - time_start)
-
-        simulating = False
-
-        new_element = dbc.Button(color="warning", id='button-simulate', children='Simulate', n_clicks=0)
-        children.pop()
-        children.append(new_element)
-
-        description = dcc.Markdown(
-            f"The **PV-Battery** system you simulated with **{format_number(pv_capacity)} kWp** of PV peak power and **{format_number(battery_capacity)} kWh** of battery generates annually **{format_number(int(round(output.annual_pv_production, 0)))} kWh** of electricity from solar energy." \
-            f" Out of the **{format_number(int(round(output.annual_load, 0)))} kWh** of annual electric consumption, **{format_number(int(round(abs(output.annual_import), 0)))} kWh** had to be imported from the grid to cover your needs. " \
-            f"The battery allowed to store **{format_number(int(round(output.annual_batt_to_system, 0)))} kWh** of electric energy over the whole year and returned to the house when the Sun was down. However, when the Sun was shining and the battery was full, the system could export **{format_number(int(round(output.annual_export, 0)))} kWh** back to the grid.",
-            style={'font-size': '85%'})
-
-        description_load = dcc.Markdown(f'''
-
-            Currently, your system covers **{autonomy} %** of your electric consumption. A higher self-sufficiency rate means lower reliance on the grid, potentially lower energy costs, greater energy security, and a sense of self-reliance. A lower self-sufficiency rate means less solar energy is generated and stored, requiring more electricity from the grid. To improve it, one can try adding more PV panels if sufficient space is available or optimize their tilt and/or orientation if possible. Additionally, one can also try try to increase the battery capacity (up to a certain extent after which adding capacity does little effect on the self-sufficiency but costs significantly more). Finally, one can try to install energy-efficient appliances or adapt the heating/cooling parameters to lower the electric demand and therefore increase its self-sufficiency.
-
-            The system exports **{electric_energy_export} %** of its electric generation. Whether a high or low electric energy export rate is desirable for a PV battery system depends on the specific goals and circumstances of the system owner. In general, a higher electric energy export rate may be desirable if the owner wants to generate additional revenue by selling excess solar energy back to the grid. However, exporting more energy than necessary may also result in a higher electricity bill for the owner if they are not eligible for compensation from their utility company.
-            On the other hand, a lower electric energy export rate may be desirable if the owner wants to maximize self-consumption of solar energy and minimize reliance on the grid. By storing excess solar energy in a battery system, the owner can use the stored energy during times when solar energy is not being generated, such as at night or during cloudy days, rather than exporting it back to the grid. This can result in a higher self-sufficiency rate and lower electricity bills.
-            One way to increase the export rate is to install more PV panels and optimize their tilt and orientation.
+def simulate(job_id, children):
+    results = jobs.get_result(job_id)
+
+    new_element = dbc.Button(color="warning", id='button-simulate', children='Simulate', n_clicks=0)
+    children.pop()
+    children.append(new_element)
+
+    if results is None:
+        # Failed job, the previous results stay displayed with the error and the button is enabled again
+        status = jobs.get_status(job_id)
+        if status is not None and status['state'] == jobs.FAILED:
+            error = 'The simulation failed, please check the parameters and try again.'
+        else:
+            error = 'The results of the simulation are no longer available, please run it again.'
+        return [dash.no_update] * 14 + [dbc.Alert(error, color='danger')] + [dash.no_update] * 5 + [children, '']
+
+    output = results['output']
+    pv_capacity = results['pv_capacity']
+    battery_capacity = results['battery_capacity']
+    autonomy = results['autonomy']
+    electric_energy_export = results['electric_energy_export']
+
+    description = dcc.Markdown(
+        f"The **PV-Battery** system you simulated with **{format_number(pv_capacity)} kWp** of PV peak power and **{format_number(battery_capacity)} kWh** of battery generates annually **{format_number(int(round(output.annual_pv_production, 0)))} kWh** of electricity from solar energy." \
+        f" Out of the **{format_number(int(round(output.annual_load, 0)))} kWh** of annual electric consumption, **{format_number(int(round(abs(output.annual_import), 0)))} kWh** had to be imported from the grid to cover your needs. " \
+        f"The battery allowed to store **{format_number(int(round(output.annual_batt_to_system, 0)))} kWh** of electric energy over the whole year and returned to the house when the Sun was down. However, when the Sun was shining and the battery was full, the system could export **{format_number(int(round(output.annual_export, 0)))} kWh** back to the grid.",
+        style={'font-size': '85%'})
+
+    description_load = dcc.Markdown(f'''
+
+        Currently, your system covers **{autonomy} %** of your electric consumption. A higher self-sufficiency rate means lower reliance on the grid, potentially lower energy costs, greater energy security, and a sense of self-reliance. A lower self-sufficiency rate means less solar energy is generated and stored, requiring more electricity from the grid. To improve it, one can try adding more PV panels if sufficient space is available or optimize their tilt and/or orientation if possible. Additionally, one can also try try to increase the battery capacity (up to a certain extent after which adding capacity does little effect on the self-sufficiency but costs significantly more). Finally, one can try to install energy-efficient appliances or adapt the heating/cooling parameters to lower the electric demand and therefore increase its self-sufficiency.
+
+        The system exports **{electric_energy_export} %** of its electric generation. Whether a high or low electric energy export rate is desirable for a PV battery system depends on the specific goals and circumstances of the system owner. In general, a higher electric energy export rate may be desirable if the owner wants to generate additional revenue by selling excess solar energy back to the grid. However, exporting more energy than necessary may also result in a higher electricity bill for the owner if they are not eligible for compensation from their utility company.
+        On the other hand, a lower electric energy export rate may be desirable if the owner wants to maximize self-consumption of solar energy and minimize reliance on the grid. By storing excess solar energy in a battery system, the owner can use the stored energy during times when solar energy is not being generated, such as at night or during cloudy days, rather than exporting it back to the grid. This can result in a higher self-sufficiency rate and lower electricity bills.
+        One way to increase the export rate is to install more PV panels and optimize their tilt and orientation.
+    ''', style={'font-size': '85%'})
+
+    description_bills = dcc.Markdown(
+        f"""Finally, it is possible to save up to **{format_number(round(output.annual_elec_bill_wo_sys - output.annual_elec_bill_w_sys, 2))} €** per year by installing this system, by reducing the bill from **{format_number(output.annual_elec_bill_wo_sys)} €** to **{format_number(output.annual_elec_bill_w_sys)} €** (if the electric bill is negative, it means that the revenue from the electricity export is higher than the import price). Having a low electric bill is desirable for a photovoltaic (PV) battery system because it means that the system is generating a significant portion of the energy used on site, reducing reliance on the grid and saving money on electricity costs.
+                                            In addition, a low electric bill is important for achieving an optimal payback period, which can be determined by dividing the total system cost by the annual savings.
+                                            Strategies to have a low payback period include sizing the system components appropriately, optimizing the energy usage, maximizing the solar energy generation and taking advantage of the incentives.""",
+        style={'font-size': '85%'})
+
+    idx_max_pv = output.monthly_pv_production.argmax()
+    idx_min_pv = output.monthly_pv_production.argmin()
+    months = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+              'November', 'December']
+
+    description_energy = dcc.Markdown(
+        f"""This graph shows the monthly behavior of your system in terms of energy analysis. It includes the PV electricity generation, the load consumption, the grid electricity import, the grid electricity export and the average battery state of charge (SOC).
+                                            The month with the **highest PV electricity generation** is **{months[idx_max_pv]}** for which {format_number(output.monthly_pv_production.iloc[idx_max_pv])} kWh have been generated. And the month with the **lowest PV electricity generation** is **{months[idx_min_pv]}** for which {format_number(output.monthly_pv_production.iloc[idx_min_pv])} kWh have been generated. """,
+        style={'font-size': '85%'})
+
+    description_financial = dcc.Markdown('''
+        
+            The graph above shows the monthly behavior of your system in terms of financial analysis. It includes the electric bill with and without the PV-Battery system, the electricity export income and the cumulated savings over each month.
+        
+            The graph below indicates the payback period of the system, i.e. the time it takes for the savings generated by the system to offset the inital cost of installation, and the net value after 25 years, which is the total savings generated by the system minus the total installation cost (if the value is negative, it means that after 25 years, the total savings could not offset the total installation cost). In this case, a period of 25 years is analyzed with three different electricity import price escalation rate scenarios. The first scenario assumes a 0% escalation per year, meaning the electricity import price remains constant, the second one assumes a 4% escalation per year, meaning the electricity import price increases by 4% every year, and a last scenario with an 8% escalation per year. A shorter payback period means that the savings generated by the system will offset the initial cost of installation more quickly, allowing homeowners and building managers to recoup their investment and enjoy greater savings over the lifetime of the system. A longer payback period may mean that the savings generated by the system will take more time to offset the initial cost of installation, but can still result in significant savings over the long term. It is worth noting that, to reduce the payback period, one should look for a system without or with a small battery storage solution as this component largely increases the cost per kWh of the system.
         ''', style={'font-size': '85%'})
 
-        description_bills = dcc.Markdown(
-            f"""Finally, it is possible to save up to **{format_number(round(output.annual_elec_bill_wo_sys - output.annual_elec_bill_w_sys, 2))} €** per year by installing this system, by reducing the bill from **{format_number(output.annual_elec_bill_wo_sys)} €** to **{format_number(output.annual_elec_bill_w_sys)} €** (if the electric bill is negative, it means that the revenue from the electricity export is higher than the import price). Having a low electric bill is desirable for a photovoltaic (PV) battery system because it means that the system is generating a significant portion of the energy used on site, reducing reliance on the grid and saving money on electricity costs.
-                                                In addition, a low electric bill is important for achieving an optimal payback period, which can be determined by dividing the total system cost by the annual savings.
-                                                Strategies to have a low payback period include sizing the system components appropriately, optimizing the energy usage, maximizing the solar energy generation and taking advantage of the incentives.""",
-            style={'font-size': '85%'})
+    description_profiles = dcc.Markdown(
+        f"""This graph shows the daily average profiles of the system. For each month of the year, an average day is computed to allow a more precise analysis of how the system is behaving on an hourly scale. It includes the PV electricity generation, the load consumption, the grid electricity exchange (if the value is negative, the system imports from the grid and if the value is positive, it exports to the grid) and the battery state of charge (SOC). """,
+        style={'font-size': '85%'})
 
-        idx_max_pv = output.monthly_pv_production.argmax()
-        idx_min_pv = output.monthly_pv_production.argmin()
-        months = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
-                  'November', 'December']
-
-        description_energy = dcc.Markdown(
-            f"""This graph shows the monthly behavior of your system in terms of energy analysis. It includes the PV electricity generation, the load consumption, the grid electricity import, the grid electricity export and the average battery state of charge (SOC).
-                                                The month with the **highest PV electricity generation** is **{months[idx_max_pv]}** for which {format_number(output.monthly_pv_production.iloc[idx_max_pv])} kWh have been generated. And the month with the **lowest PV electricity generation** is **{months[idx_min_pv]}** for which {format_number(output.monthly_pv_production.iloc[idx_min_pv])} kWh have been generated. """,
-            style={'font-size': '85%'})
-
-        description_financial = dcc.Markdown('''
-            
-                The graph above shows the monthly behavior of your system in terms of financial analysis. It includes the electric bill with and without the PV-Battery system, the electricity export income and the cumulated savings over each month.
-            
-                The graph below indicates the payback period of the system, i.e. the time it takes for the savings generated by the system to offset the inital cost of installation, and the net value after 25 years, which is the total savings generated by the system minus the total installation cost (if the value is negative, it means that after 25 years, the total savings could not offset the total installation cost). In this case, a period of 25 years is analyzed with three different electricity import price escalation rate scenarios. The first scenario assumes a 0% escalation per year, meaning the electricity import price remains constant, the second one assumes a 4% escalation per year, meaning the electricity import price increases by 4% every year, and a last scenario with an 8% escalation per year. A shorter payback period means that the savings generated by the system will offset the initial cost of installation more quickly, allowing homeowners and building managers to recoup their investment and enjoy greater savings over the lifetime of the system. A longer payback period may mean that the savings generated by the system will take more time to offset the initial cost of installation, but can still result in significant savings over the long term. It is worth noting that, to reduce the payback period, one should look for a system without or with a small battery storage solution as this component largely increases the cost per kWh of the system.
-            ''', style={'font-size': '85%'})
-
-        description_profiles = dcc.Markdown(
-            f"""This graph shows the daily average profiles of the system. For each month of the year, an average day is computed to allow a more precise analysis of how the system is behaving on an hourly scale. It includes the PV electricity generation, the load consumption, the grid electricity exchange (if the value is negative, the system imports from the grid and if the value is positive, it exports to the grid) and the battery state of charge (SOC). """,
-            style={'font-size': '85%'})
-
-        return fig_energy, fig_energy, fig_finance, fig_finance, fig_payback, fig_payback, fig_profiles, fig_profiles, fig_bills, fig_load, src_autonomy, src_electric_bill_reduction, src_electric_energy_export, src_kwh_diagram, description, description_bills, description_load, description_energy, description_financial, description_profiles, children, ''
+    return results['fig_energy'], results['fig_energy'], results['fig_finance'], results['fig_finance'], \
+        results['fig_payback'], results['fig_payback'], results['fig_profiles'], results['fig_profiles'], \
+        results['fig_bills'], results['fig_load'], results['src_autonomy'], results['src_electric_bill_reduction'], \
+        results['src_electric_energy_export'], results['src_kwh_diagram'], description, description_bills, \
+        description_load, description_energy, description_financial, description_profiles, children, ''
 
 
 @app.callback(
-    [Output('spinner-load', 'children'), ],
+    [Output('spinner-load', 'children'),
+     Output('store-load-parameters', 'data'), ],
     [Input("button-close-modal", "n_clicks")],
     [State("input-year-built", "value"),
      State("input-floor-area", "value"),
@@ -1468,18 +1426,7 @@ def simulate(n_clicks, latitude, longitude, pv_capacity, tilt, orientation, batt
 )
 def compute_load(n_clicks, year_built, floor_area, occupants, floors, occ_schedule, t_heat, t_cool,
                  t_sched, monthly_util, equipment):
-    global load_parameters
     if n_clicks:
-        load_parameters.year_built = year_built
-        load_parameters.floor_area = floor_area
-        load_parameters.occupants = occupants
-        load_parameters.floors = floors
-        load_parameters.t_heat = t_heat
-        load_parameters.t_cool = t_cool
-
-        load_parameters.occ_schedule = [float(i) / 100 for i in list(occ_schedule[0].values())]
-        load_parameters.monthly_util = [float(i) for i in list(monthly_util[0].values())]
-
         t_sched_list = []
         for val in list(t_sched[0].values()):
             if val.lower() == 'on':
@@ -1487,48 +1434,56 @@ def compute_load(n_clicks, year_built, floor_area, occupants, floors, occ_schedu
             else:
                 t_sched_list.append(0.0)
 
-        load_parameters.t_sched = t_sched_list
-
-        load_parameters.en_cool = 0.0
-        load_parameters.en_heating = 0.0
-        load_parameters.en_dishwasher = 0.0
-        load_parameters.en_washing_machine = 0.0
-        load_parameters.en_dryer = 0.0
-        load_parameters.en_fridge = 0.0
-        load_parameters.en_stove = 0.0
-        load_parameters.en_misc = 0.0
-
-        if 1 in equipment:
-            load_parameters.en_cool = 1.0
-        if 2 in equipment:
-            load_parameters.en_heating = 1.0
-        if 3 in equipment:
-            load_parameters.en_dishwasher = 1.0
-        if 4 in equipment:
-            load_parameters.en_washing_machine = 1.0
-        if 5 in equipment:
-            load_parameters.en_dryer = 1.0
-        if 6 in equipment:
-            load_parameters.en_fridge = 1.0
-        if 7 in equipment:
-            load_parameters.en_stove = 1.0
-        if 8 in equipment:
-            load_parameters.en_misc = 1.0
-
-    return [""]
+        load_parameters = LoadParameters(
+            monthly_util=[float(i) for i in list(monthly_util[0].values())],
+            occ_schedule=[float(i) / 100 for i in list(occ_schedule[0].values())],
+            occupants=occupants,
+            retrofitted=DEFAULT_LOAD_PARAMETERS.retrofitted,
+            floors=floors,
+            t_cool=t_cool,
+            t_heat=t_heat,
+            t_sched=t_sched_list,
+            year_built=year_built,
+            floor_area=floor_area,
+            en_cool=1.0 if 1 in equipment else 0.0,
+            en_dishwasher=1.0 if 3 in equipment else 0.0,
+            en_dryer=1.0 if 5 in equipment else 0.0,
+            en_fridge=1.0 if 6 in equipment else 0.0,
+            en_heating=1.0 if 2 in equipment else 0.0,
+            en_misc=1.0 if 8 in equipment else 0.0,
+            en_stove=1.0 if 7 in equipment else 0.0,
+            en_washing_machine=1.0 if 4 in equipment else 0.0,
+        )
+        return "", load_parameters.as_dict()
+
+    return "", dash.no_update
+
+
+# Inputs flagged as invalid by their popover callback, and popovers of the tables, which have no invalid property
+VALIDATED_INPUTS = ['input-latitude', 'input-longitude', 'input-pv-power', 'input-tilt', 'input-orientation',
+                    'input-battery-capacity', 'input-discharge-limit', 'input-cost', 'input-buy-rate',
+                    'input-sell-rate', 'input-year-built', 'input-floor-area', 'input-nb-occupants', 'input-nb-floor',
+                    'input-t-hot', 'input-t-cold']
+VALIDATED_TABLES = ['popover-occupancy-schedule', 'popover-temperature-schedule', 'popover-consumption']
 
 
 @app.callback(
     Output('button-simulate', 'disabled'),
-    [Input('button-simulate', 'n_clicks'),
-     Input("interval-simulate", "n_intervals")]
+    [Input('button-simulate', 'n_clicks')] +
+    [Input(input_id, 'invalid') for input_id in VALIDATED_INPUTS] +
+    [Input(popover_id, 'is_open') for popover_id in VALIDATED_TABLES],
+    [State('store-simulation-job', 'data'),
+     State('store-simulation-done', 'data'), ]
 )
-def disabled(n_clicks, n):
-    triggered_id = ctx.triggered_id
-    if triggered_id == 'button-simulate':
-        return hide_newbutton(n_clicks)
-    elif triggered_id == 'interval-simulate':
-        return disabled_error(n)
+def disabled(n_clicks, *values):
+    *errors, job_id, done_job_id = values
+    # Disabled from the click until the results replace the button, or while an input is invalid
+    if ctx.triggered_id == 'button-simulate' and hide_newbutton(n_clicks):
+        return True
+    if job_id is not None and job_id != done_job_id:
+        # A simulation of this browser is pending, fixing an input must not allow a second one
+        return True
+    return disabled_error(errors)
 
 
 def hide_newbutton(n_clicks):
@@ -1538,12 +1493,9 @@ def hide_newbutton(n_clicks):
         return True
 
 
-def disabled_error(n):
-    global parameter_error
-    if parameter_error:
-        return True
-    else:
-        return False
+def disabled_error(errors):
+    # The state of the page is only read from the browser, a worker can serve several users at once
+    return any(errors)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,200 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import configure_logging
+from pre_simulator import LoadParameters, compute_monthly_output, compute_percentages
+from weather_cache import round_coordinates
+
+# Same units as the inputs of the Dash app: kWp, kWh, %, degrees and c€/kWh
+SITE_DEFAULTS = {
+    'pv_capacity': 5,
+    'battery_capacity': 8,
+    'discharge_cutoff': 10,
+    'tilt': 60,
+    'orientation': 180,
+    'buy_rate': 17.4,
+    'sell_rate': 10.0,
+    'year_built': 2000,
+    'floor_area': 150,
+    'occupants': 4,
+    'floors': 2,
+    't_heat': 20,
+    't_cool': 25,
+}
+DEFAULT_MONTHLY_UTIL = [1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000]
+MONTHLY_UTIL_COLUMNS = ['monthly_util_{}'.format(m) for m in range(1, 13)]
+
+ANNUAL_COLUMNS = ['annual_pv_production', 'annual_batt_to_system', 'annual_pv_to_batt', 'annual_energy_yield',
+                  'annual_load', 'annual_import', 'annual_export', 'annual_elec_bill_wo_sys',
+                  'annual_elec_bill_w_sys', 'annual_sell', 'annual_savings']
+RESULT_COLUMNS = ANNUAL_COLUMNS + ['autonomy', 'electric_bill_reduction', 'electric_energy_export', 'error']
+
+
+def read_sites(path):
+    """
+    Reads the sites to simulate, one row per site and design
+    :param path: CSV or Parquet file with at least the latitude and longitude columns, the other inputs
+    (see SITE_DEFAULTS and monthly_util_1 to monthly_util_12) are optional
+    :return: DataFrame with every input column filled
+    """
+    if path.endswith('.parquet'):
+        sites = pd.read_parquet(path)
+    else:
+        sites = pd.read_csv(path)
+
+    missing = {'latitude', 'longitude'} - set(sites.columns)
+    if missing:
+        raise ValueError('Missing columns in {}: {}'.format(path, ', '.join(sorted(missing))))
+
+    if 'site_id' not in sites.columns:
+        sites['site_id'] = np.arange(len(sites))
+    for column, value in SITE_DEFAULTS.items():
+        if column not in sites.columns:
+            sites[column] = value
+        else:
+            sites[column] = sites[column].fillna(value)
+    for column, value in zip(MONTHLY_UTIL_COLUMNS, DEFAULT_MONTHLY_UTIL):
+        if column not in sites.columns:
+            sites[column] = value
+
+    return sites
+
+
+def site_load_parameters(site):
+    return LoadParameters(
+        monthly_util=[float(site[column]) for column in MONTHLY_UTIL_COLUMNS],
+        occ_schedule=[1.0] * 24,
+        occupants=site['occupants'],
+        retrofitted=0,
+        floors=site['floors'],
+        t_cool=site['t_cool'],
+        t_heat=site['t_heat'],
+        t_sched=[1.0] * 24,
+        year_built=site['year_built'],
+        floor_area=site['floor_area'],
+        en_cool=1.0,
+        en_dishwasher=1.0,
+        en_dryer=1.0,
+        en_fridge=1.0,
+        en_heating=1.0,
+        en_misc=1.0,
+        en_stove=1.0,
+        en_washing_machine=1.0,
+    )
+
+
+def simulate_site(site):
+    output = compute_monthly_output(site['latitude'], site['longitude'], site['pv_capacity'] * 1000,
+                                    site['battery_capacity'] * 1000, site['discharge_cutoff'],
+                                    site['discharge_cutoff'], site_load_parameters(site), site['tilt'],
+                                    site['orientation'], site['buy_rate'] / 100, site['sell_rate'] / 100)
+    result = {column: getattr(output, column) for column in ANNUAL_COLUMNS}
+    result['autonomy'], result['electric_bill_reduction'], result['electric_energy_export'] = compute_percentages(
+        output)
+
+    return result
+
+
+def _simulate_group(sites):
+    # All the sites of a group share the same location, so the worker caches reuse the weather, PV and load
+    results = []
+    for site in sites:
+        try:
+            result = simulate_site(site)
+            result['error'] = ''
+        except Exception as e:
+            # One failing site (e.g. a location without PVGIS data) must not stop the batch
+            result = {'error': repr(e)}
+        results.append(dict(site, **result))
+
+    return results
+
+
+def _group_sites(sites, chunk_size):
+    locations = [round_coordinates(lat, lon) for lat, lon in zip(sites['latitude'], sites['longitude'])]
+    groups = {}
+    for location, site in zip(locations, sites.to_dict('records')):
+        groups.setdefault(location, []).append(site)
+
+    for group in groups.values():
+        for i in range(0, len(group), chunk_size):
+            yield group[i:i + chunk_size]
+
+
+class _ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._csv_header = True
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, results):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            results.to_csv(self.path, mode='a', header=self._csv_header, index=False)
+            self._csv_header = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def run_batch(sites, output_path, workers=None, chunk_size=50):
+    """
+    Simulates every site over a process pool and streams the results to a file
+    :param sites: DataFrame returned by read_sites
+    :param output_path: Parquet (requires pyarrow) or CSV file, overwritten
+    :param workers: number of worker processes, all the CPUs by default
+    :param chunk_size: maximum number of sites of the same location simulated by one task
+    :return: number of simulations and throughput in simulations per second
+    """
+    columns = list(sites.columns) + RESULT_COLUMNS
+    writer = _ResultWriter(output_path)
+    time_start = time.time()
+    count = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_simulate_group, group) for group in _group_sites(sites, chunk_size)]
+            for future in as_completed(futures):
+                results = pd.DataFrame(future.result(), columns=columns)
+                # Keep the same schema for every chunk, failed sites have NaN results
+                results[RESULT_COLUMNS[:-1]] = results[RESULT_COLUMNS[:-1]].astype(float)
+                writer.write(results)
+                count += len(results)
+    finally:
+        writer.close()
+
+    elapsed = time.time() - time_start
+    return count, count / elapsed if elapsed else float('nan')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Simulates a portfolio of PV-battery systems off-line.')
+    parser.add_argument('sites', help='CSV or Parquet file of sites, see batch.read_sites')
+    parser.add_argument('output', help='Parquet or CSV file where the results are streamed')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: all CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=50, help='sites of one location per task')
+    args = parser.parse_args(args)
+    configure_logging()
+
+    sites = read_sites(args.sites)
+    count, throughput = run_batch(sites, args.output, workers=args.workers, chunk_size=args.chunk_size)
+    print('{} simulations written to {} ({:.2f} simulations/s)'.format(count, args.output, throughput))
+
+
+if __name__ == '__main__':
+    main()
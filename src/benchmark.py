@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+LATITUDE = 45.977
+LONGITUDE = 7.65
+# Same system as the defaults of the Dash app, its cost is cost_estimator(5, 8)
+SYSTEM = {'pv_capacity': 5, 'tilt': 60, 'orientation': 180, 'battery_capacity': 8, 'discharge_cutoff': 10,
+          'buy_rate': 17.4, 'sell_rate': 10.0, 'cost': 22500}
+# A benchmark is slower (or faster) than the baseline when the median changes by more than this ratio
+COMPARE_THRESHOLD = 0.10
+# PVGIS JSON TMY response served by default, written by "python benchmark.py --write-fixture" from the bundled
+# template_tmy_load.csv in the layout of PVGIS, a response recorded from PVGIS can replace it
+# It is synthetic, not the weather of the benchmark location: the relative humidity and the infrared radiation are
+# constant, the year is 2019 for every month
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_tmy.json')
+
+
+def template_tmy_response():
+    """
+    PVGIS JSON TMY response built from the bundled template_tmy_load.csv, so that the benchmarks run offline
+    Synthetic: the relative humidity (50 %) and the infrared radiation (300 W/m2) are constant
+    """
+    tmy = pd.read_csv('template_tmy_load.csv', header=None, skiprows=3)
+    times = pd.date_range('2019-01-01', periods=len(tmy), freq='h')
+    return json.dumps({
+        'inputs': {'location': {'latitude': LATITUDE, 'longitude': LONGITUDE, 'elevation': 1600}},
+        'outputs': {
+            'months_selected': [{'month': m, 'year': 2019} for m in range(1, 13)],
+            'tmy_hourly': [{'time(UTC)': t.strftime('%Y%m%d:%H%M'), 'T2m': row[9], 'RH': 50.0, 'G(h)': row[7],
+                            'Gb(n)': row[5], 'Gd(h)': row[6], 'IR(h)': 300.0, 'WS10m': row[12], 'WD10m': row[11],
+                            'SP': row[10] * 100} for t, row in zip(times, tmy.to_numpy(dtype=float))]},
+        'meta': {}}).encode()
+
+
+def read_fixture(path=FIXTURE):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def start_fixture_server(body):
+    """
+    Serves the same TMY response for every location on a local port
+    :return: the server and its URL, to be used as PVGIS URL
+    """
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}/'.format(server.server_address[1])
+
+
+def offline_environment(url, directory):
+    """
+    :return: environment variables using the PVGIS fixture at url and empty caches in directory
+    """
+    return {'PRESIMULATOR_PVGIS_URL': url,
+            'PRESIMULATOR_CACHE_DIR': os.path.join(directory, 'weather'),
+            'PRESIMULATOR_WEATHER_ARCHIVE': os.path.join(directory, 'weather_archive'),
+            'PRESIMULATOR_JOBS_DIR': os.path.join(directory, 'jobs'),
+            'PRESIMULATOR_METRICS_DIR': os.path.join(directory, 'metrics')}
+
+
+def measure(function, setup=None, repeat=5):
+    """
+    Times function over repeat runs, then measures its memory in one more run with tracemalloc, which slows it down
+    :param setup: function called before each run, not measured, e.g. to clear the caches
+    :return: dict of the wall times (s), peak memory and memory retained after the call (bytes)
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        time_start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - time_start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+    differences = tracemalloc.take_snapshot().compare_to(before, 'filename')
+    tracemalloc.stop()
+
+    return {'repeat': repeat, 'median': statistics.median(times), 'min': min(times), 'max': max(times),
+            'peak_memory': peak_memory,
+            'retained_memory': sum(difference.size_diff for difference in differences),
+            'retained_blocks': sum(difference.count_diff for difference in differences)}
+
+
+def benchmarks():
+    """
+    :return: list of (name, function, setup) of the hot paths, the project modules are imported here so that the
+    fixture settings apply to them
+    """
+    import pipeline
+    import pre_simulator as ps
+    from app import DEFAULT_LOAD_PARAMETERS as load_parameters
+
+    def clear_results():
+        ps.pv_cache.clear()
+        ps.load_cache.clear()
+        ps.load_component_cache.clear()
+        ps.load_component_requests.clear()
+
+    def clear_images():
+        ps.draw_percent_ring.cache_clear()
+        ps.create_percent_image.cache_clear()
+        ps._create_kwh_diagram.cache_clear()
+
+    def clear_stages():
+        for stage in pipeline.STAGES.values():
+            stage.cache.clear()
+        clear_images()
+
+    def monthly_output(battery_capacity):
+        return lambda: ps.compute_monthly_output(
+            LATITUDE, LONGITUDE, SYSTEM['pv_capacity'] * 1000, battery_capacity * 1000, SYSTEM['discharge_cutoff'],
+            SYSTEM['discharge_cutoff'], load_parameters, SYSTEM['tilt'], SYSTEM['orientation'],
+            SYSTEM['buy_rate'] / 100, SYSTEM['sell_rate'] / 100)
+
+    output = monthly_output(SYSTEM['battery_capacity'])()
+    autonomy, bill_reduction, energy_export = ps.compute_percentages(output)
+
+    return [
+        ('compute_load', lambda: ps.compute_load(LATITUDE, LONGITUDE, load_parameters), None),
+        ('compute_monthly_output_battery_cold', monthly_output(SYSTEM['battery_capacity']), clear_results),
+        ('compute_monthly_output_battery', monthly_output(SYSTEM['battery_capacity']), None),
+        ('compute_monthly_output_no_battery', monthly_output(0), None),
+        ('create_fig_energy', lambda: ps.create_fig_energy(output), None),
+        ('create_fig_financial', lambda: ps.create_fig_financial(output), None),
+        ('create_fig_payback', lambda: ps.create_fig_payback(output, SYSTEM['cost'], SYSTEM['buy_rate'],
+                                                             SYSTEM['sell_rate']), None),
+        ('create_fig_profiles', lambda: ps.create_fig_profiles(output), None),
+        ('create_fig_bills', lambda: ps.create_fig_bills(output.annual_elec_bill_wo_sys,
+                                                         output.annual_elec_bill_w_sys), None),
+        ('create_fig_load', lambda: ps.create_fig_load(output.annual_pv_production, output.annual_import,
+                                                       output.annual_pv_to_batt, output.annual_export), None),
+        ('create_fig_percent', lambda: ps.create_fig_percent(autonomy, bill_reduction, energy_export), clear_images),
+        ('create_kwh_diagram', lambda: ps.create_kwh_diagram(
+            round(output.annual_pv_production, 0), round(output.annual_import, 0), round(output.annual_export, 0),
+            round(output.annual_batt_to_system, 0), round(output.annual_load, 0), width=ps.KWH_DIAGRAM_WIDTH,
+            enc_format=ps.KWH_DIAGRAM_FORMAT), clear_images),
+        ('simulate_system', lambda: pipeline.simulate_system(
+            LATITUDE, LONGITUDE, SYSTEM['pv_capacity'], SYSTEM['tilt'], SYSTEM['orientation'],
+            SYSTEM['battery_capacity'], SYSTEM['discharge_cutoff'], SYSTEM['buy_rate'], SYSTEM['sell_rate'],
+            SYSTEM['cost'], load_parameters), clear_stages),
+        ('simulate_callback', simulate_callback, None),
+    ]
+
+
+def simulate_callback():
+    # Same calls as the browser: submission, polling of the progress, then the simulate callback
+    # The job runs in a job process, the memory measures only cover the web side
+    import app
+    import jobs
+
+    job_id = app.submit_simulation(1, LATITUDE, LONGITUDE, SYSTEM['pv_capacity'], SYSTEM['tilt'],
+                                   SYSTEM['orientation'], SYSTEM['battery_capacity'], SYSTEM['discharge_cutoff'],
+                                   SYSTEM['buy_rate'], SYSTEM['sell_rate'], SYSTEM['cost'],
+                                   app.DEFAULT_LOAD_PARAMETERS.as_dict())
+    while jobs.get_status(job_id)['state'] not in (jobs.DONE, jobs.FAILED):
+        time.sleep(0.01)
+    return app.simulate(job_id, [app.dbc.Button(id='button-simulate')])
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pvlib
+    return {'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'pvlib': pvlib.__version__}
+
+
+def run(names=None, repeat=5, fixture=FIXTURE):
+    """
+    Runs the benchmarks offline: PVGIS is replaced by a local server of the fixture and every cache starts empty
+    :param names: names of the benchmarks to run, all by default
+    :param fixture: file of a PVGIS JSON TMY response
+    :return: dict of the environment and of the measures of each benchmark
+    """
+    server, url = start_fixture_server(read_fixture(fixture))
+    directory = tempfile.mkdtemp(prefix='presimulator_benchmark_')
+    os.environ.update(offline_environment(url, directory))
+
+    results = {}
+    try:
+        for name, function, setup in benchmarks():
+            if names and name not in names:
+                continue
+            results[name] = measure(function, setup, repeat)
+            print('{:<40} {:>10.1f} ms {:>10.1f} MB'.format(name, 1000 * results[name]['median'],
+                                                            results[name]['peak_memory'] / 1e6), file=sys.stderr)
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {'environment': environment(), 'results': results}
+
+
+def compare(baseline, current, threshold=COMPARE_THRESHOLD):
+    """
+    :return: lines of the comparison of the medians and peak memories of two runs
+    """
+    lines = ['{:<40} {:>12} {:>12} {:>8} {:>10}'.format('benchmark', 'baseline ms', 'current ms', 'ratio', 'memory')]
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]
+        ratio = result['median'] / base['median']
+        if ratio > 1 + threshold:
+            verdict = 'slower'
+        elif ratio < 1 - threshold:
+            verdict = 'faster'
+        else:
+            verdict = ''
+        memory_ratio = result['peak_memory'] / base['peak_memory'] if base['peak_memory'] else float('nan')
+        lines.append('{:<40} {:>12.1f} {:>12.1f} {:>8.2f} {:>9.2f}x {}'.format(
+            name, 1000 * base['median'], 1000 * result['median'], ratio, memory_ratio, verdict))
+
+    return lines
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Times the simulation and rendering hot paths offline.')
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs of each benchmark')
+    parser.add_argument('--output', help='JSON file of the results')
+    parser.add_argument('--fixture', default=FIXTURE, help='file of a PVGIS JSON TMY response, default: {}'.format(
+        os.path.relpath(FIXTURE)))
+    parser.add_argument('--write-fixture', action='store_true',
+                        help='writes the synthetic response built from template_tmy_load.csv, constant humidity and '
+                             'infrared radiation, to the fixture file and exits')
+    parser.add_argument('--compare', nargs='+', metavar='JSON',
+                        help='compares a baseline run with a new run, or with the current code if only one file is '
+                             'given')
+    args = parser.parse_args(args)
+
+    if args.write_fixture:
+        with open(args.fixture, 'wb') as file:
+            file.write(template_tmy_response())
+        return
+
+    if args.compare and len(args.compare) > 1:
+        with open(args.compare[1]) as file:
+            current = json.load(file)
+    else:
+        current = run(args.names, args.repeat, args.fixture)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(current, file, indent=2)
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            baseline = json.load(file)
+        print('\n'.join(compare(baseline, current)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import numpy as np
+
+# numba is in requirements.txt, without it the same kernel runs as pure Python, about 80 times slower
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _dispatch_kernel(net_power, battery_capacity_real, battery_capacity, to_from_battery, grid_import, grid_export):
+    # Same arithmetic, in the same order, as the original hourly loop so that results are bit-identical
+    batt_cap_prev = 0.0
+    for i in range(len(net_power)):
+        diff = batt_cap_prev + net_power[i]
+        if diff >= 0.0:
+            if diff > battery_capacity_real:
+                battery_capacity[i] = battery_capacity_real
+                grid_export[i] = diff - battery_capacity_real
+                to_from_battery[i] = net_power[i] - (diff - battery_capacity_real)
+            else:
+                battery_capacity[i] = batt_cap_prev + net_power[i]
+                to_from_battery[i] = net_power[i]
+        else:
+            grid_import[i] = diff
+            battery_capacity[i] = batt_cap_prev + net_power[i] - diff
+            to_from_battery[i] = net_power[i] - diff
+        batt_cap_prev = battery_capacity[i]
+
+
+if njit is not None:
+    _compiled_kernel = njit(cache=True, nogil=True)(_dispatch_kernel)
+else:
+    _compiled_kernel = None
+
+
+def dispatch_battery(net_power, battery_capacity_real, compiled=True):
+    """
+    Charges and discharges the battery hour by hour from the net power (PV minus load)
+    :param net_power: array of the hourly net power (W)
+    :param battery_capacity_real: usable battery capacity, i.e. above the discharge cutoff (Wh)
+    :param compiled: use the numba kernel when numba is installed
+    :return: battery capacity, power to/from battery, grid import and grid export arrays
+    """
+    net_power = np.ascontiguousarray(net_power, dtype=np.float64)
+    battery_capacity_real = float(battery_capacity_real)
+
+    if compiled and _compiled_kernel is not None:
+        outputs = [np.zeros(len(net_power)) for _ in range(4)]
+        _compiled_kernel(net_power, battery_capacity_real, *outputs)
+        return tuple(outputs)
+
+    # Python floats in lists are much faster to index one by one than NumPy scalars
+    outputs = [[0.0] * len(net_power) for _ in range(4)]
+    _dispatch_kernel(net_power.tolist(), battery_capacity_real, *outputs)
+    return tuple(np.array(output) for output in outputs)
+
+
+def dispatch_grid(net_power):
+    """
+    Splits the net power between grid import and export for a system without battery
+    :param net_power: array of the hourly net power (W)
+    :return: grid import and grid export arrays
+    """
+    net_power = np.asarray(net_power, dtype=np.float64)
+    grid_import = np.where(net_power < 0.0, net_power, 0.0)
+    grid_export = np.where(net_power > 0.0, net_power, 0.0)
+
+    return grid_import, grid_export
+
+
+def _dispatch_totals_kernel(net_power, battery_capacity_real, totals):
+    # Same rules as _dispatch_kernel for each case, only the annual totals are kept to save memory
+    for j in range(net_power.shape[0]):
+        batt_cap_prev = 0.0
+        for i in range(net_power.shape[1]):
+            net = net_power[j, i]
+            diff = batt_cap_prev + net
+            if diff >= 0.0:
+                if diff > battery_capacity_real[j]:
+                    batt_cap = battery_capacity_real[j]
+                    totals[1, j] += diff - battery_capacity_real[j]
+                    to_from_battery = net - (diff - battery_capacity_real[j])
+                else:
+                    batt_cap = batt_cap_prev + net
+                    to_from_battery = net
+            else:
+                totals[0, j] += diff
+                batt_cap = batt_cap_prev + net - diff
+                to_from_battery = net - diff
+            if to_from_battery > 0:
+                totals[2, j] += to_from_battery
+            elif to_from_battery < 0:
+                totals[3, j] += to_from_battery
+            batt_cap_prev = batt_cap
+
+
+if njit is not None:
+    _compiled_totals_kernel = njit(cache=True, nogil=True)(_dispatch_totals_kernel)
+else:
+    _compiled_totals_kernel = None
+
+
+def _dispatch_totals_numpy(net_power, battery_capacity_real, totals):
+    # Vectorized over the cases, one step per hour
+    batt_cap_prev = np.zeros(net_power.shape[0])
+    for net in np.ascontiguousarray(net_power.T):
+        diff = batt_cap_prev + net
+        full = (diff >= 0.0) & (diff > battery_capacity_real)
+        empty = diff < 0.0
+        totals[0] += np.where(empty, diff, 0.0)
+        totals[1] += np.where(full, diff - battery_capacity_real, 0.0)
+        to_from_battery = np.where(full, net - (diff - battery_capacity_real), np.where(empty, net - diff, net))
+        totals[2] += np.where(to_from_battery > 0, to_from_battery, 0.0)
+        totals[3] += np.where(to_from_battery < 0, to_from_battery, 0.0)
+        batt_cap_prev = np.where(full, battery_capacity_real, np.where(empty, batt_cap_prev + net - diff, diff))
+
+
+def dispatch_battery_totals(net_power, battery_capacity_real, compiled=True):
+    """
+    Runs the battery dispatch of many systems at once and sums the results over the year
+    :param net_power: 2-D array of the hourly net power (W), one row per system
+    :param battery_capacity_real: usable battery capacity of each system (Wh), 0 for a system without battery
+    :param compiled: use the numba kernel when numba is installed
+    :return: grid import, grid export, positive and negative power to/from battery totals (Wh), one value per system
+    """
+    net_power = np.ascontiguousarray(net_power, dtype=np.float64)
+    battery_capacity_real = np.broadcast_to(np.asarray(battery_capacity_real, dtype=np.float64),
+                                            net_power.shape[:1]).copy()
+    totals = np.zeros((4, net_power.shape[0]))
+
+    if compiled and _compiled_totals_kernel is not None:
+        _compiled_totals_kernel(net_power, battery_capacity_real, totals)
+    else:
+        _dispatch_totals_numpy(net_power, battery_capacity_real, totals)
+
+    return tuple(totals)
+
+
+def _reference_dispatch(results, battery_capacity_real):
+    # Hourly .loc loop previously used in compute_monthly_output, kept to check the engine against it
+    batt_cap_prev = 0.0
+    for i in range(len(results)):
+        diff = batt_cap_prev + results.loc[i, 'NetPower']
+        if diff >= 0.0:
+            if diff > battery_capacity_real:
+                results.loc[i, 'BatteryCapacity'] = battery_capacity_real
+                results.loc[i, 'Export'] = diff - battery_capacity_real
+                results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower'] - (
+                        diff - battery_capacity_real)
+                batt_cap_prev = results.loc[i, 'BatteryCapacity']
+            else:
+                results.loc[i, 'BatteryCapacity'] = batt_cap_prev + results.loc[i, 'NetPower']
+                results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower']
+                batt_cap_prev = results.loc[i, 'BatteryCapacity']
+        else:
+            results.loc[i, 'Import'] = diff
+            results.loc[i, 'BatteryCapacity'] = batt_cap_prev + results.loc[i, 'NetPower'] - diff
+            results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower'] - diff
+            batt_cap_prev = results.loc[i, 'BatteryCapacity']
+
+    return results
+
+
+if __name__ == '__main__':
+    # Timing benchmark on the bundled TMY year: python dispatch.py, tests/test_dispatch.py checks the kernels against
+    # the reference loop
+    import time
+    import pandas as pd
+
+    tmy = pd.read_csv('template_tmy_load.csv', header=None, skiprows=3)
+    ghi = tmy[7].to_numpy(dtype=float)
+    hours = tmy[3].to_numpy(dtype=float)
+    # 5 kWp of PV against a 500 W base load with a 1.5 kW evening peak
+    load = 500 + 1000 * ((hours >= 18) & (hours <= 21))
+    net = 5 * ghi * 0.85 - load
+    capacity_real = 8000 * (100 - 10) / 100
+
+    reference = pd.DataFrame({'NetPower': net, 'ToFromBattery': 0.0, 'BatteryCapacity': 0.0, 'Import': 0.0, 'Export': 0.0})
+    time_start = time.perf_counter()
+    _reference_dispatch(reference, capacity_real)
+    time_reference = time.perf_counter() - time_start
+
+    variants = [('python', False)]
+    if _compiled_kernel is not None:
+        dispatch_battery(net, capacity_real)  # compile (or load from cache) before timing
+        variants.append(('numba', True))
+
+    print('Reference .loc loop: {:.1f} ms'.format(1000 * time_reference))
+    for name, compiled in variants:
+        repeat = 20
+        time_start = time.perf_counter()
+        for _ in range(repeat):
+            dispatch_battery(net, capacity_real, compiled=compiled)
+        elapsed = (time.perf_counter() - time_start) / repeat
+        print('{} kernel: {:.3f} ms'.format(name, 1000 * elapsed))
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Bounds and iterations of the IRR bisection, 60 halvings are below 1e-15
+IRR_BOUNDS = (-0.99, 1.0)
+IRR_ITERATIONS = 60
+
+
+class CashFlowResults:
+    def __init__(self, years, cash_flow, cumulated_cash_flow, npv, irr, lcoe, payback, net_value):
+        self.years = years
+        self.cash_flow = cash_flow
+        self.cumulated_cash_flow = cumulated_cash_flow
+        self.npv = npv
+        self.irr = irr
+        self.lcoe = lcoe
+        self.payback = payback
+        self.net_value = net_value
+
+
+def _as_scenarios(value):
+    # Scenario values broadcast against the years, which are the last axis
+    return np.asarray(value, dtype=float)[..., np.newaxis]
+
+
+def _discounted_sum(cash_flow, years, rate):
+    return np.sum(cash_flow / (1 + rate) ** years, axis=-1)
+
+
+def compute_irr(cash_flow):
+    """
+    Internal rate of return of cash flows starting at year 0, by bisection over all the scenarios at once
+    :param cash_flow: array of the yearly cash flows, years on the last axis
+    :return: IRR of each scenario, NaN when there is none within IRR_BOUNDS
+    """
+    cash_flow = np.asarray(cash_flow, dtype=float)
+    years = np.arange(cash_flow.shape[-1])
+    low = np.full(cash_flow.shape[:-1], IRR_BOUNDS[0])
+    high = np.full(cash_flow.shape[:-1], IRR_BOUNDS[1])
+    npv_low = _discounted_sum(cash_flow, years, low[..., np.newaxis])
+    npv_high = _discounted_sum(cash_flow, years, high[..., np.newaxis])
+    found = np.sign(npv_low) != np.sign(npv_high)
+
+    for _ in range(IRR_ITERATIONS):
+        middle = (low + high) / 2
+        npv_middle = _discounted_sum(cash_flow, years, middle[..., np.newaxis])
+        same_sign = np.sign(npv_middle) == np.sign(npv_low)
+        low = np.where(same_sign, middle, low)
+        npv_low = np.where(same_sign, npv_middle, npv_low)
+        high = np.where(same_sign, high, middle)
+
+    return np.where(found, (low + high) / 2, np.nan)
+
+
+def compute_cash_flows(cost, annual_load, annual_import, annual_export, buy_rate, sell_rate, rate_escalation=0.0,
+                       years=25, discount_rate=0.0, degradation=0.0, annual_pv_production=None, battery_cost=0.0,
+                       battery_replacement_years=()):
+    """
+    Yearly cash flows of PV systems, every argument but years and battery_replacement_years can be an array of
+    scenarios, the arrays are broadcast together
+    :param cost: initial cost of the system (€)
+    :param annual_load: annual load (kWh)
+    :param annual_import: annual grid import (kWh, negative)
+    :param annual_export: annual grid export (kWh)
+    :param buy_rate: electricity import price of the first year (€/kWh)
+    :param sell_rate: electricity export price (€/kWh)
+    :param rate_escalation: yearly escalation of the import price
+    :param years: period of the analysis
+    :param discount_rate: discount rate of the NPV and of the LCOE
+    :param degradation: yearly loss of PV production, the self-consumed and exported energy are assumed to decrease
+    in proportion
+    :param annual_pv_production: annual PV production of the first year (kWh), needed for the LCOE only
+    :param battery_cost: cost of a battery replacement (€)
+    :param battery_replacement_years: years at which the battery is replaced
+    :return: CashFlowResults, with the simple (not discounted) payback year and net value as in the payback figure,
+    the payback is NaN when the cumulated cash flow is not positive at the end of the period
+    """
+    year = np.arange(years + 1)
+    cost = _as_scenarios(cost)
+    current_buy_rate = _as_scenarios(buy_rate) * (1 + _as_scenarios(rate_escalation)) ** year
+    production_factor = (1 - _as_scenarios(degradation)) ** np.maximum(year - 1, 0)
+    savings = production_factor * (_as_scenarios(annual_load) * current_buy_rate
+                                   - (np.abs(_as_scenarios(annual_import)) * current_buy_rate
+                                      - _as_scenarios(annual_export) * _as_scenarios(sell_rate)))
+
+    replacement = np.isin(year, battery_replacement_years)
+    cash_flow = np.where(year == 0, -cost, savings - replacement * _as_scenarios(battery_cost))
+    cumulated_cash_flow = np.cumsum(cash_flow, axis=-1)
+
+    discount = (1 + _as_scenarios(discount_rate)) ** year
+    npv = np.sum(cash_flow / discount, axis=-1)
+    irr = compute_irr(cash_flow)
+    if annual_pv_production is not None:
+        discounted_costs = np.sum(np.where(year == 0, cost, replacement * _as_scenarios(battery_cost)) / discount,
+                                  axis=-1)
+        discounted_production = np.sum(
+            np.where(year == 0, 0, _as_scenarios(annual_pv_production) * production_factor) / discount, axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lcoe = discounted_costs / discounted_production
+    else:
+        lcoe = np.full(npv.shape, np.nan)
+
+    net_value = cumulated_cash_flow[..., -1]
+    # Year after the last year for which the savings have not offset the costs, a battery replacement can make the
+    # cumulated cash flow negative again after it was positive
+    not_offset = cumulated_cash_flow[..., 1:] <= 0
+    payback = 1 + np.where(not_offset.any(axis=-1), years - np.argmax(not_offset[..., ::-1], axis=-1), 0)
+    payback = np.where(net_value > 0, payback, np.nan)
+
+    return CashFlowResults(year, cash_flow, cumulated_cash_flow, npv, irr, lcoe, payback, net_value)
+
+
+if __name__ == '__main__':
+    # Timing of a large batch of scenarios: python finance.py
+    import time
+
+    rng = np.random.default_rng(0)
+    count = 10000
+    time_start = time.perf_counter()
+    results = compute_cash_flows(rng.uniform(8000, 30000, count), 12700, -rng.uniform(3000, 9000, count),
+                                 rng.uniform(2000, 7000, count), 0.174, 0.10, rng.uniform(0, 0.08, count), 25,
+                                 discount_rate=0.03, degradation=0.005, annual_pv_production=11000, battery_cost=6000,
+                                 battery_replacement_years=[12])
+    elapsed = time.perf_counter() - time_start
+    print('{} scenarios in {:.1f} ms, median NPV {:.0f} €, IRR {:.1%}, LCOE {:.3f} €/kWh, payback {:.0f} years'.format(
+        count, 1000 * elapsed, np.median(results.npv), np.nanmedian(results.irr), np.median(results.lcoe),
+        np.nanmedian(results.payback)))
@@ -0,0 +1,286 @@
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Directory shared by every gunicorn worker and job process, /metrics sums the spans recorded by all of them
+METRICS_DIR = os.environ.get('PRESIMULATOR_METRICS_DIR',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'metrics'))
+# The spans of a process are written at most this often (s), and when /metrics is scraped
+METRICS_FLUSH_INTERVAL = float(os.environ.get('PRESIMULATOR_METRICS_FLUSH_INTERVAL', 10))
+# Upper bounds of the histogram buckets (s)
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Profiles of each request and job are written to this directory when it is set, 'cprofile' or 'pyinstrument'
+PROFILE_DIR = os.environ.get('PRESIMULATOR_PROFILE_DIR')
+PROFILER = os.environ.get('PRESIMULATOR_PROFILER', 'cprofile')
+
+# One JSON line per span, see configure_logging
+logger = logging.getLogger('presimulator')
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+_span_stack = contextvars.ContextVar('span_stack', default=())
+_spans = {}
+_spans_lock = threading.Lock()
+_process = None
+_process_pid = None
+_flusher_pid = None
+_dirty = False
+
+
+def configure_logging(level=None):
+    """
+    Prints the spans of the process, called by the entry points, e.g. PRESIMULATOR_LOG_LEVEL=INFO
+    :param level: logging level, PRESIMULATOR_LOG_LEVEL by default, nothing is printed without a level
+    """
+    level = level or os.environ.get('PRESIMULATOR_LOG_LEVEL')
+    if not level:
+        return
+    logger.setLevel(level)
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    # The lines are not printed a second time by the handlers of the root logger, e.g. the one of gunicorn
+    logger.propagate = False
+
+
+def set_trace(trace_id=None):
+    """
+    Starts a trace, the spans of the current thread are logged with its ID until the next call
+    :return: ID of the trace
+    """
+    trace_id = trace_id or uuid.uuid4().hex
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def _record(name, duration):
+    global _dirty
+    _start_flusher()
+    with _spans_lock:
+        _dirty = True
+        values = _spans.get(name)
+        if values is None:
+            values = _spans[name] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(SPAN_BUCKETS)}
+        values['count'] += 1
+        values['sum'] += duration
+        # Cumulative buckets, as in the Prometheus format
+        for i, bound in enumerate(SPAN_BUCKETS):
+            if duration <= bound:
+                values['buckets'][i] += 1
+
+
+def _metrics_path():
+    global _process, _process_pid
+    # A forked process must not overwrite the file of its parent
+    if _process_pid != os.getpid():
+        _process = '{}-{}'.format(os.getpid(), uuid.uuid4().hex[:8])
+        _process_pid = os.getpid()
+    return os.path.join(METRICS_DIR, _process + '.json')
+
+
+def _start_flusher():
+    global _flusher_pid
+    # One thread per process, a forked process does not inherit the thread of its parent
+    if _flusher_pid == os.getpid():
+        return
+    with _spans_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        if _dirty:
+            try:
+                flush()
+            except OSError:
+                logger.warning('Metrics could not be written to %s', METRICS_DIR)
+
+
+def flush():
+    """
+    Writes the spans recorded by the process for /metrics
+    """
+    global _dirty
+    with _spans_lock:
+        content = json.dumps(_spans).encode()
+        _dirty = False
+    path = _metrics_path()
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    with open(tmp_path, 'wb') as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def span(name):
+    """
+    Measures a stage of the pipeline, spans can be nested
+    The measures are written for /metrics by a thread of the process every METRICS_FLUSH_INTERVAL
+    """
+    stack = _span_stack.get()
+    token = _span_stack.set(stack + (name,))
+    time_start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - time_start
+        _span_stack.reset(token)
+        _record(name, duration)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'span': name, 'parent': stack[-1] if stack else None, 'trace': _trace_id.get(),
+                                    'duration_ms': round(1000 * duration, 3), 'error': error, 'pid': os.getpid()}))
+
+
+def timed(name):
+    """
+    Decorator measuring every call of a function as a span
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def profiled(name):
+    """
+    Profiles the block when PROFILE_DIR is set, the profile is written to PROFILE_DIR/<name>.prof (cProfile) or
+    PROFILE_DIR/<name>.html (pyinstrument)
+    """
+    if not PROFILE_DIR:
+        yield
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, '{}-{}'.format(time.strftime('%Y%m%d-%H%M%S'), name))
+    if PROFILER == 'pyinstrument' and pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path + '.html', 'w') as file:
+                file.write(profiler.output_html())
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path + '.prof')
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Process of another user
+        return True
+    return True
+
+
+def collect():
+    """
+    :return: dict of the span count, total duration and cumulative bucket counts summed over the running processes,
+    the files of the processes that ended (e.g. workers recycled by gunicorn or the job pool) are removed
+    """
+    spans = {}
+    try:
+        names = [name for name in os.listdir(METRICS_DIR) if name.endswith('.json')]
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        pid = name.split('-', 1)[0]
+        if pid.isdigit() and not _is_running(int(pid)):
+            try:
+                os.remove(os.path.join(METRICS_DIR, name))
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, name), 'rb') as file:
+                process_spans = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for span_name, values in process_spans.items():
+            total = spans.setdefault(span_name, {'count': 0, 'sum': 0.0, 'buckets': [0] * len(SPAN_BUCKETS)})
+            total['count'] += values['count']
+            total['sum'] += values['sum']
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], values['buckets'])]
+
+    return spans
+
+
+def format_metrics(spans):
+    """
+    :return: the spans in the Prometheus text format
+    """
+    lines = ['# HELP presimulator_span_seconds Duration of the stages of the simulation pipeline',
+             '# TYPE presimulator_span_seconds histogram']
+    for name in sorted(spans):
+        values = spans[name]
+        for bound, count in zip(SPAN_BUCKETS, values['buckets']):
+            lines.append('presimulator_span_seconds_bucket{{span="{}",le="{}"}} {}'.format(name, bound, count))
+        lines.append('presimulator_span_seconds_bucket{{span="{}",le="+Inf"}} {}'.format(name, values['count']))
+        lines.append('presimulator_span_seconds_sum{{span="{}"}} {}'.format(name, values['sum']))
+        lines.append('presimulator_span_seconds_count{{span="{}"}} {}'.format(name, values['count']))
+
+    return '\n'.join(lines) + '\n'
+
+
+def register(server):
+    """
+    Adds the /metrics endpoint to the Flask server, starts a trace per request and profiles the requests when
+    PROFILE_DIR is set
+    """
+    import flask
+
+    @server.route('/metrics')
+    def metrics():
+        try:
+            flush()
+        except OSError:
+            pass
+        return flask.Response(format_metrics(collect()), mimetype='text/plain; version=0.0.4')
+
+    @server.before_request
+    def start_request():
+        flask.g.trace_id = set_trace()
+        if PROFILE_DIR and flask.request.path != '/metrics':
+            flask.g.profile = profiled('request-' + flask.g.trace_id)
+            flask.g.profile.__enter__()
+
+    @server.teardown_request
+    def end_request(exception):
+        profile = flask.g.pop('profile', None)
+        if profile is not None:
+            profile.__exit__(None, None, None)
@@ -0,0 +1,205 @@
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from instrumentation import profiled, set_trace
+
+# Directory shared by every gunicorn worker, so that any of them can report the progress and return the results of
+# a job submitted to another one
+JOBS_DIR = os.environ.get('PRESIMULATOR_JOBS_DIR',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'jobs'))
+# Processes running the jobs of each web worker
+JOB_WORKERS = int(os.environ.get('PRESIMULATOR_JOB_WORKERS', 2))
+# Jobs and their results are deleted after this delay (s)
+JOB_MAX_AGE = int(os.environ.get('PRESIMULATOR_JOB_MAX_AGE', 3600))
+# Jobs not finished this long after their submission are reported as failed (s)
+JOB_TIMEOUT = int(os.environ.get('PRESIMULATOR_JOB_TIMEOUT', 300))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _is_job_id(job_id):
+    # IDs come from the browser, they must not be used to read other files
+    return isinstance(job_id, str) and re.fullmatch('[0-9a-f]{32}', job_id) is not None
+
+
+def _status_path(job_id):
+    return os.path.join(JOBS_DIR, job_id + '.json')
+
+
+def _result_path(job_id):
+    return os.path.join(JOBS_DIR, job_id + '.pkl')
+
+
+def _write_atomic(path, content):
+    # Readers in other processes never see a partial file
+    tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    with open(tmp_path, 'wb') as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_status(status):
+    _write_atomic(_status_path(status['id']), json.dumps(status).encode())
+
+
+class JobProgress:
+    """
+    Progress callback of a running job, records the start and end time of each stage in the job status
+    """
+
+    def __init__(self, status):
+        self.status = status
+
+    def __call__(self, stage):
+        now = time.time()
+        stages = self.status['stages']
+        if stages and stages[-1]['end'] is None:
+            stages[-1]['end'] = now
+        stages.append({'name': stage, 'start': now, 'end': None})
+        self.status['stage'] = stage
+        _write_status(self.status)
+
+    def finish(self, state, error=None):
+        now = time.time()
+        stages = self.status['stages']
+        if stages and stages[-1]['end'] is None:
+            stages[-1]['end'] = now
+        self.status.update(state=state, stage='', error=error, finished=now)
+        _write_status(self.status)
+
+
+def _run_job(status, function, args, kwargs):
+    status.update(state=RUNNING, started=time.time())
+    progress = JobProgress(status)
+    _write_status(status)
+
+    # The spans of the job are logged with its ID
+    set_trace(status['id'])
+    try:
+        with profiled('job-' + status['id']):
+            result = function(*args, progress=progress, **kwargs)
+        _write_atomic(_result_path(status['id']), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        progress.finish(FAILED, traceback.format_exc())
+        return
+
+    progress.finish(DONE)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # The web workers run threads, a forked job process would inherit the locks they hold at that moment, the
+            # job processes are forked from a single-threaded server instead
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['pipeline'])
+            _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=context)
+        return _executor
+
+
+def _reset_executor(executor):
+    global _executor
+    with _executor_lock:
+        # A pool whose process died cannot run jobs anymore, the next job starts a new one
+        if _executor is executor:
+            _executor = None
+
+
+def _job_finished(job_id, executor, future):
+    # The job process died or the job could not be sent to it, the job would otherwise stay running forever
+    error = future.exception()
+    if error is None:
+        return
+    if isinstance(error, BrokenProcessPool):
+        _reset_executor(executor)
+    status = get_status(job_id)
+    if status is not None and status['state'] not in (DONE, FAILED):
+        status.update(state=FAILED, stage='', error=''.join(traceback.format_exception(error)),
+                      finished=time.time())
+        _write_status(status)
+
+
+def _evict():
+    limit = time.time() - JOB_MAX_AGE
+    for name in os.listdir(JOBS_DIR):
+        path = os.path.join(JOBS_DIR, name)
+        try:
+            if os.stat(path).st_mtime < limit:
+                os.remove(path)
+        except FileNotFoundError:
+            # Already evicted by another worker
+            pass
+
+
+def submit(function, *args, **kwargs):
+    """
+    Runs function(*args, progress=..., **kwargs) in the background, the function calls progress with the name of
+    each stage
+    :param function: picklable function, i.e. defined at the top level of a module
+    :return: ID of the job
+    """
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _evict()
+
+    status = {'id': uuid.uuid4().hex, 'state': QUEUED, 'stage': '', 'stages': [], 'error': None,
+              'submitted': time.time(), 'started': None, 'finished': None}
+    _write_status(status)
+    executor = _get_executor()
+    try:
+        future = executor.submit(_run_job, status, function, args, kwargs)
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        executor = _get_executor()
+        future = executor.submit(_run_job, status, function, args, kwargs)
+    future.add_done_callback(lambda future: _job_finished(status['id'], executor, future))
+
+    return status['id']
+
+
+def get_status(job_id):
+    """
+    :return: dict with the state, current stage, timing of every stage and error of the job, None for an unknown job
+    """
+    if not _is_job_id(job_id):
+        return None
+    try:
+        with open(_status_path(job_id), 'rb') as file:
+            status = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    # A job process that hangs never finishes the job, its status is checked by whichever worker the poll lands on
+    if status['state'] in (QUEUED, RUNNING) and time.time() > status['submitted'] + JOB_TIMEOUT:
+        status.update(state=FAILED, stage='', error='Not finished after {} s'.format(JOB_TIMEOUT),
+                      finished=time.time())
+        _write_status(status)
+    return status
+
+
+def get_result(job_id):
+    """
+    :return: value returned by the function of a finished job, None if the job is not done
+    """
+    if not _is_job_id(job_id):
+        return None
+    try:
+        with open(_result_path(job_id), 'rb') as file:
+            return pickle.load(file)
+    except OSError:
+        return None
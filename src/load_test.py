@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmark import LATITUDE, LONGITUDE, SYSTEM, offline_environment, read_fixture, start_fixture_server
+from pre_simulator import format_number
+
+# Gunicorn configurations compared by default, workers x threads
+CONFIGURATIONS = ['1x1', '1x4', '2x4']
+DEFAULT_MONTHLY_UTIL = [1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000]  # kWh
+# Interval of the simulation progress polls of the browser (s)
+POLL_INTERVAL = 0.5
+# Different load parameters among the users
+LOAD_PROFILES = 4
+
+
+class DashClient:
+    """
+    Calls the callbacks of the app as a browser does, the values of the stores stay in the client
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+        self.dependencies = {dependency['output']: dependency
+                             for dependency in self.session.get(url + '_dash-dependencies').json()}
+        self.latencies = []
+
+    def callback(self, output, changed, values):
+        """
+        :param output: output of the callback as in _dash-dependencies, e.g. 'store-simulation-job.data'
+        :param changed: input that triggered the callback, e.g. 'button-simulate.n_clicks'
+        :param values: dict of the values of the inputs and states, keyed as 'id.property', None by default
+        :return: dict of the updated outputs, keyed as 'id.property'
+        """
+        dependency = self.dependencies[output]
+
+        def properties(items):
+            return [{'id': item['id'], 'property': item['property'],
+                     'value': values.get('{}.{}'.format(item['id'], item['property']))} for item in items]
+
+        if output.startswith('..'):
+            outputs = [dict(zip(['id', 'property'], name.rsplit('.', 1))) for name in output[2:-2].split('...')]
+        else:
+            outputs = dict(zip(['id', 'property'], output.rsplit('.', 1)))
+        body = {'output': output, 'outputs': outputs, 'inputs': properties(dependency['inputs']),
+                'state': properties(dependency['state']), 'changedPropIds': [changed]}
+
+        time_start = time.perf_counter()
+        response = self.session.post(self.url + '_dash-update-component', json=body)
+        self.latencies.append(time.perf_counter() - time_start)
+        response.raise_for_status()
+        if response.status_code == 204:
+            return {}
+        return {'{}.{}'.format(component, name): value
+                for component, properties in response.json()['response'].items()
+                for name, value in properties.items()}
+
+
+def user_session(client, user, session):
+    """
+    Changes the load parameters, simulates a system and checks that the results are those of the user
+    :return: error message, None when the results are those of the user
+    """
+    pv_capacity = 3 + user + session / 10
+    # A few load profiles shared by the users, so that the first round fills the load caches
+    monthly_util = [value * (1 + (user % LOAD_PROFILES) / 10) for value in DEFAULT_MONTHLY_UTIL]
+
+    client.callback('tooltip-cost.children', 'input-pv-power.value',
+                    {'input-pv-power.value': pv_capacity, 'input-battery-capacity.value': SYSTEM['battery_capacity']})
+    load = client.callback('..spinner-load.children...store-load-parameters.data..', 'button-close-modal.n_clicks', {
+        'button-close-modal.n_clicks': 1, 'input-year-built.value': 2000, 'input-floor-area.value': 200,
+        'input-nb-occupants.value': 4, 'input-nb-floor.value': 2,
+        'table-occupancy-schedule.data': [{'column-occ-{}'.format(i): 100 for i in range(24)}],
+        'input-t-hot.value': 20, 'input-t-cold.value': 24,
+        'table-temperature-schedule.data': [{'column-temp-{}'.format(i): 'ON' for i in range(24)}],
+        'table-consumption.data': [{'column-cons-{}'.format(i + 1): value for i, value in enumerate(monthly_util)}],
+        'checklist-electric-equipment.value': [1, 2, 3, 4, 5, 6, 7, 8]})
+
+    job = client.callback('store-simulation-job.data', 'button-simulate.n_clicks', {
+        'button-simulate.n_clicks': 1, 'input-latitude.value': LATITUDE, 'input-longitude.value': LONGITUDE,
+        'input-pv-power.value': pv_capacity, 'input-tilt.value': SYSTEM['tilt'],
+        'input-orientation.value': SYSTEM['orientation'],
+        'input-battery-capacity.value': SYSTEM['battery_capacity'],
+        'input-discharge-limit.value': SYSTEM['discharge_cutoff'], 'input-buy-rate.value': SYSTEM['buy_rate'],
+        'input-sell-rate.value': SYSTEM['sell_rate'], 'input-cost.value': SYSTEM['cost'],
+        'store-load-parameters.data': load['store-load-parameters.data']})
+    job_id = job['store-simulation-job.data']
+
+    n_intervals = 0
+    while True:
+        time.sleep(POLL_INTERVAL)
+        n_intervals += 1
+        poll = client.callback('..modal-simulate.is_open...text-computing.children...store-simulation-done.data..',
+                               'interval-simulate.n_intervals',
+                               {'interval-simulate.n_intervals': n_intervals, 'store-simulation-job.data': job_id})
+        if poll.get('store-simulation-done.data') == job_id:
+            break
+
+    outputs = [name for name in client.dependencies if 'description.children' in name][0]
+    results = client.callback(outputs, 'store-simulation-done.data', {
+        'store-simulation-done.data': job_id,
+        'dynamic-button-container.children': [{'type': 'Button', 'namespace': 'dash_bootstrap_components',
+                                               'props': {'id': 'button-simulate'}}]})
+    if 'description.children' not in results:
+        return 'user {} session {}: simulation failed'.format(user, session)
+    description = results['description.children']['props']['children']
+    for expected in ['**{} kWp**'.format(format_number(pv_capacity)),
+                     '**{} kWh** of annual'.format(format_number(int(round(sum(monthly_util), 0))))]:
+        if expected not in description:
+            return 'user {} session {}: {} not in the results'.format(user, session, expected)
+
+    return None
+
+
+def idle_requests(url):
+    """
+    Requests sent each second by a browser tab while no simulation runs: the server callbacks of the enabled intervals
+    of the initial layout
+    """
+    intervals = {}
+
+    def find_intervals(component):
+        if isinstance(component, list):
+            for child in component:
+                find_intervals(child)
+        elif isinstance(component, dict) and 'props' in component:
+            if component.get('type') == 'Interval' and not component['props'].get('disabled'):
+                intervals[component['props']['id']] = component['props'].get('interval', 1000)
+            for value in component['props'].values():
+                find_intervals(value)
+
+    find_intervals(requests.get(url + '_dash-layout').json())
+    return sum(1000 / intervals[item['id']] for dependency in requests.get(url + '_dash-dependencies').json()
+               if dependency.get('clientside_function') is None
+               for item in dependency['inputs'] if item['id'] in intervals and item['property'] == 'n_intervals')
+
+
+def run_users(url, users, sessions):
+    """
+    Runs the sessions of every user at once, one thread per user
+    :return: dict of the throughput, latencies and errors
+    """
+    clients = [DashClient(url) for _ in range(users)]
+    errors = []
+
+    def run_user(user):
+        for session in range(sessions):
+            try:
+                error = user_session(clients[user], user, session)
+            except (requests.RequestException, KeyError, ValueError) as e:
+                error = 'user {} session {}: {!r}'.format(user, session, e)
+            if error is not None:
+                errors.append(error)
+
+    threads = [threading.Thread(target=run_user, args=(user,)) for user in range(users)]
+    time_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - time_start
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    return {'users': users, 'sessions': users * sessions, 'duration': elapsed,
+            'sessions_per_second': users * sessions / elapsed, 'requests_per_second': len(latencies) / elapsed,
+            'latency_median': statistics.median(latencies),
+            'latency_p95': latencies[int(0.95 * (len(latencies) - 1))], 'errors': errors}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, environment, log):
+    """
+    Starts the app as in production with the given workers and threads
+    :return: the process and the URL of the app, once it answers
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--chdir', os.path.dirname(os.path.abspath(__file__)), '--workers',
+         str(workers), '--threads', str(threads), '--bind', '127.0.0.1:{}'.format(port), 'app:server'],
+        env=dict(os.environ, **environment), stdout=log, stderr=log)
+    url = 'http://127.0.0.1:{}/'.format(port)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited with code {}'.format(process.returncode))
+        try:
+            requests.get(url + '_dash-dependencies', timeout=1).raise_for_status()
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def run(configurations=CONFIGURATIONS, users=8, sessions=3, url=None):
+    """
+    Load test offline: PVGIS is replaced by a local server of the benchmark fixture and every configuration starts with
+    empty caches, a first round of sessions fills the caches of the job processes and is not measured
+    :param configurations: gunicorn configurations as 'workersxthreads'
+    :param url: URL of a running app, tested instead of starting gunicorn
+    :return: dict of the results of each configuration
+    """
+    if url is not None:
+        run_users(url, users, 1)
+        result = run_users(url, users, sessions)
+        result['idle_requests_per_second'] = idle_requests(url)
+        return {url: result}
+
+    server, fixture_url = start_fixture_server(read_fixture())
+    results = {}
+    try:
+        for configuration in configurations:
+            workers, threads = map(int, configuration.split('x'))
+            directory = tempfile.mkdtemp(prefix='presimulator_load_test_')
+            with open(os.path.join(directory, 'gunicorn.log'), 'wb') as log:
+                process, app_url = start_gunicorn(workers, threads, offline_environment(fixture_url, directory), log)
+                try:
+                    run_users(app_url, users, 1)
+                    results[configuration] = run_users(app_url, users, sessions)
+                    results[configuration]['idle_requests_per_second'] = idle_requests(app_url)
+                finally:
+                    process.terminate()
+                    process.wait()
+            shutil.rmtree(directory, ignore_errors=True)
+            result = results[configuration]
+            print('{:<10} {:>8.2f} sessions/s {:>8.1f} requests/s {:>8.0f} ms median {:>8.0f} ms p95 {:>4} errors '
+                  '{:>6.1f} idle requests/s per tab'
+                  .format(configuration, result['sessions_per_second'], result['requests_per_second'],
+                          1000 * result['latency_median'], 1000 * result['latency_p95'], len(result['errors']),
+                          result['idle_requests_per_second']),
+                  file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Load test of the app with concurrent users, offline.')
+    parser.add_argument('configurations', nargs='*', default=CONFIGURATIONS,
+                        help='gunicorn configurations as workersxthreads, default: {}'.format(' '.join(CONFIGURATIONS)))
+    parser.add_argument('--users', type=int, default=8, help='concurrent users')
+    parser.add_argument('--sessions', type=int, default=3, help='simulations of each user')
+    parser.add_argument('--url', help='URL of a running app, tested instead of starting gunicorn')
+    parser.add_argument('--output', help='JSON file of the results')
+    args = parser.parse_args(args)
+
+    results = run(args.configurations, args.users, args.sessions, args.url)
+    for configuration, result in results.items():
+        for error in result['errors']:
+            print('{}: {}'.format(configuration, error))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if any(result['errors'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+
+from dispatch import dispatch_battery_totals
+from finance import compute_cash_flows
+from pre_simulator import UNIT_PV_CAPACITY, cost_estimator, get_load, get_unit_pv_output
+
+PERCENTILES = (10, 50, 90)
+
+
+class MonteCarloResults:
+    def __init__(self, irradiance_factor, load_factor, buy_rate, sell_rate, rate_escalation, annual_load,
+                 annual_import, annual_export, autonomy, bill, bill_reduction, payback, net_value):
+        self.irradiance_factor = irradiance_factor
+        self.load_factor = load_factor
+        self.buy_rate = buy_rate
+        self.sell_rate = sell_rate
+        self.rate_escalation = rate_escalation
+        self.annual_load = annual_load
+        self.annual_import = annual_import
+        self.annual_export = annual_export
+        self.autonomy = autonomy
+        self.bill = bill
+        self.bill_reduction = bill_reduction
+        self.payback = payback
+        self.net_value = net_value
+
+    def bands(self, percentiles=PERCENTILES):
+        """
+        :return: dict of the percentiles of the autonomy (%), first year bill with the system (€), bill reduction (%),
+        payback year and net value (€), the samples without payback count as the longest paybacks and the percentiles
+        that fall among them are NaN
+        """
+        bands = {name: np.percentile(getattr(self, name), percentiles)
+                 for name in ['autonomy', 'bill', 'bill_reduction', 'net_value']}
+        # Interpolating between infinite paybacks gives NaN, as intended
+        with np.errstate(invalid='ignore'):
+            payback = np.percentile(np.where(np.isnan(self.payback), np.inf, self.payback), percentiles)
+        bands['payback'] = np.where(np.isinf(payback), np.nan, payback)
+        return bands
+
+
+def sample_inputs(samples, buy_rate, sell_rate, irradiance_spread=0.05, load_spread=0.10, rate_spread=0.15,
+                  escalation_range=(0.0, 0.08), seed=None):
+    """
+    Draws the uncertain inputs of each sample, the factors and the rates follow log-normal distributions with a
+    median of 1 and of the given rates
+    :param irradiance_spread: relative standard deviation of the yearly irradiance
+    :param load_spread: relative standard deviation of the yearly load
+    :param rate_spread: relative standard deviation of the buy and sell rates of the first year
+    :param escalation_range: bounds of the uniform distribution of the yearly escalation of the buy rate
+    :return: irradiance factor, load factor, buy rate, sell rate and escalation arrays
+    """
+    rng = np.random.default_rng(seed)
+    irradiance_factor = rng.lognormal(0.0, irradiance_spread, samples)
+    load_factor = rng.lognormal(0.0, load_spread, samples)
+    buy_rates = buy_rate * rng.lognormal(0.0, rate_spread, samples)
+    sell_rates = sell_rate * rng.lognormal(0.0, rate_spread, samples)
+    rate_escalation = rng.uniform(escalation_range[0], escalation_range[1], samples)
+
+    return irradiance_factor, load_factor, buy_rates, sell_rates, rate_escalation
+
+
+def simulate_uncertainty(latitude, longitude, pv_capacity, battery_capacity, discharge_cutoff, tilt, orientation,
+                         load_parameters, buy_rate, sell_rate, cost=None, samples=1000, years=25, seed=None,
+                         **spreads):
+    """
+    Simulates a system for many draws of the weather, load and price inputs with one weather and load computation,
+    the TMY irradiance and the BELPE load are scaled by a yearly factor per sample
+    :param pv_capacity: PV capacity (kWp)
+    :param battery_capacity: battery capacity (kWh), 0 for a system without battery
+    :param buy_rate: median electricity import price of the first year (€/kWh)
+    :param sell_rate: median electricity export price (€/kWh)
+    :param cost: cost of the system (€), estimated from the capacities by default
+    :param samples: number of samples
+    :param years: period of the payback analysis
+    :param spreads: distributions of the inputs, see sample_inputs
+    :return: MonteCarloResults with one value per sample
+    """
+    irradiance_factor, load_factor, buy_rates, sell_rates, rate_escalation = sample_inputs(
+        samples, buy_rate, sell_rate, seed=seed, **spreads)
+    if cost is None:
+        cost = cost_estimator(pv_capacity, battery_capacity)
+
+    pv_output = get_unit_pv_output(latitude, longitude, tilt, orientation)
+    dc_output = pv_output['DCOutput'].to_numpy(dtype=float) * (pv_capacity * 1000 / UNIT_PV_CAPACITY)
+    load = np.asarray(get_load(latitude, longitude, load_parameters), dtype=float)
+
+    # One row per sample, the dispatch of all the samples runs in one call
+    net_power = (irradiance_factor[:, np.newaxis] * dc_output[np.newaxis, :]
+                 - load_factor[:, np.newaxis] * load[np.newaxis, :])
+    battery_capacity_real = battery_capacity * 1000 * (100 - discharge_cutoff) / 100
+    grid_import, grid_export, _, _ = dispatch_battery_totals(net_power, battery_capacity_real)
+
+    annual_load = load_factor * load.sum() / 1000
+    annual_import = grid_import / 1000
+    annual_export = grid_export / 1000
+    annual_elec_bill_wo_sys = annual_load * buy_rates
+    annual_elec_bill_w_sys = np.abs(annual_import) * buy_rates - annual_export * sell_rates
+
+    autonomy = 100 * (annual_load + annual_import) / annual_load
+    bill_reduction = 100 * (annual_elec_bill_wo_sys - annual_elec_bill_w_sys) / annual_elec_bill_wo_sys
+    cash_flows = compute_cash_flows(cost, annual_load, annual_import, annual_export, buy_rates, sell_rates,
+                                    rate_escalation, years)
+
+    return MonteCarloResults(irradiance_factor, load_factor, buy_rates, sell_rates, rate_escalation, annual_load,
+                             annual_import, annual_export, autonomy, annual_elec_bill_w_sys, bill_reduction,
+                             cash_flows.payback, cash_flows.net_value)
@@ -1,2 +0,0 @@
-#!/bin/bash
-exec "/Applications/orca.app/Contents/MacOS/orca" "$@"
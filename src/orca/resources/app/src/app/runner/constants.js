@@ -1,11 +0,0 @@
-module.exports = {
-  statusMsg: {
-    0: 'all task(s) completed',
-    1: 'failed or incomplete task(s)',
-    422: 'json parse error',
-    501: 'failed export'
-  },
-  dflt: {
-    parallelLimit: 1
-  }
-}
@@ -1,7 +0,0 @@
-module.exports = {
-  iframeLoadDelay: 5000,
-
-  statusMsg: {
-    525: 'print to PDF error'
-  }
-}
@@ -1,2 +0,0 @@
-exports.run = require('./app/runner/')
-exports.serve = require('./app/server/')
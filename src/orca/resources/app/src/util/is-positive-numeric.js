@@ -1,7 +0,0 @@
-const isNumeric = require('fast-isnumeric')
-
-function isPositiveNumeric (v) {
-  return isNumeric(v) && v > 0
-}
-
-module.exports = isPositiveNumeric
@@ -0,0 +1,242 @@
+import time
+from contextlib import nullcontext
+
+from pre_simulator import (KWH_DIAGRAM_FORMAT, KWH_DIAGRAM_WIDTH, LoadParameters, aggregate_energy,
+                           compute_dispatch, compute_economics, compute_percentages, create_fig_bills,
+                           create_fig_energy, create_fig_financial, create_fig_load, create_fig_payback,
+                           create_fig_percent, create_fig_profiles, create_kwh_diagram, get_load, get_pv_output,
+                           report_progress)
+from instrumentation import span, timed
+from result_cache import HOURLY_RESULT_CACHE_SIZE, LRUCache
+from weather_cache import get_pvgis_tmy
+
+# Type of each input of the pipeline, with the units of the inputs of the app
+PARAMETERS = {
+    'latitude': float,
+    'longitude': float,
+    'pv_capacity': float,  # kWp
+    'tilt': float,
+    'orientation': float,
+    'battery_capacity': float,  # kWh
+    'discharge_cutoff': float,  # %
+    'buy_rate': float,  # c€/kWh
+    'sell_rate': float,  # c€/kWh
+    'cost': float,  # €
+    'load_parameters': LoadParameters,
+}
+
+
+class Stage:
+    """
+    Step of the simulation, its result is memoized by the values of its parameters and the keys of its upstream
+    stages, so that a change of an input only recomputes the stages downstream of it
+    """
+
+    def __init__(self, name, function, parameters=(), upstream=(), description=None, cache_size=None):
+        """
+        :param function: called with the values of the parameters then the results of the upstream stages
+        :param parameters: names of the inputs of the pipeline used by the stage
+        :param upstream: names of the stages whose results are used by the stage
+        :param description: progress message shown while the stage is computed
+        :param cache_size: number of results memoized, RESULT_CACHE_SIZE by default
+        """
+        self.name = name
+        self.function = function
+        self.parameters = tuple(parameters)
+        self.upstream = tuple(upstream)
+        self.description = description
+        self.cache = LRUCache() if cache_size is None else LRUCache(cache_size)
+
+
+def _weather(latitude, longitude):
+    # Also read from the weather cache by the PV and load stages, the stage makes the download explicit
+    return get_pvgis_tmy(latitude, longitude)
+
+
+def _pv(latitude, longitude, pv_capacity, tilt, orientation, weather):
+    return get_pv_output(latitude, longitude, pv_capacity * 1000, tilt, orientation)
+
+
+def _load(latitude, longitude, load_parameters, weather):
+    return get_load(latitude, longitude, load_parameters)
+
+
+def _dispatch(battery_capacity, discharge_cutoff, pv_output, load):
+    return compute_dispatch(pv_output, load, battery_capacity * 1000, discharge_cutoff)
+
+
+def _kwh_diagram(energy):
+    return create_kwh_diagram(round(energy.annual_pv_production, 0), round(energy.annual_import, 0),
+                              round(energy.annual_export, 0), round(energy.annual_batt_to_system, 0),
+                              round(energy.annual_load, 0), width=KWH_DIAGRAM_WIDTH, enc_format=KWH_DIAGRAM_FORMAT)
+
+
+GRAPHS = 'Building graphs...'
+
+# The hourly results are kept by few entries, the PV output and the load are also in the caches of pre_simulator
+
+STAGES = {stage.name: stage for stage in [
+    Stage('weather', _weather, ['latitude', 'longitude'],
+          description='Computing PV energy output from weather data...', cache_size=HOURLY_RESULT_CACHE_SIZE),
+    Stage('pv', _pv, ['latitude', 'longitude', 'pv_capacity', 'tilt', 'orientation'], ['weather'],
+          description='Computing PV energy output from weather data...', cache_size=HOURLY_RESULT_CACHE_SIZE),
+    Stage('load', _load, ['latitude', 'longitude', 'load_parameters'], ['weather'],
+          description='Computing load consumption profile...', cache_size=HOURLY_RESULT_CACHE_SIZE),
+    Stage('dispatch', _dispatch, ['battery_capacity', 'discharge_cutoff'], ['pv', 'load'],
+          description='Computing grid import and export...', cache_size=HOURLY_RESULT_CACHE_SIZE),
+    Stage('aggregation', lambda pv_capacity, results: aggregate_energy(results, pv_capacity * 1000), ['pv_capacity'],
+          ['dispatch'], description='Computing grid import and export...'),
+    Stage('economics', lambda buy_rate, sell_rate, energy: compute_economics(energy, buy_rate / 100, sell_rate / 100),
+          ['buy_rate', 'sell_rate'], ['aggregation']),
+    Stage('percentages', compute_percentages, upstream=['economics']),
+    # Only the energy values are used by these figures, they are kept when the prices or the cost change
+    Stage('fig_energy', create_fig_energy, upstream=['aggregation'], description=GRAPHS),
+    Stage('fig_profiles', create_fig_profiles, upstream=['aggregation'], description=GRAPHS),
+    Stage('fig_load', lambda energy: create_fig_load(energy.annual_pv_production, energy.annual_import,
+                                                     energy.annual_pv_to_batt, energy.annual_export),
+          upstream=['aggregation'], description=GRAPHS),
+    Stage('kwh_diagram', _kwh_diagram, upstream=['aggregation'], description=GRAPHS),
+    Stage('fig_finance', create_fig_financial, upstream=['economics'], description=GRAPHS),
+    Stage('fig_bills', lambda output: create_fig_bills(output.annual_elec_bill_wo_sys, output.annual_elec_bill_w_sys),
+          upstream=['economics'], description=GRAPHS),
+    Stage('fig_payback', lambda cost, buy_rate, sell_rate, output: create_fig_payback(output, cost, buy_rate,
+                                                                                      sell_rate),
+          ['cost', 'buy_rate', 'sell_rate'], ['economics'], description=GRAPHS),
+    Stage('percent_images', lambda percentages: create_fig_percent(*percentages), upstream=['percentages'],
+          description=GRAPHS),
+]}
+
+
+def parameter_keys(**parameters):
+    """
+    Checks and converts the inputs of the pipeline
+    :return: dict of the values and dict of the hashable keys of the parameters
+    """
+    missing = set(PARAMETERS) - set(parameters)
+    unknown = set(parameters) - set(PARAMETERS)
+    if missing or unknown:
+        raise TypeError('Missing parameters: {}, unknown parameters: {}'.format(sorted(missing), sorted(unknown)))
+
+    values = {}
+    keys = {}
+    for name, value in parameters.items():
+        kind = PARAMETERS[name]
+        if kind is LoadParameters:
+            if not isinstance(value, LoadParameters):
+                raise TypeError('{} must be LoadParameters, not {}'.format(name, type(value).__name__))
+            values[name] = keys[name] = value
+        else:
+            values[name] = keys[name] = kind(value)
+
+    return values, keys
+
+
+def run_stages(names, progress=None, spans=None, **parameters):
+    """
+    Computes stages and the stages upstream of them, reusing the results memoized for the same inputs
+    :param names: names of the stages to return
+    :param progress: function called with the description of each computed stage
+    :param spans: dict of the name of the span measuring some of the names, with the stages upstream of them
+    :return: dict of the results of every stage that was needed, and the trace: list of dict of the name of each
+    stage, whether it was reused and the time spent (s)
+    """
+    values, keys = parameter_keys(**parameters)
+    results = {}
+    stage_keys = {}
+    trace = []
+    reported = []
+
+    def run(name):
+        if name in results:
+            return
+        stage = STAGES[name]
+        for upstream in stage.upstream:
+            run(upstream)
+
+        key = tuple(keys[parameter] for parameter in stage.parameters) + tuple(
+            stage_keys[upstream] for upstream in stage.upstream)
+        time_start = time.perf_counter()
+        result = stage.cache.get(key)
+        reused = result is not None
+        if not reused:
+            if stage.description is not None and reported[-1:] != [stage.description]:
+                report_progress(progress, stage.description)
+                reported.append(stage.description)
+            result = stage.function(*[values[parameter] for parameter in stage.parameters],
+                                    *[results[upstream] for upstream in stage.upstream])
+            stage.cache.put(key, result)
+
+        results[name] = result
+        stage_keys[name] = (name, key)
+        trace.append({'stage': name, 'reused': reused, 'duration': time.perf_counter() - time_start})
+
+    spans = spans or {}
+    for name in names:
+        with span(spans[name]) if name in spans else nullcontext():
+            run(name)
+
+    return results, trace
+
+
+@timed('simulate_system')
+def simulate_system(latitude, longitude, pv_capacity, tilt, orientation, battery_capacity, discharge_cutoff, buy_rate,
+                    sell_rate, cost, load_parameters, progress=None):
+    """
+    Runs a simulation and builds its figures, with the units of the inputs of the app, only the stages whose inputs
+    changed since a previous call of the process are recomputed
+    :param pv_capacity: PV capacity (kWp)
+    :param battery_capacity: battery capacity (kWh)
+    :param buy_rate: electricity import price (c€/kWh)
+    :param sell_rate: electricity export price (c€/kWh)
+    :param cost: cost of the system (€)
+    :param progress: function called with the description of each stage
+    :return: dict of the OutputResults, the percentages, the figures and the images, and the trace of the stages
+    """
+    # The economics are the results of pre_simulator.compute_monthly_output, measured under the same span
+    results, trace = run_stages(
+        ['economics', 'percentages', 'fig_energy', 'fig_finance', 'fig_profiles', 'fig_bills', 'fig_load',
+         'fig_payback', 'percent_images', 'kwh_diagram'], progress, {'economics': 'compute_monthly_output'},
+        latitude=latitude, longitude=longitude, pv_capacity=pv_capacity, tilt=tilt, orientation=orientation,
+        battery_capacity=battery_capacity, discharge_cutoff=discharge_cutoff, buy_rate=buy_rate, sell_rate=sell_rate,
+        cost=cost, load_parameters=load_parameters)
+    autonomy, electric_bill_reduction, electric_energy_export = results['percentages']
+    src_autonomy, src_electric_bill_reduction, src_electric_energy_export = results['percent_images']
+
+    return {
+        'output': results['economics'],
+        'pv_capacity': pv_capacity,
+        'battery_capacity': battery_capacity,
+        'autonomy': autonomy,
+        'electric_bill_reduction': electric_bill_reduction,
+        'electric_energy_export': electric_energy_export,
+        'fig_energy': results['fig_energy'],
+        'fig_finance': results['fig_finance'],
+        'fig_profiles': results['fig_profiles'],
+        'fig_bills': results['fig_bills'],
+        'fig_load': results['fig_load'],
+        'fig_payback': results['fig_payback'],
+        'src_autonomy': src_autonomy,
+        'src_electric_bill_reduction': src_electric_bill_reduction,
+        'src_electric_energy_export': src_electric_energy_export,
+        'src_kwh_diagram': results['kwh_diagram'],
+        'trace': trace,
+    }
+
+
+if __name__ == '__main__':
+    # Stages recomputed when one input changes: python pipeline.py
+    inputs = dict(latitude=45.977, longitude=7.65, pv_capacity=5, tilt=30, orientation=180, battery_capacity=8,
+                  discharge_cutoff=10, buy_rate=17.4, sell_rate=10.0, cost=15000, load_parameters=LoadParameters(
+                      monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],
+                      occ_schedule=[1.0] * 24, occupants=4, retrofitted=0, floors=2, t_cool=24, t_heat=20,
+                      t_sched=[1.0] * 24, year_built=2000, floor_area=200, en_cool=1.0, en_dishwasher=1.0,
+                      en_dryer=1.0, en_fridge=1.0, en_heating=1.0, en_misc=1.0, en_stove=1.0,
+                      en_washing_machine=1.0))
+    simulate_system(**inputs)
+    for name, value in [('buy_rate', 20.0), ('cost', 12000), ('discharge_cutoff', 20), ('pv_capacity', 6)]:
+        inputs[name] = value
+        trace = simulate_system(**inputs)['trace']
+        print('{} changed: recomputed {} in {:.0f} ms, reused {}'.format(
+            name, ', '.join(step['stage'] for step in trace if not step['reused']),
+            1000 * sum(step['duration'] for step in trace),
+            ', '.join(step['stage'] for step in trace if step['reused'])))
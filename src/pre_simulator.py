@@ -1,4 +1,9 @@
-import pvlib
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pvlib.pvsystem import PVSystem
 import PySAM.Belpe as bp
@@ -7,112 +12,204 @@ from pvlib.modelchain import ModelChain
 from pvlib.temperature import TEMPERATURE_MODEL_PARAMETERS
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from base64 import b64encode
-import plotly.io as pio
-import time
-from copy import deepcopy
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, features
 import io
 import base64
 import requests
+from dispatch import dispatch_battery, dispatch_grid
+from finance import compute_cash_flows
+from instrumentation import span, timed
+from weather_cache import get_pvgis_tmy, round_coordinates
+from result_cache import LRUCache
 
 temperature_model_parameters = TEMPERATURE_MODEL_PARAMETERS['sapm']['open_rack_glass_glass']
-pio.orca.config.executable = './orca/orca.exe'
-pio.orca.config.save()
-
-simulation_state = ''
+# PV output is computed for 1 kWp and scaled to the capacity of the system
+UNIT_PV_CAPACITY = 1000  # W
+PERCENT_IMAGE_SIZE = 500  # px
+PERCENT_FONTS = ['arial.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf', 'DejaVuSans.ttf', 'OCRAEXT.TTF']
+PERCENT_COLORS = np.array([[0xEF, 0xA3, 0x1D], [0xD9, 0xD9, 0xD9]])  # filled, empty
+PERCENT_LEVELS = 16  # anti-aliasing levels
+# Hourly results averaged over the days of each month for the daily profiles
+PROFILE_COLUMNS = ['DCOutput', 'Load', 'Grid', 'SOC']
+KWH_TEMPLATE_WIDTH = 4400  # px, the positions of the text boxes are given at this size
+# The kWh diagram is sent to the browser downscaled to about the size it is displayed at
+KWH_DIAGRAM_WIDTH = 1600  # px
+KWH_DIAGRAM_FORMAT = 'webp' if features.check('webp') else 'jpeg'
+# BELPE loads of the appliances add up, heating and cooling depend on the internal gains of the appliances
+APPLIANCES = ['en_dishwasher', 'en_dryer', 'en_fridge', 'en_misc', 'en_stove', 'en_washing_machine']
+HVAC = ['en_heating', 'en_cool']
+# Loads of a building without heating and cooling simulated directly before its components are computed
+LOAD_COMPONENT_REQUESTS = int(os.environ.get('PRESIMULATOR_LOAD_COMPONENT_REQUESTS', 3))
+# Month of each hour of the 8760 hours read by BELPE
+BELPE_MONTHS = np.repeat(np.arange(12), 24 * np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]))
 
 
 class LoadParameters:
+    """
+    Immutable inputs of the BELPE load model, hashable so that they key the load caches directly
+    The schedules and the monthly utility are stored as tuples and the other values as floats, so that equal
+    parameters have the same key and digest whatever types they were given as
+    """
+    FIELDS = ('monthly_util', 'occ_schedule', 'occupants', 'retrofitted', 'floors', 't_cool', 't_heat', 't_sched',
+              'year_built', 'floor_area', 'en_cool', 'en_dishwasher', 'en_dryer', 'en_fridge', 'en_heating', 'en_misc',
+              'en_stove', 'en_washing_machine')
+    SEQUENCE_FIELDS = ('monthly_util', 'occ_schedule', 't_sched')
+    # The fields of the building, before the equipment
+    BUILDING_FIELDS = 10
+    __slots__ = FIELDS + ('_key', '_hash', '_digest')
+
     def __init__(self, monthly_util, occ_schedule, occupants, retrofitted, floors, t_cool, t_heat, t_sched, year_built,
                  floor_area, en_cool, en_dishwasher, en_dryer, en_fridge, en_heating, en_misc, en_stove,
                  en_washing_machine):
-        self.monthly_util = monthly_util
-        self.occ_schedule = occ_schedule
-        self.occupants = occupants
-        self.retrofitted = retrofitted
-        self.floors = floors
-        self.t_cool = t_cool
-        self.t_heat = t_heat
-        self.t_sched = t_sched
-        self.year_built = year_built
-        self.floor_area = floor_area
-        self.en_cool = en_cool
-        self.en_dishwasher = en_dishwasher
-        self.en_dryer = en_dryer
-        self.en_fridge = en_fridge
-        self.en_heating = en_heating
-        self.en_misc = en_misc
-        self.en_stove = en_stove
-        self.en_washing_machine = en_washing_machine
+        values = locals()
+        key = tuple(tuple(float(value) for value in values[field]) if field in self.SEQUENCE_FIELDS
+                    else float(values[field]) for field in self.FIELDS)
+        for field, value in zip(self.FIELDS, key):
+            object.__setattr__(self, field, value)
+        object.__setattr__(self, '_key', key)
+        object.__setattr__(self, '_hash', hash(key))
+        object.__setattr__(self, '_digest', hashlib.sha256(repr(key).encode()).hexdigest()[:32])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('LoadParameters is immutable, use replace()')
+
+    def __delattr__(self, name):
+        raise AttributeError('LoadParameters is immutable')
 
     def __eq__(self, other):
         if not isinstance(other, LoadParameters):
             # don't attempt to compare against unrelated types
             return NotImplemented
 
-        return self.monthly_util == other.monthly_util and self.occ_schedule == other.occ_schedule and self.occupants == other.occupants and self.retrofitted == other.retrofitted and self.floors == other.floors and self.t_cool == other.t_cool and self.t_heat == other.t_heat and self.t_sched == other.t_sched and self.year_built == other.year_built and self.floor_area == other.floor_area and self.en_cool == other.en_cool and self.en_dishwasher == other.en_dishwasher and self.en_dryer == other.en_dryer and self.en_fridge == other.en_fridge and self.en_heating == other.en_heating and self.en_misc == other.en_misc and self.en_stove == other.en_stove and self.en_washing_machine == other.en_washing_machine
+        return self is other or (self._hash == other._hash and self._key == other._key)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return LoadParameters, self._key
+
+    def __repr__(self):
+        return 'LoadParameters({})'.format(', '.join('{}={!r}'.format(field, value)
+                                                     for field, value in zip(self.FIELDS, self._key)))
+
+    def key(self):
+        return self._key
+
+    def digest(self):
+        """
+        :return: hexadecimal digest of the parameters, the same in every process, e.g. for file names
+        """
+        return self._digest
+
+    def building_key(self):
+        # Everything but the equipment
+        return self._key[:self.BUILDING_FIELDS]
+
+    def as_dict(self):
+        """
+        :return: dict of the fields, LoadParameters(**as_dict()) is equal to the parameters
+        """
+        return dict(zip(self.FIELDS, self._key))
+
+    def replace(self, **changes):
+        return LoadParameters(**dict(self.as_dict(), **changes))
 
 
 class OutputResults:
-    def __init__(self, annual_pv_production, annual_batt_to_system, annual_pv_to_batt, annual_energy_yield, annual_load,
-                 annual_import, annual_export,
-                 annual_elec_bill_wo_sys, annual_elec_bill_w_sys, annual_sell, annual_savings,
-                 monthly_pv_production, monthly_load, monthly_import, monthly_export, monthly_soc,
-                 monthly_elec_bill_wo_sys, monthly_elec_bill_w_sys, monthly_sell, monthly_cumulated_savings,
-                 profiles):
-        self.annual_pv_production = annual_pv_production
-        self.annual_batt_to_system = annual_batt_to_system
-        self.annual_pv_to_batt = annual_pv_to_batt
-        self.annual_energy_yield = annual_energy_yield
-        self.annual_load = annual_load
-        self.annual_import = annual_import
-        self.annual_export = annual_export
-        self.annual_savings = annual_savings
-        self.annual_elec_bill_wo_sys = annual_elec_bill_wo_sys
-        self.annual_elec_bill_w_sys = annual_elec_bill_w_sys
-        self.annual_sell = annual_sell
-        self.monthly_pv_production = monthly_pv_production
-        self.monthly_load = monthly_load
-        self.monthly_import = monthly_import
-        self.monthly_export = monthly_export
-        self.monthly_soc = monthly_soc
-        self.monthly_elec_bill_wo_sys = monthly_elec_bill_wo_sys
-        self.monthly_elec_bill_w_sys = monthly_elec_bill_w_sys
-        self.monthly_sell = monthly_sell
-        self.monthly_cumulated_savings = monthly_cumulated_savings
-        self.profiles = profiles
-
-
-old_latitude = float('nan')
-old_longitude = float('nan')
-old_pv_capacity = float('nan')
-old_tilt = float('nan')
-old_orientation = float('nan')
-old_weather = None
-old_load = None
-old_load_parameters = LoadParameters(
-    monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],  # kWh
-    occ_schedule=[1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0,
-                  1.0, 1.0, 1.0, 1.0],  # frac
-    occupants=float('nan'),
-    retrofitted=float('nan'),
-    floors=float('nan'),
-    t_cool=float('nan'),  # °C
-    t_heat=float('nan'),  # °C
-    t_sched=[1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0,
-             1.0, 1.0, 1.0],  # on/off
-    year_built=float('nan'),
-    floor_area=float('nan'),  # m2
-    en_cool=float('nan'),
-    en_dishwasher=float('nan'),
-    en_dryer=float('nan'),
-    en_fridge=float('nan'),
-    en_heating=float('nan'),
-    en_misc=float('nan'),
-    en_stove=float('nan'),
-    en_washing_machine=float('nan'),
-)
+    """
+    Results of a simulation: annual values, monthly values (12 x MONTHLY_FIELDS) and average day of each month
+    (12 months x 24 hours x profile_columns)
+    The values are read as output.annual_<field> (float) and output.monthly_<field> (Series indexed by the month
+    number, a view of the monthly array)
+    """
+    __slots__ = ('annual', 'monthly', 'profiles', 'profile_columns')
+
+    ANNUAL_FIELDS = ['pv_production', 'batt_to_system', 'pv_to_batt', 'energy_yield', 'load', 'import', 'export',
+                     'elec_bill_wo_sys', 'elec_bill_w_sys', 'sell', 'savings']
+    MONTHLY_FIELDS = ['pv_production', 'load', 'import', 'export', 'soc', 'elec_bill_wo_sys', 'elec_bill_w_sys',
+                      'sell', 'cumulated_savings']
+    MONTHS = pd.RangeIndex(1, 13, name='date')
+
+    def __init__(self, annual, monthly, profiles, profile_columns):
+        self.annual = np.asarray(annual, dtype=float)
+        self.monthly = np.asarray(monthly, dtype=float)
+        self.profiles = np.asarray(profiles, dtype=float)
+        self.profile_columns = list(profile_columns)
+
+    def __getattr__(self, name):
+        # Only called for the names that are not slots
+        if name.startswith('annual_') and name[7:] in self.ANNUAL_FIELDS:
+            return float(self.annual[self.ANNUAL_FIELDS.index(name[7:])])
+        if name.startswith('monthly_') and name[8:] in self.MONTHLY_FIELDS:
+            return pd.Series(self.monthly[:, self.MONTHLY_FIELDS.index(name[8:])], index=self.MONTHS, name=name,
+                             copy=False)
+        raise AttributeError("'OutputResults' object has no attribute '{}'".format(name))
+
+    def profile(self, month, column):
+        """
+        :param month: month number, 1 to 12
+        :param column: one of profile_columns
+        :return: array of the 24 hourly values of the average day of the month
+        """
+        return self.profiles[month - 1, :, self.profile_columns.index(column)]
+
+    def monthly_frame(self):
+        # Views of the arrays, nothing is copied
+        return pd.DataFrame(self.monthly, index=self.MONTHS, columns=self.MONTHLY_FIELDS, copy=False)
+
+    def profile_frame(self, month):
+        return pd.DataFrame(self.profiles[month - 1], index=pd.RangeIndex(24, name='date'),
+                            columns=self.profile_columns, copy=False)
+
+    def to_bytes(self):
+        """
+        :return: compact binary form of the results (about 11 kB), for caches and transfers between processes
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, annual=self.annual, monthly=self.monthly, profiles=self.profiles,
+                 profile_columns=np.array(self.profile_columns))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(arrays['annual'], arrays['monthly'], arrays['profiles'], arrays['profile_columns'].tolist())
+
+    def __reduce__(self):
+        # Pickled in the compact form, e.g. when the results of a job are returned
+        return OutputResults.from_bytes, (self.to_bytes(),)
+
+
+pv_cache = LRUCache()
+load_cache = LRUCache()
+# Hourly load components of each building, see compute_load_components
+load_component_cache = LRUCache()
+# Number of combinable loads requested for each building, see get_load_components
+load_component_requests = LRUCache(maxsize=4096)
+# Verdicts are small, so many more locations are kept than PV outputs or loads
+location_cache = LRUCache(maxsize=4096)
+
+
+def aggregate_results(dates, values):
+    """
+    Sums and averages hourly results by month, and by month and hour of the day, in a single pass
+    :param dates: datetimes of the hourly results
+    :param values: 2-D array of the hourly results, one column per variable
+    :return: monthly sums and monthly means (12 x variables), and average day of each month (12 x 24 x variables)
+    """
+    dates = pd.DatetimeIndex(dates)
+    codes = (dates.month.to_numpy() - 1) * 24 + dates.hour.to_numpy()
+    counts = np.bincount(codes, minlength=12 * 24).reshape(12, 24)
+    sums = np.stack([np.bincount(codes, weights=column, minlength=12 * 24) for column in values.T],
+                    axis=-1).reshape(12, 24, -1)
+
+    monthly_sums = sums.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly_means = monthly_sums / counts.sum(axis=1)[:, np.newaxis]
+        profiles = sums / counts[..., np.newaxis]
+
+    return monthly_sums, monthly_means, profiles
 
 
 def celsius_to_fahrenheit(celsius):
@@ -130,31 +227,154 @@ def format_number(number):
 
 def cost_estimator(pv_capacity, battery_capacity):
     price_kwh_battery = 800
-    price_kw_pv = 1000 * 5.102 * pv_capacity ** (-0.285)
+    # The price per kWp decreases with the capacity, a system without PV only costs its battery
+    price_kw_pv = 1000 * 5.102 * pv_capacity ** (-0.285) if pv_capacity > 0 else 0
     price_total = price_kw_pv * pv_capacity + price_kwh_battery * battery_capacity
     return round(price_total / 500) * 500
 
 
+@lru_cache(maxsize=None)
+def read_template_tmy_load():
+    # Parsed once per process, compute_load only copies it
+    with open('template_tmy_load.csv') as file:
+        header = ''.join(file.readline() for _ in range(3))
+    data = np.loadtxt('template_tmy_load.csv', delimiter=',', skiprows=3, usecols=range(14))
+    return header, data
+
+
+def dew_point(temp_air, relative_humidity):
+    # Magnus formula, within 0.4 °C of the exact value between -45 °C and 60 °C
+    a = 17.62
+    b = 243.12  # °C
+    gamma = np.log(np.clip(relative_humidity, 1, 100) / 100) + a * temp_air / (b + temp_air)
+    return b * gamma / (a - gamma)
+
+
+def write_tmy_load(file, weather_data):
+    """
+    Writes the BELPE weather file of a location, i.e. the template with the PVGIS TMY in the EPW layout
+    :param weather_data: PVGIS TMY as returned by get_pvgis_tmy
+    """
+    header, data = read_template_tmy_load()
+    data = data.copy()
+    # As in the EPW files of PVGIS: the year of each month of the TMY, and hours from 1 to 24 in UTC
+    dates = weather_data.index.tz_convert('UTC')
+    data[:, 0] = dates.year
+    data[:, 1] = dates.month
+    data[:, 2] = dates.day
+    data[:, 3] = dates.hour + 1
+    data[:, 4] = 0
+    data[:, 9] = weather_data['temp_air']
+    data[:, 8] = dew_point(weather_data['temp_air'].to_numpy(), weather_data['relative_humidity'].to_numpy())
+    data[:, 10] = weather_data['pressure'] / 100
+    data[:, 7] = weather_data['ghi']
+    data[:, 5] = weather_data['dni']
+    data[:, 6] = weather_data['dhi']
+    data[:, 11] = weather_data['wind_direction']
+    data[:, 12] = weather_data['wind_speed']
+
+    file.write(header)
+    # The template rows have 20 fields, the last 6 ones being empty
+    np.savetxt(file, data, fmt=['%d'] * 5 + ['%.10g'] * 9, delimiter=',', newline=',,,,,,\n')
+
+
+@contextmanager
+def tmy_load_file(latitude, longitude):
+    # Same TMY as the PV model, the BELPE inputs are derived from it instead of downloading its EPW version
+    weather_data = get_pvgis_tmy(latitude, longitude)
+
+    # PySAM only reads the weather from a file, each call gets its own so that parallel workers do not race
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', prefix='tmy_load_', delete=False) as file:
+        write_tmy_load(file, weather_data)
+    try:
+        yield file.name
+    finally:
+        os.remove(file.name)
+
+
 def compute_load(latitude, longitude, load_parameters):
-    weather_data_epw = pvlib.iotools.get_pvgis_tmy(latitude, longitude, outputformat='epw', map_variables=True)
-
-    template_tmy_load = pd.read_csv('template_tmy_load.csv', header=None)
-    template_tmy_load.iloc[3:, 0] = weather_data_epw[0]['year']
-    template_tmy_load.iloc[3:, 1] = weather_data_epw[0]['month']
-    template_tmy_load.iloc[3:, 2] = weather_data_epw[0]['day']
-    template_tmy_load.iloc[3:, 3] = weather_data_epw[0]['hour']
-    template_tmy_load.iloc[3:, 4] = weather_data_epw[0]['minute']
-    template_tmy_load.iloc[3:, 9] = weather_data_epw[0]['temp_air']
-    template_tmy_load.iloc[3:, 8] = weather_data_epw[0]['temp_dew']
-    template_tmy_load.iloc[3:, 10] = weather_data_epw[0]['atmospheric_pressure'] / 100
-    template_tmy_load.iloc[3:, 7] = weather_data_epw[0]['ghi']
-    template_tmy_load.iloc[3:, 5] = weather_data_epw[0]['dni']
-    template_tmy_load.iloc[3:, 6] = weather_data_epw[0]['dhi']
-    template_tmy_load.iloc[3:, 11] = weather_data_epw[0]['wind_direction']
-    template_tmy_load.iloc[3:, 12] = weather_data_epw[0]['wind_speed']
-
-    template_tmy_load.to_csv('tmy_load.csv', index=False, header=False)
+    with tmy_load_file(latitude, longitude) as solar_resource_file:
+        with span('belpe'):
+            return compute_belpe_load(solar_resource_file, load_parameters)
+
 
+def compute_load_components(solar_resource_file, load_parameters):
+    """
+    Hourly loads of the base (lighting and always-on loads) and of each appliance of a building without heating and
+    cooling, before the monthly calibration, from 8 BELPE runs
+    BELPE scales every hour of a month by the same factor so that the month matches monthly_util, so that the
+    uncalibrated loads are only known up to a factor per month, the components share the factor of each month
+    :return: array of the components (W): base, then APPLIANCES
+    """
+    off = dict.fromkeys(APPLIANCES + HVAC, 0.0)
+    with span('belpe_components'):
+        def run(**equipment):
+            return np.array(compute_belpe_load(solar_resource_file, load_parameters.replace(**dict(off, **equipment))))
+
+        base = run()
+        singles = [run(**{appliance: 1.0}) for appliance in APPLIANCES]
+        all_appliances = run(**dict.fromkeys(APPLIANCES, 1.0))
+
+    components = np.zeros((1 + len(APPLIANCES), len(base)))
+    for month in range(12):
+        hours = BELPE_MONTHS == month
+        # The uncalibrated loads add up: all = base + sum(single - base), which gives the factor of each run
+        factors = np.linalg.lstsq(np.column_stack([base[hours]] + [single[hours] for single in singles]),
+                                  all_appliances[hours], rcond=None)[0]
+        base_factor = -factors[0] / (len(APPLIANCES) - 1)
+        components[0, hours] = base_factor * base[hours]
+        for i, single in enumerate(singles):
+            components[1 + i, hours] = factors[1 + i] * single[hours] - components[0, hours]
+
+    return components
+
+
+def is_combinable(load_parameters):
+    """
+    Whether the load of an equipment can be computed from the components of its building rather than by a BELPE run
+    The components give the load of any set of appliances without heating and cooling, BELPE's heating and cooling
+    depend on the internal gains of the appliances so the other sets are always simulated
+    """
+    appliances = [getattr(load_parameters, equipment) for equipment in APPLIANCES]
+    hvac = [getattr(load_parameters, equipment) for equipment in HVAC]
+    return all(value in (0.0, 1.0) for value in appliances) and not any(hvac)
+
+
+def combine_load_components(components, load_parameters):
+    """
+    Load of an equipment of the building, from its components and with the monthly calibration of BELPE
+    The monthly totals are always those of monthly_util
+    :return: tuple of the hourly loads (W)
+    """
+    weights = np.array([1.0] + [getattr(load_parameters, equipment) for equipment in APPLIANCES])
+    used = weights != 0
+    load = weights[used] @ components[used]
+    monthly_load = np.bincount(BELPE_MONTHS, load, minlength=12)
+    load = load * (1000 * np.asarray(load_parameters.monthly_util, dtype=float) / monthly_load)[BELPE_MONTHS]
+
+    return tuple(load.tolist())
+
+
+def get_load_components(latitude, longitude, load_parameters):
+    """
+    :return: the components of the building, None until LOAD_COMPONENT_REQUESTS loads of it were combinable, since
+    they cost about as much as 8 BELPE runs
+    """
+    building_key = (latitude, longitude, load_parameters.building_key())
+    components = load_component_cache.get(building_key)
+    if components is None:
+        requests_count = (load_component_requests.get(building_key) or 0) + 1
+        load_component_requests.put(building_key, requests_count)
+        if requests_count < LOAD_COMPONENT_REQUESTS:
+            return None
+        with tmy_load_file(latitude, longitude) as solar_resource_file:
+            components = compute_load_components(solar_resource_file, load_parameters)
+        load_component_cache.put(building_key, components)
+
+    return components
+
+
+def compute_belpe_load(solar_resource_file, load_parameters):
     belpe_model = bp.default('PVBatteryResidential')
     belpe_model.LoadProfileEstimator.en_belpe = 1.0
     belpe_model.LoadProfileEstimator.Occ_Schedule = load_parameters.occ_schedule
@@ -176,7 +396,7 @@ def compute_load(latitude, longitude, load_parameters):
     belpe_model.LoadProfileEstimator.en_range = load_parameters.en_stove
     belpe_model.LoadProfileEstimator.en_wash = load_parameters.en_washing_machine
     belpe_model.LoadProfileEstimator.floor_area = sqm_to_sqft(load_parameters.floor_area)
-    belpe_model.LoadProfileEstimator.solar_resource_file = 'tmy_load.csv'
+    belpe_model.LoadProfileEstimator.solar_resource_file = solar_resource_file
 
     belpe_model.LoadProfileEstimator.Monthly_util = load_parameters.monthly_util
     belpe_model.execute()
@@ -187,30 +407,33 @@ def compute_load(latitude, longitude, load_parameters):
 
 
 def check_location(latitude, longitude):
-    outputformat = 'json'
-    usehorizon = True
-    userhorizon = None
-    startyear = None
-    endyear = None
-    url = 'https://re.jrc.ec.europa.eu/api/'
-    map_variables = True
-    timeout = 30
-    params = {'lat': latitude, 'lon': longitude, 'outputformat': outputformat}
-    # pvgis only likes 0 for False, and 1 for True, not strings, also the
-    # default for usehorizon is already 1 (ie: True), so only set if False
-    if not usehorizon:
-        params['usehorizon'] = 0
-    if userhorizon is not None:
-        params['userhorizon'] = ','.join(str(x) for x in userhorizon)
-    if startyear is not None:
-        params['startyear'] = startyear
-    if endyear is not None:
-        params['endyear'] = endyear
-    res = requests.get(url + 'tmy', params=params, timeout=timeout)
-    if 'message' in res.json().keys():
+    """
+    Checks that PVGIS has weather data for a location, the verdicts are cached by rounded coordinates
+    The weather data downloaded for the check is kept in the weather cache for the simulation
+    """
+    if latitude is None or longitude is None:
         return False
-    else:
-        return True
+    location = round_coordinates(latitude, longitude)
+    valid = location_cache.get(location)
+    if valid is None:
+        try:
+            # PVGIS answers with an error message for locations without data (e.g. over the sea)
+            get_pvgis_tmy(*location)
+            valid = True
+        except requests.RequestException as e:
+            if isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code == 400:
+                valid = False
+            else:
+                # PVGIS unreachable or overloaded, the location cannot be rejected and is checked again next time
+                return True
+        location_cache.put(location, valid)
+
+    return valid
+
+
+def cache_statistics():
+    return {'pv': pv_cache.stats(), 'load': load_cache.stats(), 'load_components': load_component_cache.stats(),
+            'location': location_cache.stats()}
 
 
 def compute_system(row, batt_cap_prev, battery_capacity_real):
@@ -230,64 +453,95 @@ def compute_system(row, batt_cap_prev, battery_capacity_real):
         row['ToFromBattery'] = row['NetPower'] - diff
 
 
-def compute_monthly_output(latitude, longitude, pv_capacity, battery_capacity, discharge_cutoff, battery_initial_SOC,
-                           load_parameters, tilt, orientation, buy_rate, sell_rate):
-    global old_latitude, old_longitude, old_load_parameters, old_weather, old_load, old_tilt, old_orientation, old_pv_capacity, simulation_state
-    time_start = time.time()
-    battery_capacity_real = battery_capacity * (100 - discharge_cutoff) / 100
+def report_progress(progress, stage):
+    if progress is not None:
+        progress(stage)
 
-    if latitude == old_latitude and longitude == old_longitude and pv_capacity == old_pv_capacity and tilt == old_tilt and orientation == old_orientation:
-        results = old_weather
-        old_latitude = latitude
-        old_longitude = longitude
-        old_pv_capacity = pv_capacity
-        old_tilt = tilt
-        old_orientation = orientation
-    else:
-        simulation_state = 'Computing PV energy output from weather data...'
+
+def get_unit_pv_output(latitude, longitude, tilt, orientation, progress=None):
+    """
+    Returns the hourly weather and DC output (W) of a 1 kWp PV system, from the cache when available
+    The returned DataFrame is shared between calls and must not be modified
+    :param progress: function called with the description of the current stage
+    """
+    pv_key = (latitude, longitude, tilt, orientation)
+    results = pv_cache.get(pv_key)
+    if results is None:
+        report_progress(progress, 'Computing PV energy output from weather data...')
         location = Location(latitude, longitude)
-        weather_data = pvlib.iotools.get_pvgis_tmy(latitude, longitude, map_variables=True)
+        weather_data = get_pvgis_tmy(latitude, longitude)
 
         pvwatts_system = PVSystem(surface_tilt=tilt, surface_azimuth=orientation,
-                                  module_parameters={'pdc0': pv_capacity, 'gamma_pdc': -0.004},
-                                  inverter_parameters={'pdc0': pv_capacity},
+                                  module_parameters={'pdc0': UNIT_PV_CAPACITY, 'gamma_pdc': -0.004},
+                                  inverter_parameters={'pdc0': UNIT_PV_CAPACITY},
                                   temperature_model_parameters=temperature_model_parameters)
 
         mc = ModelChain(pvwatts_system, location,
                         aoi_model='physical', spectral_model='no_loss')
 
         weather = pd.DataFrame(columns=['ghi', 'dni', 'dhi', 'temp_air', 'wind_speed'],
-                               index=weather_data[0].index.values)
+                               index=weather_data.index.values)
 
-        weather['temp_air'] = weather_data[0]['temp_air'].values
-        weather['wind_speed'] = weather_data[0]['wind_speed'].values
-        weather['ghi'] = weather_data[0]['ghi'].values
-        weather['dni'] = weather_data[0]['dni'].values
-        weather['dhi'] = weather_data[0]['dhi'].values
+        weather['temp_air'] = weather_data['temp_air'].values
+        weather['wind_speed'] = weather_data['wind_speed'].values
+        weather['ghi'] = weather_data['ghi'].values
+        weather['dni'] = weather_data['dni'].values
+        weather['dhi'] = weather_data['dhi'].values
 
-        mc.run_model(weather)
+        with span('modelchain'):
+            mc.run_model(weather)
 
         results = weather
         results['DCOutput'] = mc.results.dc.values
 
-        old_weather = results
-        old_latitude = latitude
-        old_longitude = longitude
-        old_pv_capacity = pv_capacity
-        old_tilt = tilt
-        old_orientation = orientation
+        pv_cache.put(pv_key, results)
 
-    if load_parameters == old_load_parameters:
-        results['Load'] = old_load
-        old_load_parameters = deepcopy(load_parameters)
-    else:
-        simulation_state = 'Computing load consumption profile...'
-        load = compute_load(latitude, longitude, load_parameters)
-        results['Load'] = load
-        old_load = load
-        old_load_parameters = deepcopy(load_parameters)
+    return results
 
-    simulation_state = 'Computing grid import and export...'
+
+def get_pv_output(latitude, longitude, pv_capacity, tilt, orientation, progress=None):
+    """
+    Returns the hourly weather and DC output (W) of a PV system of pv_capacity (W)
+    """
+    # PVWatts DC output is linear in pdc0, so the ModelChain only runs once per location, tilt and orientation
+    results = get_unit_pv_output(latitude, longitude, tilt, orientation, progress).copy()
+    results['DCOutput'] = results['DCOutput'] * (pv_capacity / UNIT_PV_CAPACITY)
+
+    return results
+
+
+def get_load(latitude, longitude, load_parameters, progress=None):
+    """
+    Returns the hourly BELPE load (W) of a building, from the cache when available
+    """
+    load_key = (latitude, longitude, load_parameters)
+    load = load_cache.get(load_key)
+    if load is None:
+        report_progress(progress, 'Computing load consumption profile...')
+        components = get_load_components(latitude, longitude, load_parameters) if is_combinable(
+            load_parameters) else None
+        if components is not None:
+            load = combine_load_components(components, load_parameters)
+        else:
+            load = compute_load(latitude, longitude, load_parameters)
+        load_cache.put(load_key, load)
+
+    return load
+
+
+def compute_dispatch(pv_output, load, battery_capacity, discharge_cutoff):
+    """
+    Hourly energy flows of the system
+    :param pv_output: hourly weather and DC output (W) of the PV system
+    :param load: hourly load (W)
+    :param battery_capacity: battery capacity (Wh), 0 for a system without battery
+    :param discharge_cutoff: minimum state of charge of the battery (%)
+    :return: DataFrame of the hourly results
+    """
+    battery_capacity_real = battery_capacity * (100 - discharge_cutoff) / 100
+
+    results = pv_output.copy()
+    results['Load'] = load
     results['NetPower'] = results['DCOutput'] - results['Load']
     results['ToFromBattery'] = 0
     results['BatteryCapacity'] = 0
@@ -295,57 +549,40 @@ def compute_monthly_output(latitude, longitude, pv_capacity, battery_capacity, d
     results['Export'] = 0
     results = results.reset_index()
     results = results.rename(columns={'index': 'date'})
-    batt_cap_prev = 0.0
-
-    time_weather = time.time()
-
 
-    if battery_capacity:
-        for i in range(len(results)):
-            diff = batt_cap_prev + results.loc[i, 'NetPower']
-            if diff >= 0.0:
-                if diff > battery_capacity_real:
-                    results.loc[i, 'BatteryCapacity'] = battery_capacity_real
-                    results.loc[i, 'Export'] = diff - battery_capacity_real
-                    results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower'] - (
-                            diff - battery_capacity_real)
-                    batt_cap_prev = results.loc[i, 'BatteryCapacity']
-                else:
-                    results.loc[i, 'BatteryCapacity'] = batt_cap_prev + results.loc[i, 'NetPower']
-                    results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower']
-                    batt_cap_prev = results.loc[i, 'BatteryCapacity']
-            else:
-                results.loc[i, 'Import'] = diff
-                results.loc[i, 'BatteryCapacity'] = batt_cap_prev + results.loc[i, 'NetPower'] - diff
-                results.loc[i, 'ToFromBattery'] = results.loc[i, 'NetPower'] - diff
-                batt_cap_prev = results.loc[i, 'BatteryCapacity']
-    else:
-        results['Import'] = results['NetPower'].apply(lambda x: min(0.0, x))
-        results['Export'] = results['NetPower'].apply(lambda x: max(0.0, x))
+    net_power = results['NetPower'].to_numpy(dtype=float)
+    with span('dispatch'):
+        if battery_capacity:
+            battery_state, to_from_battery, grid_import, grid_export = dispatch_battery(net_power,
+                                                                                        battery_capacity_real)
+            results['BatteryCapacity'] = battery_state
+            results['ToFromBattery'] = to_from_battery
+            results['Import'] = grid_import
+            results['Export'] = grid_export
+        else:
+            results['Import'], results['Export'] = dispatch_grid(net_power)
 
-    results['SOC'] = float('inf')
+    # No state of charge without battery, left empty in the figures
+    results['SOC'] = np.nan
     if battery_capacity:
-        results['SOC'] = results['BatteryCapacity'].apply(
-            lambda x: 100 * (x + (battery_capacity - battery_capacity_real)) / battery_capacity)
-    results['Buy'] = results['Import'].apply(lambda x: x * buy_rate / 1000)
-    results['Sell'] = results['Export'].apply(lambda x: x * sell_rate / 1000)
+        results['SOC'] = 100 * (results['BatteryCapacity'] + (battery_capacity - battery_capacity_real)) / battery_capacity
     results['Grid'] = results['Import'] + results['Export']
 
-    time_results = time.time()
+    return results
 
-    monthly_results = results.groupby(results.date.dt.month).sum(numeric_only=True)
-    monthly_results_mean = results.groupby(results.date.dt.month).mean(numeric_only=True)
 
-    months = [m for m in range(1, 13)]
-    profiles = {}
-    for m in months:
-        # Create a temporary dataframe with only the data of the current month
-        temp_df = results[(results.date.dt.month >= m) & (
-                results.date.dt.month <= m)]
-        # Calculate the average daily profile
-        avg_daily_profile = temp_df.groupby(temp_df.date.dt.hour).mean(numeric_only=True).round(2)
-        # Store the results in the dictionary
-        profiles[f'{m}'] = avg_daily_profile
+def aggregate_energy(results, pv_capacity):
+    """
+    Annual, monthly and daily profile energy values of the hourly results
+    :param pv_capacity: PV capacity (W)
+    :return: OutputResults whose financial values are NaN until compute_economics fills them
+    """
+    monthly_columns = ['DCOutput', 'Load', 'Import', 'Export', 'SOC']
+    columns = list(dict.fromkeys(monthly_columns + PROFILE_COLUMNS))
+    with span('aggregation'):
+        monthly_sums, monthly_means, profiles = aggregate_results(results['date'],
+                                                                  results[columns].to_numpy(dtype=float))
+    profiles = profiles[..., [columns.index(column) for column in PROFILE_COLUMNS]].round(2)
 
     annual_pv_production = round(results['DCOutput'].sum() / 1000, 2)
     annual_batt_to_system = round(results[results['ToFromBattery'] > 0]['ToFromBattery'].sum() / 1000, 2)
@@ -354,38 +591,73 @@ def compute_monthly_output(latitude, longitude, pv_capacity, battery_capacity, d
     annual_load = round(results['Load'].sum() / 1000, 2)
     annual_import = round(results['Import'].sum() / 1000, 2)
     annual_export = round(results['Export'].sum() / 1000, 2)
+    monthly_pv_production = (monthly_sums[:, columns.index('DCOutput')] / 1000).round(0)
+    monthly_load = (monthly_sums[:, columns.index('Load')] / 1000).round(0)
+    monthly_import = (monthly_sums[:, columns.index('Import')] / 1000).round(0)
+    monthly_export = (monthly_sums[:, columns.index('Export')] / 1000).round(0)
+    monthly_soc = (monthly_means[:, columns.index('SOC')]).round(2)
+    unknown = np.full(12, np.nan)
+
+    return OutputResults([annual_pv_production, annual_batt_to_system, annual_pv_to_batt, annual_energy_yield,
+                          annual_load, annual_import, annual_export, np.nan, np.nan, np.nan, np.nan],
+                         np.column_stack([monthly_pv_production, monthly_load, monthly_import, monthly_export,
+                                          monthly_soc, unknown, unknown, unknown, unknown]),
+                         profiles, PROFILE_COLUMNS)
+
+
+def compute_economics(energy, buy_rate, sell_rate):
+    """
+    :param energy: OutputResults of aggregate_energy, not modified
+    :param buy_rate: electricity import price (€/kWh)
+    :param sell_rate: electricity export price (€/kWh)
+    :return: OutputResults with the electric bills, export income and savings
+    """
+    # NumPy scalars, which are rounded like the values of compute_monthly_output always were
+    annual_load, annual_import, annual_export = energy.annual[[OutputResults.ANNUAL_FIELDS.index(field)
+                                                               for field in ['load', 'import', 'export']]]
     annual_elec_bill_wo_sys = round(annual_load * buy_rate, 2)
     annual_elec_bill_w_sys = round(abs(annual_import) * buy_rate - annual_export * sell_rate, 2)
     annual_sell = round(annual_export * sell_rate, 2)
     annual_savings = round(annual_elec_bill_wo_sys - annual_elec_bill_w_sys, 2)
-    monthly_pv_production = (monthly_results['DCOutput'] / 1000).round(0)
-    monthly_load = (monthly_results['Load'] / 1000).round(0)
-    monthly_import = (monthly_results['Import'] / 1000).round(0)
-    monthly_export = (monthly_results['Export'] / 1000).round(0)
-    monthly_soc = (monthly_results_mean['SOC']).round(2)
-    monthly_elec_bill_wo_sys = (monthly_load * buy_rate).round(2)
-    monthly_elec_bill_w_sys = (abs(monthly_import) * buy_rate - monthly_export * sell_rate).round(2)
-    monthly_sell = (monthly_export * sell_rate).round(2)
+    monthly_elec_bill_wo_sys = (energy.monthly_load * buy_rate).round(2)
+    monthly_elec_bill_w_sys = (abs(energy.monthly_import) * buy_rate - energy.monthly_export * sell_rate).round(2)
+    monthly_sell = (energy.monthly_export * sell_rate).round(2)
     monthly_savings = (monthly_elec_bill_wo_sys - monthly_elec_bill_w_sys).round(2)
     monthly_cumulated_savings = (monthly_savings.cumsum()).round(2)
 
-    output = OutputResults(annual_pv_production, annual_batt_to_system, annual_pv_to_batt, annual_energy_yield,
-                           annual_load,
-                           annual_import, annual_export,
-                           annual_elec_bill_wo_sys, annual_elec_bill_w_sys, annual_sell, annual_savings,
-                           monthly_pv_production, monthly_load, monthly_import, monthly_export, monthly_soc,
-                           monthly_elec_bill_wo_sys, monthly_elec_bill_w_sys, monthly_sell, monthly_cumulated_savings,
-                           profiles)
-    time_end = time.time()
-    simulation_state = 'Building graphs...'
-    # print("Time difference between start and end:", time_end - time_start)
-    # print("Time difference between start and weather:", time_weather - time_start)
-    # print("Time difference between weather and results:", time_results - time_weather)
-    # print("Time difference between results and end:", time_end - time_results)
+    # The financial values are the last fields of OutputResults
+    annual = energy.annual.copy()
+    annual[OutputResults.ANNUAL_FIELDS.index('elec_bill_wo_sys'):] = [annual_elec_bill_wo_sys, annual_elec_bill_w_sys,
+                                                                      annual_sell, annual_savings]
+    monthly = energy.monthly.copy()
+    monthly[:, OutputResults.MONTHLY_FIELDS.index('elec_bill_wo_sys'):] = np.column_stack(
+        [monthly_elec_bill_wo_sys, monthly_elec_bill_w_sys, monthly_sell, monthly_cumulated_savings])
+
+    return OutputResults(annual, monthly, energy.profiles, energy.profile_columns)
+
+
+@timed('compute_monthly_output')
+def compute_monthly_output(latitude, longitude, pv_capacity, battery_capacity, discharge_cutoff, battery_initial_SOC,
+                           load_parameters, tilt, orientation, buy_rate, sell_rate, progress=None):
+    pv_output = get_pv_output(latitude, longitude, pv_capacity, tilt, orientation, progress)
+    load = get_load(latitude, longitude, load_parameters, progress)
+
+    report_progress(progress, 'Computing grid import and export...')
+    results = compute_dispatch(pv_output, load, battery_capacity, discharge_cutoff)
+
+    return compute_economics(aggregate_energy(results, pv_capacity), buy_rate, sell_rate)
+
 
-    return output
+def compute_percentages(output):
+    autonomy = int(round(100 * (output.annual_load + output.annual_import) / output.annual_load, 0))
+    electric_bill_reduction = int(round(
+        100 * (output.annual_elec_bill_wo_sys - output.annual_elec_bill_w_sys) / output.annual_elec_bill_wo_sys, 0))
+    electric_energy_export = int(round(100 * output.annual_export / output.annual_pv_production, 0))
 
+    return autonomy, electric_bill_reduction, electric_energy_export
 
+
+@timed('fig_energy')
 def create_fig_energy(output):
     x = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
@@ -486,6 +758,7 @@ def create_fig_energy(output):
     # fig.show()
 
 
+@timed('fig_finance')
 def create_fig_financial(output):
     x = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
@@ -540,84 +813,58 @@ def create_fig_financial(output):
     # fig.show()
 
 
-def create_fig_payback(output, cost, buy_rate, sell_rate, rate_escalation):
-    rates = [0, 0.04, 0.08]
-
-    fig = make_subplots(rows=len(rates), cols=1, subplot_titles=(
-        'Escalation: 0% per year', 'Escalation: 4% per year', 'Escalation: 8% per year'))
-    buy_rate = buy_rate / 100
-    sell_rate = sell_rate / 100
-    tickers_year = [0, 5, 10, 15, 20, 25]
+@timed('fig_payback')
+def create_fig_payback(output, cost, buy_rate, sell_rate, rate_escalations=(0, 0.04, 0.08), years=25):
+    rows = len(rate_escalations)
+    fig = make_subplots(rows=rows, cols=1, subplot_titles=[
+        'Escalation: {:g}% per year'.format(100 * rate) for rate in rate_escalations])
+    tickers_year = [*range(0, years + 1, 5)]
 
-    for j in range(len(rates)):
-        x = [*range(0, 26)]
-        y = []
-        color = []
-        current_cost = -cost
-        idx_payback = 0
+    # All the escalation rates at once, one scenario per row
+    results = compute_cash_flows(cost, output.annual_load, output.annual_import, output.annual_export, buy_rate / 100,
+                                 sell_rate / 100, np.asarray(rate_escalations, dtype=float), years)
+    x = results.years.tolist()
 
-        for i in range(len(x)):
-            if i == 0:
-                y.append(round(current_cost, 0))
-                color.append('#EF553B')
-                idx_payback += 1
-            else:
-                current_buy_rate = buy_rate * (1 + rates[j]) ** i
-                savings = output.annual_load * current_buy_rate - (
-                        abs(output.annual_import) * current_buy_rate - output.annual_export * sell_rate)
-                y.append(round(current_cost + savings, 0))
-                if current_cost + savings > 0:
-                    color.append('#00CC96')
-                else:
-                    color.append('#EF553B')
-                    idx_payback += 1
-                current_cost = current_cost + savings
+    for j in range(rows):
+        cumulated_cash_flow = results.cumulated_cash_flow[j]
+        y = np.round(cumulated_cash_flow, 0).tolist()
+        color = np.where(cumulated_cash_flow > 0, '#00CC96', '#EF553B')
+        color[0] = '#EF553B'
 
         fig.add_trace(go.Bar(
             visible=True,
             x=x,
             y=y,
-            marker_color=color,
+            marker_color=color.tolist(),
+            marker_line_color='black',
+            marker_line_width=[0] * years + [2],
             name='Payback',
             customdata=['{}'.format('Payback') for i in range(len(x))],
             hovertemplate='<b>%{customdata} </b> <br>Year %{x}: %{y} € <extra></extra>',
             showlegend=False,
         ), row=j + 1, col=1, )
 
-        if y[-1] > 0:
+        if not np.isnan(results.payback[j]):
+            idx_payback = int(results.payback[j])
             fig.add_vline(x=idx_payback, line_width=2, line_dash="dash", line_color="black",
                           annotation_text=" Payback year: <b>{}</b>".format(idx_payback),
                           annotation_position="bottom right", row=j + 1, col=1)
 
         fig.add_annotation(text="Net value: <b>{} €</b>".format(format_number(int(y[-1]))),
                            xref="paper", yref="paper",
-                           x=29, y=0, showarrow=False, row=j + 1, col=1)
+                           x=years + 4, y=0, showarrow=False, row=j + 1, col=1)
 
     fig.update_layout(paper_bgcolor="rgba(0,0,0,0)",
                       plot_bgcolor="rgba(0,0,0,0)")
     fig.update_layout(uniformtext_mode='hide')
-    fig['layout']['xaxis3']['title'] = 'Year'
-    fig['layout']['yaxis2']['title'] = 'Value (€)'
-
-    fig['layout']['xaxis1']['tickvals'] = tickers_year
-    fig['layout']['xaxis2']['tickvals'] = tickers_year
-    fig['layout']['xaxis3']['tickvals'] = tickers_year
-
-    fig['data'][0]['marker']['line']['color'] = 'black'
-    fig['data'][0]['marker']['line']['width'] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
-                                                 0, 2]
-    fig['data'][1]['marker']['line']['color'] = 'black'
-    fig['data'][1]['marker']['line']['width'] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
-                                                 0, 2]
-    fig['data'][2]['marker']['line']['color'] = 'black'
-    fig['data'][2]['marker']['line']['width'] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
-                                                 0, 2]
+    fig.update_xaxes(tickvals=tickers_year)
+    fig.update_xaxes(title='Year', row=rows, col=1)
+    fig.update_yaxes(title='Value (€)', row=(rows + 1) // 2, col=1)
 
     return fig
 
-    # fig.show()
-
 
+@timed('fig_profiles')
 def create_fig_profiles(output):
     rows = 3
     cols = 4
@@ -642,7 +889,7 @@ def create_fig_profiles(output):
             fig.add_trace(go.Scatter(
                 visible=True,
                 x=x,
-                y=output.profiles[str(month)]['DCOutput'].round(0),
+                y=output.profile(month, 'DCOutput').round(0),
                 name='PV (W)',
                 showlegend=show_legend,
                 legendgroup='pv',
@@ -656,7 +903,7 @@ def create_fig_profiles(output):
             fig.add_trace(go.Scatter(
                 visible=True,
                 x=x,
-                y=output.profiles[str(month)]['Load'].round(0),
+                y=output.profile(month, 'Load').round(0),
                 name='Load (W)',
                 showlegend=show_legend,
                 legendgroup='load',
@@ -670,7 +917,7 @@ def create_fig_profiles(output):
             fig.add_trace(go.Scatter(
                 visible=True,
                 x=x,
-                y=output.profiles[str(month)]['Grid'].round(0),
+                y=output.profile(month, 'Grid').round(0),
                 name='Grid (W)',
                 showlegend=show_legend,
                 legendgroup='grid',
@@ -684,7 +931,7 @@ def create_fig_profiles(output):
             fig.add_trace(go.Scatter(
                 visible=True,
                 x=x,
-                y=output.profiles[str(month)]['SOC'].round(2),
+                y=output.profile(month, 'SOC').round(2),
                 name='BATT (%)',
                 showlegend=show_legend,
                 legendgroup='batt',
@@ -713,80 +960,117 @@ def create_fig_profiles(output):
     # fig.show()
 
 
+@lru_cache(maxsize=None)
+def load_font(size):
+    # Arial as in the plotly figures, or the closest font available on the server
+    for name in PERCENT_FONTS:
+        try:
+            return ImageFont.truetype(name, size=size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def percent_palette():
+    # Blends of white with black (text) and with the ring colors, and of the two ring colors (end of the arc), in
+    # PERCENT_LEVELS steps for the anti-aliased edges
+    weights = np.linspace(0, 1, PERCENT_LEVELS + 1)[:, np.newaxis]
+    white = np.array([255, 255, 255])
+    ramps = [(white, np.array([0, 0, 0])), (white, PERCENT_COLORS[1]), (white, PERCENT_COLORS[0]),
+             (PERCENT_COLORS[1], PERCENT_COLORS[0])]
+    palette = np.vstack([(1 - weights) * start + weights * end for start, end in ramps])
+
+    return np.round(palette).astype(np.uint8).ravel().tolist()
+
+
+@lru_cache(maxsize=None)
+def percent_ring_layers(size):
+    # Parts of the gauge that do not depend on the percentage, as indices of percent_palette
+    y, x = np.mgrid[0:size, 0:size] + 0.5
+    dx = x - size / 2
+    dy = y - size / 2
+    distance = np.hypot(dx, dy)
+    angle = np.degrees(np.arctan2(dx, -dy)) % 360  # clockwise from 12 o'clock
+
+    # Donut equivalent to a plotly pie with hole=0.8 and no margin, edges are anti-aliased over one pixel
+    outer = size / 2
+    inner = outer * 0.8
+    ring = np.clip(outer - distance + 0.5, 0, 1) * np.clip(distance - inner + 0.5, 0, 1)
+    level = np.round(ring * PERCENT_LEVELS).astype(np.uint8)
+    empty = np.where(level > 0, (PERCENT_LEVELS + 1) + level, 0).astype(np.uint8)
+    full = (2 * (PERCENT_LEVELS + 1) + level).astype(np.uint8)
+
+    # Pixels of the ring sorted by angle, the filled part of the ring is a slice of them
+    pixels = np.flatnonzero(level)
+    order = np.argsort(angle.flat[pixels], kind='stable')
+    pixels = pixels[order]
+
+    return empty, full.flat[pixels], pixels, angle.flat[pixels], distance.flat[pixels] * np.pi / 180
+
+
+@lru_cache(maxsize=256)
+def draw_percent_ring(percent, size=PERCENT_IMAGE_SIZE):
+    empty, full, pixels, angle, pixels_per_degree = percent_ring_layers(size)
+    img = empty.copy()
+    if percent <= 0:
+        return img
+
+    # Filled part, then the pixels crossed by the end of the arc, i.e. less than one pixel away from it
+    end = 360 * percent / 100
+    band = 1 / pixels_per_degree.min()
+    start_edge, stop_edge = np.searchsorted(angle, [end - band, end + band])
+    img.flat[pixels[:start_edge]] = full[:start_edge]
+
+    edge = pixels[start_edge:stop_edge]
+    full_edge = full[start_edge:stop_edge]
+    filled = np.clip((end - angle[start_edge:stop_edge]) * pixels_per_degree[start_edge:stop_edge] + 0.5, 0, 1)
+    # Blend the two ring colors inside the ring, on its inner and outer edges take the closest one
+    on_ring_edge = full_edge < 3 * (PERCENT_LEVELS + 1) - 1
+    img.flat[edge] = np.where(on_ring_edge, np.where(filled >= 0.5, full_edge, empty.flat[edge]),
+                              3 * (PERCENT_LEVELS + 1) + np.round(filled * PERCENT_LEVELS).astype(np.uint8))
+
+    return img
+
+
+@lru_cache(maxsize=1024)
+def create_percent_image(text, percent):
+    img = draw_percent_ring(max(0, min(percent, 100))).copy()
+    size = img.shape[0]
+
+    # The text is entirely inside the hole of the ring, on a white background
+    for xy, string, font, anchor in [((size / 2, size / 2), text, load_font(140), 'mm'),
+                                     ((size / 2, size * 0.9), '%', load_font(60), 'md')]:
+        left, top, right, bottom = (int(round(v)) for v in font.getbbox(string, anchor=anchor))
+        text_mask = Image.new('L', (right - left, bottom - top))
+        ImageDraw.Draw(text_mask).text((-left, -top), string, fill=255, font=font, anchor=anchor)
+        left += int(round(xy[0]))
+        top += int(round(xy[1]))
+        region = img[top:top + text_mask.size[1], left:left + text_mask.size[0]]
+        text_mask = np.asarray(text_mask)[:region.shape[0], :region.shape[1]]
+        region[text_mask > 0] = (text_mask[text_mask > 0].astype(np.uint16) * PERCENT_LEVELS + 127) // 255
+
+    # A palette PNG is much faster to encode than a true color one
+    img = Image.fromarray(img, 'P')
+    img.putpalette(percent_palette())
+    return "data:image/png;base64," + pil_to_b64(img, compress_level=1)
+
+
+@timed('percent_images')
 def create_fig_percent(autonomy, bill_reduction, elec_export):
-    autonomy = int(autonomy)
-    bill_reduction = int(bill_reduction)
-    elec_export = int(elec_export)
-    values = [autonomy, bill_reduction, elec_export]
-    names = ['autonomy', 'bill_reduction', 'elec_export']
-    contents = []
-    i = 0
-
-    for value in values:
-        fig = go.Figure(data=go.Pie(values=[min(int(value), 100), 100 - min(int(value), 100)],
-                                    hole=0.8,
-                                    sort=False))
-        fig.update_traces(hoverinfo='none',
-                          textinfo='none',
-                          marker=dict(colors=['#EFA31D', '#D9D9D9']))
-        fig.update_layout(showlegend=False)
-        if i == 1:
-            fig.add_annotation(x=0.5, y=0.5,
-
-                               text='-' + str(value),
-                               font=dict(size=140, family='Arial',
-                                         color='black'),
-                               showarrow=False)
-        else:
-            fig.add_annotation(x=0.5, y=0.5,
-                               text=str(value),
-                               font=dict(size=140, family='Arial',
-                                         color='black'),
-                               showarrow=False)
-        fig.add_annotation(x=0.5, y=0.1,
-                           text='%',
-                           font=dict(size=60, family='Arial',
-                                     color='black'),
-                           showarrow=False)
-
-        fig.update_layout(margin=dict(l=0, r=0, b=0, t=0))
-
-        # fig.write_image("assets/percent_{}.png".format(names[i]), engine='orca', width=550, height=550)
-        img_bytes = fig.to_image(format="png", width=500, height=500, engine='orca')
-        encoding = b64encode(img_bytes).decode()
-        img_b64 = "data:image/png;base64," + encoding
-        contents.append(img_b64)
-        i += 1
+    # Rounded as the percentages of compute_percentages, 99.6 is shown as 100
+    autonomy = int(round(autonomy))
+    bill_reduction = int(round(bill_reduction))
+    elec_export = int(round(elec_export))
 
-    return contents
+    contents = [create_percent_image(str(autonomy), autonomy),
+                create_percent_image('-' + str(bill_reduction), bill_reduction),
+                create_percent_image(str(elec_export), elec_export)]
 
-
-"""
-for i in range(3):
-    fig = go.Figure(data=go.Pie(values=[min(int(0), 100), 100 - min(int(0), 100)],
-                                hole=0.8,
-                                sort=False))
-    fig.update_traces(hoverinfo='none',
-                      textinfo='none',
-                      marker=dict(colors=['#EFA31D', '#D9D9D9']))
-    fig.update_layout(showlegend=False)
-    fig.add_annotation(x=0.5, y=0.5,
-                       text='-',
-                       font=dict(size=140, family='Arial',
-                                 color='black'),
-                       showarrow=False)
-    fig.add_annotation(x=0.5, y=0.1,
-                       text='%',
-                       font=dict(size=60, family='Arial',
-                                 color='black'),
-                       showarrow=False)
-
-    fig.update_layout(margin=dict(l=0, r=0, b=0, t=0))
-
-    fig.write_image("assets/percent_{}_none.png".format(names[i]), engine='orca', width=500, height=500)
-    """
+    return contents
 
 
+@timed('fig_bills')
 def create_fig_bills(annual_elec_bill_wo_sys, annual_elec_bill_w_sys):
     fig = go.Figure(go.Bar(
         x=[annual_elec_bill_wo_sys, annual_elec_bill_w_sys],
@@ -806,6 +1090,7 @@ def create_fig_bills(annual_elec_bill_wo_sys, annual_elec_bill_w_sys):
     return fig
 
 
+@timed('fig_load')
 def create_fig_load(annual_pv_production, annual_import, annual_pv_to_batt, annual_export):
     total = annual_pv_production + abs(annual_import)
     fig = go.Figure(go.Sunburst(
@@ -841,14 +1126,45 @@ def pil_to_b64(im, enc_format="png", **kwargs):
     return encoded
 
 
-def create_kwh_diagram(pv, imp, exp, batt, load):
+@lru_cache(maxsize=None)
+def read_kwh_template(width=None):
+    # Loaded once per process, the callers draw on a copy
     img = Image.open('./assets/kwh_template.png')
+    img.load()
+    if width is not None and width != img.width:
+        img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+
+    return img
+
+
+@lru_cache(maxsize=None)
+def load_kwh_font(size):
+    return ImageFont.truetype("OCRAEXT.TTF", size=size)
+
+
+@timed('kwh_diagram')
+def create_kwh_diagram(pv, imp, exp, batt, load, width=None, enc_format='png'):
+    """
+    Draws the annual energy flows on the kWh diagram
+    :param width: width of the image (px), the full size template (4400 px) by default
+    :param enc_format: 'png', 'webp' or 'jpeg'
+    :return: image as a base64 data URI
+    """
+    # Memoized on the values as displayed, rounded to the kWh
+    return _create_kwh_diagram(int(round(pv)), int(round(imp)), int(round(exp)), int(round(batt)), int(round(load)),
+                               width, enc_format)
+
+
+@lru_cache(maxsize=256)
+def _create_kwh_diagram(pv, imp, exp, batt, load, width, enc_format):
+    img = read_kwh_template(width).copy()
+    scale = img.width / KWH_TEMPLATE_WIDTH
 
     # Initialize drawing
     draw = ImageDraw.Draw(img)
 
     # Set font
-    font = ImageFont.truetype("OCRAEXT.ttf", size=70)
+    font = load_kwh_font(round(70 * scale))
 
     length_rect = 600
     width_rect = 114
@@ -860,20 +1176,27 @@ def create_kwh_diagram(pv, imp, exp, batt, load):
     list_pos_x = [215, 215, 215, 1574, 3172]
     list_pos_y = [185, 1870, 2005, 2165, 1850]
     text_colors = ['#6596C1', '#EE7475', '#EE7475', '#6596C1', '#99CB5F']
-    texts = [str(int(pv)) + ' kWh', 'I: ' + str(int(imp)) + ' kWh', 'E: ' + str(int(exp)) + ' kWh',
-             str(int(batt)) + ' kWh', str(int(load)) + ' kWh']
+    texts = [str(pv) + ' kWh', 'I: ' + str(imp) + ' kWh', 'E: ' + str(exp) + ' kWh',
+             str(batt) + ' kWh', str(load) + ' kWh']
 
     for i in range(len(list_pos_x)):
-        pos_x = list_pos_x[i]
-        pos_y = list_pos_y[i]
+        pos_x = list_pos_x[i] * scale
+        pos_y = list_pos_y[i] * scale
         text = text_colors[i]
 
         # Draw textbox
-        draw.rounded_rectangle(((pos_x, pos_y), (pos_x + length_rect, pos_y + width_rect)), fill=fill, outline=outline,
-                               width=outline_width, radius=radius)
-        draw.text((pos_x + length_rect / 2, pos_y + width_rect / 2), texts[i], fill=text, font=font, anchor='mm')
+        draw.rounded_rectangle(((pos_x, pos_y), (pos_x + length_rect * scale, pos_y + width_rect * scale)), fill=fill,
+                               outline=outline, width=round(outline_width * scale), radius=round(radius * scale))
+        draw.text((pos_x + length_rect * scale / 2, pos_y + width_rect * scale / 2), texts[i], fill=text, font=font,
+                  anchor='mm')
 
     # Save image
     # img.save('./assets/kwh_diagram.png')
 
-    return "data:image/png;base64, " + pil_to_b64(img)
+    if enc_format == 'jpeg':
+        # The template is opaque
+        img = img.convert('RGB')
+        return "data:image/jpeg;base64," + pil_to_b64(img, enc_format, quality=90)
+    if enc_format == 'webp':
+        return "data:image/webp;base64," + pil_to_b64(img, enc_format, quality=90)
+    return "data:image/png;base64," + pil_to_b64(img, enc_format)
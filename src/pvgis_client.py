@@ -0,0 +1,196 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pvlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Base URL of the PVGIS API, can point to a local stub server for tests
+PVGIS_URL = os.environ.get('PRESIMULATOR_PVGIS_URL', 'https://re.jrc.ec.europa.eu/api/')
+PVGIS_TIMEOUT = float(os.environ.get('PRESIMULATOR_PVGIS_TIMEOUT', 30))  # s, per attempt
+PVGIS_RETRIES = int(os.environ.get('PRESIMULATOR_PVGIS_RETRIES', 3))
+PVGIS_BACKOFF = 0.5  # s, doubled at every retry
+# Maximum number of simultaneous requests of a process, PVGIS rate limits the clients
+PVGIS_MAX_CONCURRENCY = int(os.environ.get('PRESIMULATOR_PVGIS_MAX_CONCURRENCY', 4))
+
+_session = None
+_session_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(PVGIS_MAX_CONCURRENCY)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_metrics = {'requests': 0, 'errors': 0, 'retries': 0, 'coalesced': 0, 'bytes': 0, 'latency': 0.0,
+            'max_latency': 0.0}
+_metrics_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # In the processes forked by gunicorn or the job pool: the connections must not be shared, and the requests in
+    # flight in other threads of the parent never finish in the child, nor release their semaphore slots and locks
+    global _session, _session_lock, _semaphore, _in_flight, _in_flight_lock, _metrics_lock
+    _session = None
+    _session_lock = threading.Lock()
+    _semaphore = threading.BoundedSemaphore(PVGIS_MAX_CONCURRENCY)
+    _in_flight = {}
+    _in_flight_lock = threading.Lock()
+    _metrics_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_session():
+    """
+    Returns the session of the process, its connections are kept alive between requests
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=PVGIS_RETRIES, backoff_factor=PVGIS_BACKOFF,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=['GET'],
+                          respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PVGIS_MAX_CONCURRENCY, max_retries=retry)
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def _record(**values):
+    with _metrics_lock:
+        for name, value in values.items():
+            if name == 'latency':
+                _metrics['max_latency'] = max(_metrics['max_latency'], value)
+            _metrics[name] += value
+
+
+def statistics():
+    """
+    :return: number of requests, failed requests, retries and requests served by another in-flight request, bytes
+    received, mean and maximum latency (s) of the requests of the process
+    """
+    with _metrics_lock:
+        stats = dict(_metrics)
+    stats['mean_latency'] = stats.pop('latency') / stats['requests'] if stats['requests'] else 0.0
+    return stats
+
+
+def _fetch_tmy(latitude, longitude, outputformat):
+    params = {'lat': latitude, 'lon': longitude, 'outputformat': outputformat}
+    with _semaphore:
+        time_start = time.perf_counter()
+        try:
+            res = get_session().get(PVGIS_URL + 'tmy', params=params, timeout=PVGIS_TIMEOUT)
+        except requests.RequestException:
+            _record(requests=1, errors=1, latency=time.perf_counter() - time_start)
+            raise
+        retries = res.raw.retries.history if getattr(res.raw, 'retries', None) is not None else ()
+        _record(requests=1, retries=len(retries), bytes=len(res.content), latency=time.perf_counter() - time_start)
+
+    # Same errors as pvlib.iotools.get_pvgis_tmy, PVGIS explains a bad request (e.g. a location over the sea) in JSON
+    if not res.ok:
+        _record(errors=1)
+        try:
+            message = res.json()['message']
+        except Exception:
+            res.raise_for_status()
+        raise requests.HTTPError(message, response=res)
+
+    with io.StringIO(res.content.decode('utf-8')) as buffer:
+        return pvlib.iotools.read_pvgis_tmy(buffer, pvgis_format=outputformat, map_variables=True)[0]
+
+
+def get_tmy(latitude, longitude, outputformat='json'):
+    """
+    Downloads the PVGIS typical meteorological year of a location, simultaneous requests of the same location share
+    the same download
+    :param outputformat: 'json' or 'epw'
+    :return: hourly weather DataFrame with pvlib variable names, shared with the other requests so it must not be
+    modified
+    """
+    key = (latitude, longitude, outputformat)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _in_flight[key] = future
+    if not owner:
+        _record(coalesced=1)
+        return future.result()
+
+    try:
+        data = _fetch_tmy(latitude, longitude, outputformat)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(data)
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+    return data
+
+
+if __name__ == '__main__':
+    # Check of the retries and of the coalescing against a local stub of PVGIS: python pvgis_client.py
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    import pandas as pd
+
+    tmy = pd.read_csv('template_tmy_load.csv', header=None, skiprows=3)
+    times = pd.date_range('2019-01-01', periods=len(tmy), freq='h')
+    body = json.dumps({
+        'inputs': {'location': {'latitude': 45.977, 'longitude': 7.65, 'elevation': 1600}},
+        'outputs': {
+            'months_selected': [{'month': m, 'year': 2019} for m in range(1, 13)],
+            'tmy_hourly': [{'time(UTC)': t.strftime('%Y%m%d:%H%M'), 'T2m': row[9], 'RH': 50.0, 'G(h)': row[7],
+                            'Gb(n)': row[5], 'Gd(h)': row[6], 'IR(h)': 300.0, 'WS10m': row[12], 'WD10m': row[11],
+                            'SP': row[10] * 100} for t, row in zip(times, tmy.to_numpy(dtype=float))]},
+        'meta': {}}).encode()
+    stub_requests = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stub_requests.append(self.path)
+            time.sleep(0.2)
+            if len(stub_requests) == 1:
+                self.send_response(503)
+                self.end_headers()
+            elif 'lat=0' in self.path:
+                self.send_response(400)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(json.dumps({'message': 'Location over the sea'}).encode())
+            else:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    PVGIS_URL = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: get_tmy(45.977, 7.65), range(8)))
+    print('8 simultaneous requests: {} HTTP requests (first one answered 503), identical results: {}'.format(
+        len(stub_requests), all(result is results[0] for result in results)))
+    print('GHI: {:.0f} kWh/m2'.format(results[0]['ghi'].sum() / 1000),
+          'columns:', ', '.join(results[0].columns))
+    try:
+        get_tmy(0, 0)
+    except requests.HTTPError as e:
+        print('Location over the sea:', e)
+    print(statistics())
+    server.shutdown()
@@ -0,0 +1,45 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Number of entries kept by each cache of a worker process
+RESULT_CACHE_SIZE = int(os.environ.get('PRESIMULATOR_RESULT_CACHE_SIZE', 32))
+# Number of entries kept by each cache of hourly results of a worker process, up to about 1 MB per entry
+HOURLY_RESULT_CACHE_SIZE = int(os.environ.get('PRESIMULATOR_HOURLY_RESULT_CACHE_SIZE', 4))
+
+
+class LRUCache:
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
@@ -0,0 +1,97 @@
+import numpy as np
+
+from dispatch import dispatch_battery_totals
+from finance import compute_cash_flows
+from pre_simulator import UNIT_PV_CAPACITY, cost_estimator, get_load, get_unit_pv_output
+
+
+class SizingResults:
+    def __init__(self, pv_capacities, battery_capacities, cost, annual_import, annual_export, autonomy,
+                 bill_reduction, payback, net_value, pareto):
+        self.pv_capacities = pv_capacities
+        self.battery_capacities = battery_capacities
+        self.cost = cost
+        self.annual_import = annual_import
+        self.annual_export = annual_export
+        self.autonomy = autonomy
+        self.bill_reduction = bill_reduction
+        self.payback = payback
+        self.net_value = net_value
+        self.pareto = pareto
+
+    def pareto_front(self):
+        """
+        :return: list of (PV capacity, battery capacity, autonomy, payback) of the Pareto-optimal designs,
+        sorted by autonomy
+        """
+        idx_pv, idx_batt = np.nonzero(self.pareto)
+        front = [(self.pv_capacities[i], self.battery_capacities[j], self.autonomy[i, j], self.payback[i, j])
+                 for i, j in zip(idx_pv, idx_batt)]
+        return sorted(front, key=lambda design: design[2])
+
+
+def pareto_mask(autonomy, payback):
+    """
+    Designs for which no other design has both a higher (or equal) autonomy and a shorter (or equal) payback, sorted
+    by autonomy then swept in O(N log N) so that large grids can be compared
+    :param payback: payback years, NaN for the designs without payback
+    :return: boolean array of the shape of autonomy, True for the Pareto-optimal designs
+    """
+    shape = np.shape(autonomy)
+    autonomy = np.ravel(autonomy)
+    payback = np.where(np.isnan(payback), np.inf, payback).ravel()
+
+    # Decreasing autonomy, then increasing payback, the first design of each autonomy has its shortest payback
+    order = np.lexsort((payback, -autonomy))
+    autonomy = autonomy[order]
+    payback = payback[order]
+    first = np.maximum.accumulate(np.where(np.r_[True, autonomy[1:] != autonomy[:-1]], np.arange(len(order)), 0))
+    # Shortest payback of the designs with a higher autonomy
+    shortest_higher = np.r_[np.inf, np.minimum.accumulate(payback)][first]
+    dominated = ((first > 0) & (shortest_higher <= payback)) | (payback[first] < payback)
+
+    mask = np.empty(len(order), dtype=bool)
+    mask[order] = ~dominated
+    return mask.reshape(shape)
+
+
+def size_system(latitude, longitude, tilt, orientation, load_parameters, pv_capacities, battery_capacities,
+                discharge_cutoff, buy_rate, sell_rate, rate_escalation=0.0, years=25):
+    """
+    Simulates every combination of a grid of PV and battery capacities with one weather and load computation
+    :param pv_capacities: PV capacities to test (kWp)
+    :param battery_capacities: battery capacities to test (kWh), 0 for a system without battery
+    :param buy_rate: electricity import price (€/kWh)
+    :param sell_rate: electricity export price (€/kWh)
+    :param rate_escalation: yearly escalation of the import price used for the payback
+    :param years: period of the payback analysis
+    :return: SizingResults with one value per (PV capacity, battery capacity) cell
+    """
+    pv_capacities = np.asarray(pv_capacities, dtype=float)
+    battery_capacities = np.asarray(battery_capacities, dtype=float)
+
+    pv_output = get_unit_pv_output(latitude, longitude, tilt, orientation)
+    dc_output = pv_output['DCOutput'].to_numpy(dtype=float) / UNIT_PV_CAPACITY
+    load = np.asarray(get_load(latitude, longitude, load_parameters), dtype=float)
+
+    pv_grid, battery_grid = np.meshgrid(pv_capacities, battery_capacities, indexing='ij')
+    net_power = (pv_grid.ravel() * 1000)[:, np.newaxis] * dc_output[np.newaxis, :] - load[np.newaxis, :]
+    battery_capacity_real = battery_grid.ravel() * 1000 * (100 - discharge_cutoff) / 100
+
+    grid_import, grid_export, _, _ = dispatch_battery_totals(net_power, battery_capacity_real)
+
+    annual_load = load.sum() / 1000
+    annual_import = (grid_import / 1000).reshape(pv_grid.shape)
+    annual_export = (grid_export / 1000).reshape(pv_grid.shape)
+    annual_elec_bill_wo_sys = annual_load * buy_rate
+    annual_elec_bill_w_sys = np.abs(annual_import) * buy_rate - annual_export * sell_rate
+
+    autonomy = 100 * (annual_load + annual_import) / annual_load
+    bill_reduction = 100 * (annual_elec_bill_wo_sys - annual_elec_bill_w_sys) / annual_elec_bill_wo_sys
+    cost = np.array([[cost_estimator(pv, battery) for battery in battery_capacities] for pv in pv_capacities])
+    cash_flows = compute_cash_flows(cost, annual_load, annual_import, annual_export, buy_rate, sell_rate,
+                                    rate_escalation, years)
+    pareto = pareto_mask(autonomy, cash_flows.payback).reshape(pv_grid.shape)
+
+    return SizingResults(pv_capacities, battery_capacities, cost, annual_import, annual_export, autonomy,
+                         bill_reduction, cash_flows.payback, cash_flows.net_value, pareto)
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import requests
+
+# Directory of the archive built by "python weather_archive.py", locations outside of it are fetched from PVGIS
+ARCHIVE_DIR = os.environ.get('PRESIMULATOR_WEATHER_ARCHIVE',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_archive'))
+# 'nearest' or 'bilinear', bilinear blends the hourly irradiance of cells whose TMY months come from different years,
+# which smooths the passing clouds and so overestimates the self-consumption of a battery
+ARCHIVE_METHOD = os.environ.get('PRESIMULATOR_WEATHER_ARCHIVE_METHOD', 'nearest')
+ARCHIVE_COLUMNS = ['temp_air', 'relative_humidity', 'ghi', 'dni', 'dhi', 'wind_speed', 'wind_direction', 'pressure']
+# Interpolating angles would give wrong directions, these columns are taken from the nearest cell
+NEAREST_COLUMNS = ['wind_direction']
+HOURS = 8760
+
+
+class WeatherArchive:
+    """
+    TMY of every cell of a regular latitude/longitude grid
+    The files are memory-mapped, a lookup only reads the cells it uses
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'index.json')) as file:
+            index = json.load(file)
+        self.latitudes = np.array(index['latitudes'])
+        self.longitudes = np.array(index['longitudes'])
+        self.columns = index['columns']
+        self.valid = np.array(index['valid'], dtype=bool)
+        # One contiguous chunk per cell: (latitude, longitude, hour, column)
+        self.data = np.load(os.path.join(path, 'data.npy'), mmap_mode='r')
+        # The months of a TMY come from different years depending on the location
+        self.times = np.load(os.path.join(path, 'times.npy'), mmap_mode='r')
+
+    def _position(self, values, value):
+        # Fractional position of value on a regular axis
+        if len(values) == 1:
+            return 0.0
+        return (value - values[0]) / (values[1] - values[0])
+
+    def _cell_frame(self, i, j, values):
+        index = pd.to_datetime(np.asarray(self.times[i, j]), utc=True)
+        return pd.DataFrame(values, index=index, columns=self.columns)
+
+    def lookup(self, latitude, longitude, method=ARCHIVE_METHOD):
+        """
+        :return: hourly weather DataFrame of the location with pvlib variable names, None if the location is not
+        covered by the archive
+        """
+        y = self._position(self.latitudes, latitude)
+        x = self._position(self.longitudes, longitude)
+        # Locations up to half a cell outside of the grid are covered by its border cells
+        if not (-0.5 <= y <= len(self.latitudes) - 0.5 and -0.5 <= x <= len(self.longitudes) - 0.5):
+            return None
+
+        i = int(np.clip(np.round(y), 0, len(self.latitudes) - 1))
+        j = int(np.clip(np.round(x), 0, len(self.longitudes) - 1))
+        if method == 'nearest':
+            if not self.valid[i, j]:
+                return None
+            return self._cell_frame(i, j, np.array(self.data[i, j]))
+
+        i0 = int(np.clip(np.floor(y), 0, max(len(self.latitudes) - 2, 0)))
+        j0 = int(np.clip(np.floor(x), 0, max(len(self.longitudes) - 2, 0)))
+        i1 = min(i0 + 1, len(self.latitudes) - 1)
+        j1 = min(j0 + 1, len(self.longitudes) - 1)
+        if not self.valid[[i0, i0, i1, i1], [j0, j1, j0, j1]].all():
+            # Next to the sea or to a missing cell, the nearest cell is the best estimate
+            return self.lookup(latitude, longitude, method='nearest')
+
+        wy = np.clip(y - i0, 0, 1)
+        wx = np.clip(x - j0, 0, 1)
+        values = ((1 - wy) * ((1 - wx) * self.data[i0, j0] + wx * self.data[i0, j1])
+                  + wy * ((1 - wx) * self.data[i1, j0] + wx * self.data[i1, j1]))
+        for column in NEAREST_COLUMNS:
+            k = self.columns.index(column)
+            values[:, k] = self.data[i, j, :, k]
+
+        return self._cell_frame(i, j, values)
+
+
+@lru_cache(maxsize=None)
+def open_archive(path=ARCHIVE_DIR):
+    # Opened once per process, None when no archive was built
+    if not os.path.exists(os.path.join(path, 'index.json')):
+        return None
+    return WeatherArchive(path)
+
+
+def get_archived_tmy(latitude, longitude):
+    """
+    :return: hourly weather DataFrame of the location from the local archive, None if it is not covered
+    """
+    archive = open_archive()
+    if archive is None:
+        return None
+    return archive.lookup(latitude, longitude)
+
+
+def write_archive(path, latitudes, longitudes, fetch, workers=4):
+    """
+    Builds an archive cell by cell
+    :param latitudes: latitudes of the grid, regularly spaced and increasing
+    :param longitudes: longitudes of the grid, regularly spaced and increasing
+    :param fetch: function returning the TMY DataFrame of a location, raising requests.HTTPError with a 400 response
+    for a location without data, any other error stops the build
+    :param workers: number of simultaneous fetches
+    :return: number of cells with data
+    """
+    os.makedirs(path, exist_ok=True)
+    latitudes = [float(latitude) for latitude in latitudes]
+    longitudes = [float(longitude) for longitude in longitudes]
+    shape = (len(latitudes), len(longitudes))
+    data = np.lib.format.open_memmap(os.path.join(path, 'data.npy'), mode='w+', dtype=np.float32,
+                                     shape=shape + (HOURS, len(ARCHIVE_COLUMNS)))
+    times = np.lib.format.open_memmap(os.path.join(path, 'times.npy'), mode='w+', dtype=np.int64,
+                                      shape=shape + (HOURS,))
+    valid = np.zeros(shape, dtype=bool)
+
+    def fetch_cell(cell):
+        i, j = cell
+        try:
+            tmy = fetch(latitudes[i], longitudes[j])
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 400:
+                # PVGIS failed after the retries of the fetch, the build stops rather than record a valid cell as sea
+                raise
+            # No data, e.g. over the sea
+            return
+        data[i, j] = tmy[ARCHIVE_COLUMNS].to_numpy(dtype=np.float32)
+        times[i, j] = tmy.index.tz_convert('UTC').asi8
+        valid[i, j] = True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch_cell, np.ndindex(*shape)))
+
+    data.flush()
+    times.flush()
+    # Written last, an interrupted build is not used
+    with open(os.path.join(path, 'index.json'), 'w') as file:
+        json.dump({'latitudes': latitudes, 'longitudes': longitudes, 'columns': ARCHIVE_COLUMNS,
+                   'valid': valid.tolist()}, file)
+
+    return int(valid.sum())
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Downloads the PVGIS TMY of a grid of locations for offline use.')
+    parser.add_argument('lat_min', type=float)
+    parser.add_argument('lat_max', type=float)
+    parser.add_argument('lon_min', type=float)
+    parser.add_argument('lon_max', type=float)
+    parser.add_argument('--step', type=float, default=0.25, help='grid spacing (degrees)')
+    parser.add_argument('--output', default=ARCHIVE_DIR, help='archive directory, overwritten')
+    parser.add_argument('--workers', type=int, default=4, help='simultaneous PVGIS requests')
+    args = parser.parse_args(args)
+
+    from pvgis_client import get_tmy
+
+    latitudes = np.round(np.arange(args.lat_min, args.lat_max + args.step / 2, args.step), 6)
+    longitudes = np.round(np.arange(args.lon_min, args.lon_max + args.step / 2, args.step), 6)
+    if os.path.exists(os.path.join(args.output, 'index.json')):
+        os.remove(os.path.join(args.output, 'index.json'))
+    count = write_archive(args.output, latitudes, longitudes, get_tmy, workers=args.workers)
+    print('{} of {} cells with data written to {}'.format(count, len(latitudes) * len(longitudes), args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import uuid
+import zipfile
+from datetime import timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from pvgis_client import get_tmy
+from weather_archive import get_archived_tmy
+
+# Directory shared by every gunicorn worker, the cache works across processes since entries are written atomically
+CACHE_DIR = os.environ.get('PRESIMULATOR_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'weather'))
+CACHE_MAX_BYTES = int(os.environ.get('PRESIMULATOR_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# 3 decimals is about 100 m, well below the resolution of the PVGIS radiation databases
+COORDINATE_DECIMALS = 3
+
+
+def round_coordinates(latitude, longitude):
+    return round(float(latitude), COORDINATE_DECIMALS), round(float(longitude), COORDINATE_DECIMALS)
+
+
+def cache_key(latitude, longitude, outputformat):
+    latitude, longitude = round_coordinates(latitude, longitude)
+    name = '{:.{d}f},{:.{d}f},{}'.format(latitude, longitude, outputformat, d=COORDINATE_DECIMALS)
+    return hashlib.sha256(name.encode()).hexdigest()[:32]
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, key + '.npz')
+
+
+def _write_entry(path, data):
+    utc_offset = data.index[0].utcoffset()
+    arrays = {'columns': np.array(data.columns, dtype=str),
+              'index': data.index.asi8,
+              'utc_offset': np.int64(utc_offset.total_seconds() // 60 if utc_offset is not None else 0)}
+    for i, column in enumerate(data.columns):
+        arrays['column_{}'.format(i)] = data[column].to_numpy()
+
+    # Write to a unique temporary file then rename it, so that concurrent workers never read a partial entry
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    with open(tmp_path, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _read_entry(path):
+    with np.load(path, allow_pickle=False) as entry:
+        columns = list(entry['columns'])
+        utc_offset = timezone(timedelta(minutes=int(entry['utc_offset'])))
+        index = pd.to_datetime(entry['index'], utc=True).tz_convert(utc_offset)
+        data = pd.DataFrame({column: entry['column_{}'.format(i)] for i, column in enumerate(columns)}, index=index)
+
+    # Refresh the access time used by the LRU eviction
+    os.utime(path)
+    return data
+
+
+def _evict():
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith('.npz'):
+            continue
+        try:
+            stat = os.stat(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+
+    total_size = sum(entry[1] for entry in entries)
+    for _, size, name in sorted(entries):
+        if total_size <= CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            # Already evicted by another worker
+            pass
+        total_size -= size
+
+
+@timed('weather_fetch')
+def get_pvgis_tmy(latitude, longitude, outputformat='json'):
+    """
+    Returns the PVGIS typical meteorological year of a location, from the disk cache or the local weather archive
+    when available
+    :param latitude: latitude of the location, rounded to COORDINATE_DECIMALS
+    :param longitude: longitude of the location, rounded to COORDINATE_DECIMALS
+    :param outputformat: PVGIS output format, 'json' or 'epw'
+    :return: hourly weather DataFrame with pvlib variable names
+    """
+    path = _cache_path(cache_key(latitude, longitude, outputformat))
+    try:
+        return _read_entry(path)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        # Missing or corrupted entry
+        pass
+
+    latitude, longitude = round_coordinates(latitude, longitude)
+    if outputformat == 'json':
+        # Locations covered by the local archive do not need the network, nor a cache entry
+        data = get_archived_tmy(latitude, longitude)
+        if data is not None:
+            return data
+
+    data = get_tmy(latitude, longitude, outputformat=outputformat)
+    # Text columns of the EPW format are not used and are not stored
+    data = data.select_dtypes(include='number')
+    _write_entry(path, data)
+    _evict()
+
+    return data
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(autouse=True)
+def src_directory(monkeypatch):
+    # The modules read their data files relative to src, as when the app runs
+    monkeypatch.chdir(SRC_DIR)
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import batch
+from batch import ANNUAL_COLUMNS, DEFAULT_MONTHLY_UTIL, SITE_DEFAULTS, _group_sites, _simulate_group, read_sites
+
+SITES_CSV = '''site_id,latitude,longitude,pv_capacity,battery_capacity
+a,46.2,6.1,5,
+b,46.2001,6.1001,10,0
+c,47.3,8.5,,
+d,95.0,8.5,5,8
+'''
+
+
+@pytest.fixture
+def sites(tmp_path):
+    path = tmp_path / 'sites.csv'
+    path.write_text(SITES_CSV)
+    return read_sites(str(path))
+
+
+def fake_compute_monthly_output(latitude, longitude, pv_capacity, battery_capacity, *args):
+    if abs(latitude) > 90:
+        raise ValueError('Latitude out of range')
+    # Load of 5 times the PV production, half of it imported, and a quarter of the PV exported
+    return SimpleNamespace(**dict(dict.fromkeys(ANNUAL_COLUMNS, 1.0), annual_pv_production=pv_capacity,
+                                  annual_load=pv_capacity * 5, annual_import=-pv_capacity * 2.5,
+                                  annual_elec_bill_wo_sys=100.0, annual_elec_bill_w_sys=40.0,
+                                  annual_export=pv_capacity / 4))
+
+
+def test_missing_inputs_are_filled(sites):
+    assert list(sites['site_id']) == ['a', 'b', 'c', 'd']
+    assert list(sites['pv_capacity']) == [5, 10, SITE_DEFAULTS['pv_capacity'], 5]
+    assert list(sites['battery_capacity']) == [SITE_DEFAULTS['battery_capacity'], 0,
+                                               SITE_DEFAULTS['battery_capacity'], 8]
+    assert (sites['tilt'] == SITE_DEFAULTS['tilt']).all()
+    assert list(sites.loc[0, batch.MONTHLY_UTIL_COLUMNS]) == DEFAULT_MONTHLY_UTIL
+
+
+def test_missing_coordinates(tmp_path):
+    path = tmp_path / 'sites.csv'
+    path.write_text('latitude,pv_capacity\n46.2,5\n')
+    with pytest.raises(ValueError, match='longitude'):
+        read_sites(str(path))
+
+
+def test_sites_grouped_by_location(sites):
+    groups = [[site['site_id'] for site in group] for group in _group_sites(sites, chunk_size=50)]
+    # a and b are within the rounding of the weather cache
+    assert groups == [['a', 'b'], ['c'], ['d']]
+    assert [[site['site_id'] for site in group] for group in _group_sites(sites, chunk_size=1)] == [
+        ['a'], ['b'], ['c'], ['d']]
+
+
+def test_failing_site_is_an_error_row(sites, monkeypatch):
+    monkeypatch.setattr(batch, 'compute_monthly_output', fake_compute_monthly_output)
+    results = _simulate_group(sites.to_dict('records'))
+
+    assert [result['site_id'] for result in results] == ['a', 'b', 'c', 'd']
+    assert [result['error'] for result in results[:3]] == ['', '', '']
+    assert 'Latitude out of range' in results[3]['error']
+    assert not set(ANNUAL_COLUMNS) & set(results[3])
+
+    # The capacities are converted from kW(h) to W(h) and the percentages derived from the annual output
+    assert results[1]['annual_pv_production'] == 10000
+    assert (results[1]['autonomy'], results[1]['electric_bill_reduction'],
+            results[1]['electric_energy_export']) == (50, 60, 25)
+    np.testing.assert_array_equal([result['pv_capacity'] for result in results], sites['pv_capacity'])
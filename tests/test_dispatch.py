@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dispatch
+from dispatch import _reference_dispatch, dispatch_battery, dispatch_battery_totals
+
+COLUMNS = ['BatteryCapacity', 'ToFromBattery', 'Import', 'Export']
+# Usable capacities (Wh): a battery full every day and one never full
+CAPACITIES = [7200, 100000]
+KERNELS = [False, pytest.param(True, marks=pytest.mark.skipif(dispatch._compiled_kernel is None,
+                                                              reason='numba is not installed'))]
+
+
+@pytest.fixture(scope='module')
+def net_power():
+    # 5 kWp of PV against a 500 W base load with a 1.5 kW evening peak, on the bundled TMY year
+    tmy = pd.read_csv(os.path.join(os.path.dirname(dispatch.__file__), 'template_tmy_load.csv'), header=None,
+                      skiprows=3)
+    hours = tmy[3].to_numpy(dtype=float)
+    load = 500 + 1000 * ((hours >= 18) & (hours <= 21))
+    return 5 * tmy[7].to_numpy(dtype=float) * 0.85 - load
+
+
+@pytest.fixture(scope='module')
+def references(net_power):
+    return {capacity: _reference_dispatch(pd.DataFrame({'NetPower': net_power, 'ToFromBattery': 0.0,
+                                                        'BatteryCapacity': 0.0, 'Import': 0.0, 'Export': 0.0}),
+                                          capacity) for capacity in CAPACITIES}
+
+
+@pytest.mark.parametrize('capacity', CAPACITIES)
+@pytest.mark.parametrize('compiled', KERNELS)
+def test_kernel_is_bit_identical_to_reference(net_power, references, capacity, compiled):
+    outputs = dispatch_battery(net_power, capacity, compiled=compiled)
+    for column, output in zip(COLUMNS, outputs):
+        np.testing.assert_array_equal(output, references[capacity][column].to_numpy(dtype=float), err_msg=column)
+
+
+@pytest.mark.parametrize('compiled', KERNELS)
+def test_totals_match_hourly_dispatch(net_power, compiled):
+    totals = dispatch_battery_totals(np.tile(net_power, (len(CAPACITIES), 1)), CAPACITIES, compiled=compiled)
+    for k, capacity in enumerate(CAPACITIES):
+        _, to_from_battery, grid_import, grid_export = dispatch_battery(net_power, capacity)
+        np.testing.assert_allclose([total[k] for total in totals],
+                                   [grid_import.sum(), grid_export.sum(), to_from_battery[to_from_battery > 0].sum(),
+                                    to_from_battery[to_from_battery < 0].sum()], rtol=1e-9)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from finance import compute_cash_flows
+
+# 1000 € of savings per year: 10000 kWh of load, no import nor export, at 0.1 €/kWh
+SAVINGS = dict(annual_load=10000, annual_import=0, annual_export=0, buy_rate=0.1, sell_rate=0.1)
+
+
+def test_payback_after_cost_is_offset():
+    results = compute_cash_flows(4500, years=10, **SAVINGS)
+    # -4500 € at year 0, -500 € at year 4, +500 € at year 5
+    assert results.payback == 5
+    assert results.net_value == 5500
+
+
+def test_payback_after_battery_replacement():
+    # The replacement at year 6 makes the cumulated cash flow negative again until year 9
+    results = compute_cash_flows(4500, years=12, battery_cost=3500, battery_replacement_years=[6], **SAVINGS)
+    np.testing.assert_allclose(results.cumulated_cash_flow[4:10], [-500, 500, -2000, -1000, 0, 1000])
+    assert results.payback == 9
+
+
+def test_no_payback_when_never_offset():
+    results = compute_cash_flows(20000, years=10, **SAVINGS)
+    assert results.net_value < 0
+    assert np.isnan(results.payback)
+
+
+def test_no_payback_when_replacement_at_the_end():
+    # Positive from year 5, negative again after the replacement of the last year
+    results = compute_cash_flows(4500, years=10, battery_cost=6000, battery_replacement_years=[10], **SAVINGS)
+    assert results.cumulated_cash_flow[5] > 0
+    assert np.isnan(results.payback)
+
+
+def test_payback_of_scenarios():
+    results = compute_cash_flows([4500, 4500, 20000], years=12, battery_cost=[0, 3500, 0],
+                                 battery_replacement_years=[6], **SAVINGS)
+    np.testing.assert_array_equal(results.payback, [5, 9, np.nan])
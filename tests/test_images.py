@@ -0,0 +1,15 @@
+import pre_simulator as ps
+
+
+def test_kwh_diagram_rounds_values():
+    ps._create_kwh_diagram.cache_clear()
+    assert ps.create_kwh_diagram(11072.6, -5912.4, 4285.5, 2543.7, 12699.5, width=400) == ps.create_kwh_diagram(
+        11073, -5912, 4286, 2544, 12700, width=400)
+    assert ps._create_kwh_diagram.cache_info().hits == 1
+    assert ps.create_kwh_diagram(11072.4, -5912, 4286, 2544, 12700, width=400) != ps.create_kwh_diagram(
+        11073, -5912, 4286, 2544, 12700, width=400)
+
+
+def test_percent_images_round_values():
+    assert ps.create_fig_percent(99.6, 20.4, 35.5) == ps.create_fig_percent(100, 20, 36)
+    assert ps.create_fig_percent(99.4, 20, 36) != ps.create_fig_percent(100, 20, 36)
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+from instrumentation import SPAN_BUCKETS, collect, flush, format_metrics, span
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(instrumentation, '_spans', {})
+    # No periodic flush thread outliving the test
+    monkeypatch.setattr(instrumentation, '_flusher_pid', os.getpid())
+    return tmp_path
+
+
+def write_spans(directory, name, count, total, bucket):
+    buckets = [0] * bucket + [count] * (len(SPAN_BUCKETS) - bucket)
+    (directory / name).write_text(json.dumps({'load': {'count': count, 'sum': total, 'buckets': buckets}}))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_format_metrics():
+    buckets = [0, 0, 1] + [2] * (len(SPAN_BUCKETS) - 3)
+    lines = format_metrics({'pv': {'count': 3, 'sum': 12.5, 'buckets': buckets}}).splitlines()
+
+    assert lines[:2] == ['# HELP presimulator_span_seconds Duration of the stages of the simulation pipeline',
+                         '# TYPE presimulator_span_seconds histogram']
+    assert lines[2:5] == ['presimulator_span_seconds_bucket{span="pv",le="0.005"} 0',
+                          'presimulator_span_seconds_bucket{span="pv",le="0.01"} 0',
+                          'presimulator_span_seconds_bucket{span="pv",le="0.025"} 1']
+    assert lines[-3:] == ['presimulator_span_seconds_bucket{span="pv",le="+Inf"} 3',
+                          'presimulator_span_seconds_sum{span="pv"} 12.5',
+                          'presimulator_span_seconds_count{span="pv"} 3']
+    assert len(lines) == 2 + len(SPAN_BUCKETS) + 3
+
+
+def test_spans_are_flushed_and_collected(metrics_dir):
+    with span('outer'):
+        with span('inner'):
+            pass
+    with pytest.raises(ValueError):
+        with span('inner'):
+            raise ValueError
+    flush()
+
+    spans = collect()
+    assert spans.keys() == {'outer', 'inner'}
+    assert spans['inner']['count'] == 2
+    assert spans['inner']['buckets'][-1] == 2
+
+
+def test_collect_sums_running_processes_and_prunes_dead_ones(metrics_dir):
+    write_spans(metrics_dir, '{}-a.json'.format(os.getpid()), 2, 1.0, 3)
+    write_spans(metrics_dir, 'other-b.json', 1, 0.5, 0)
+    write_spans(metrics_dir, '{}-c.json'.format(dead_pid()), 5, 10.0, 0)
+    (metrics_dir / '{}-d.json'.format(os.getpid())).write_text('{"truncated')
+
+    spans = collect()
+
+    assert spans['load']['count'] == 3
+    assert spans['load']['sum'] == 1.5
+    assert spans['load']['buckets'][:4] == [1, 1, 1, 3]
+    assert sorted(os.listdir(metrics_dir)) == sorted(['{}-a.json'.format(os.getpid()), 'other-b.json',
+                                                      '{}-d.json'.format(os.getpid())])
+
+
+def test_collect_without_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'METRICS_DIR', str(tmp_path / 'missing'))
+    assert collect() == {}
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import jobs
+
+
+def add(a, b, progress):
+    progress('Adding...')
+    return a + b
+
+
+def wait_for(path, progress):
+    progress('Waiting...')
+    while not os.path.exists(path):
+        time.sleep(0.01)
+
+
+def fail(progress):
+    raise ValueError('Invalid input')
+
+
+def crash(progress):
+    os._exit(1)
+
+
+def wait_until_finished(job_id, timeout=30):
+    time_start = time.time()
+    while jobs.get_status(job_id)['state'] not in (jobs.DONE, jobs.FAILED):
+        assert time.time() < time_start + timeout
+        time.sleep(0.01)
+    return jobs.get_status(job_id)
+
+
+@pytest.fixture
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOBS_DIR', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def pool(jobs_dir, monkeypatch):
+    # Forked job processes see the directory of the test, a forkserver would keep the one it started with
+    monkeypatch.setattr(jobs, 'multiprocessing',
+                        SimpleNamespace(get_context=lambda method: multiprocessing.get_context('fork')))
+    monkeypatch.setattr(jobs, 'JOB_WORKERS', 1)
+    monkeypatch.setattr(jobs, '_executor', None)
+    yield
+    if jobs._executor is not None:
+        jobs._executor.shutdown()
+
+
+def test_unfinished_job_fails_after_timeout(jobs_dir):
+    for job_id, submitted in [('a' * 32, time.time()), ('b' * 32, time.time() - jobs.JOB_TIMEOUT - 1)]:
+        jobs._write_status({'id': job_id, 'state': jobs.RUNNING, 'stage': 'Building graphs...', 'stages': [],
+                            'error': None, 'submitted': submitted, 'started': submitted, 'finished': None})
+
+    assert jobs.get_status('a' * 32)['state'] == jobs.RUNNING
+    status = jobs.get_status('b' * 32)
+    assert status['state'] == jobs.FAILED
+    assert status['error'] is not None
+    # Written for the other workers
+    assert jobs.get_status('b' * 32) == status
+
+
+def test_job_is_queued_then_running_then_done(pool, jobs_dir):
+    release = str(jobs_dir / 'release')
+    first = jobs.submit(wait_for, release)
+    while jobs.get_status(first)['state'] != jobs.RUNNING:
+        time.sleep(0.01)
+    # The single job process is busy
+    second = jobs.submit(add, 1, b=2)
+    assert jobs.get_status(first)['stage'] == 'Waiting...'
+    assert jobs.get_status(second)['state'] == jobs.QUEUED
+    assert jobs.get_result(second) is None
+
+    open(release, 'w').close()
+    status = wait_until_finished(second)
+    assert status['state'] == jobs.DONE
+    assert [stage['name'] for stage in status['stages']] == ['Adding...']
+    assert status['submitted'] <= status['started'] <= status['finished']
+    assert jobs.get_result(second) == 3
+    assert wait_until_finished(first)['state'] == jobs.DONE
+
+
+def test_failing_job(pool):
+    status = wait_until_finished(jobs.submit(fail))
+    assert status['state'] == jobs.FAILED
+    assert 'ValueError: Invalid input' in status['error']
+    assert jobs.get_result(status['id']) is None
+
+
+def test_broken_pool_is_replaced(pool):
+    status = wait_until_finished(jobs.submit(crash))
+    assert status['state'] == jobs.FAILED
+    assert 'BrokenProcessPool' in status['error']
+    # The next job starts a new pool
+    assert jobs._executor is None
+    assert jobs.get_result(wait_until_finished(jobs.submit(add, 1, 2))['id']) == 3
+
+
+def test_submit_to_broken_pool_is_retried(pool):
+    broken = jobs._get_executor()
+    assert wait_until_finished(jobs.submit(crash))['state'] == jobs.FAILED
+    # A job submitted by another thread before the pool was reset
+    jobs._executor = broken
+    job_id = jobs.submit(add, 1, 2)
+    assert jobs._executor is not broken
+    assert jobs.get_result(wait_until_finished(job_id)['id']) == 3
+
+
+def test_unknown_job(jobs_dir):
+    assert jobs.get_status('../../etc/passwd') is None
+    assert jobs.get_status('c' * 32) is None
+    assert jobs.get_result('c' * 32) is None
@@ -0,0 +1,95 @@
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+import pre_simulator as ps
+from pre_simulator import APPLIANCES, BELPE_MONTHS, HVAC, LoadParameters
+
+# Weather file read by BELPE, bundled with the app
+TMY_FILE = os.path.join(os.path.dirname(ps.__file__), 'template_tmy_load.csv')
+# Relative L1 error of the hourly loads, the components are exact up to the precision of the BELPE outputs
+TOLERANCE = 1e-6
+BUILDING = LoadParameters(monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],
+                          occ_schedule=[1.0] * 24, occupants=4, retrofitted=0, floors=2, t_cool=24, t_heat=20,
+                          t_sched=[1.0] * 24, year_built=2000, floor_area=200,
+                          **dict.fromkeys(APPLIANCES + HVAC, 1.0))
+NO_HVAC = dict.fromkeys(HVAC, 0.0)
+EQUIPMENT = ([('appliances only', NO_HVAC), ('nothing', dict.fromkeys(APPLIANCES + HVAC, 0.0))] +
+             [(appliance + ' off', dict(NO_HVAC, **{appliance: 0.0})) for appliance in APPLIANCES] +
+             [(appliance + ' only', dict(dict.fromkeys(APPLIANCES + HVAC, 0.0), **{appliance: 1.0}))
+              for appliance in APPLIANCES])
+LOCATION = (45.977, 7.65)
+
+
+@pytest.fixture(scope='module')
+def components():
+    return ps.compute_load_components(TMY_FILE, BUILDING)
+
+
+@pytest.mark.parametrize('changes', [changes for _, changes in EQUIPMENT], ids=[name for name, _ in EQUIPMENT])
+def test_components_match_belpe(components, changes):
+    load_parameters = BUILDING.replace(**changes)
+    assert ps.is_combinable(load_parameters)
+
+    expected = np.array(ps.compute_belpe_load(TMY_FILE, load_parameters))
+    combined = np.array(ps.combine_load_components(components, load_parameters))
+    assert np.abs(combined - expected).sum() / expected.sum() < TOLERANCE
+    np.testing.assert_allclose(np.bincount(BELPE_MONTHS, combined, minlength=12),
+                               1000 * np.array(load_parameters.monthly_util), rtol=1e-9)
+
+
+def test_heating_and_cooling_are_simulated():
+    # BELPE's heating and cooling depend on the appliances, the components do not give them
+    assert not ps.is_combinable(BUILDING)
+    assert not ps.is_combinable(BUILDING.replace(en_dryer=0.0))
+    assert not ps.is_combinable(BUILDING.replace(en_cool=0.0))
+    assert not ps.is_combinable(BUILDING.replace(en_dryer=0.5, **NO_HVAC))
+
+
+@contextmanager
+def template_tmy_load_file(latitude, longitude):
+    yield TMY_FILE
+
+
+@pytest.fixture
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(ps, 'tmy_load_file', template_tmy_load_file)
+    for cache in [ps.load_cache, ps.load_component_cache, ps.load_component_requests]:
+        cache.clear()
+
+
+def test_components_computed_once_requested_enough(empty_caches, monkeypatch):
+    runs = []
+    compute_belpe_load = ps.compute_belpe_load
+    monkeypatch.setattr(ps, 'compute_belpe_load', lambda *args: runs.append(args) or compute_belpe_load(*args))
+
+    # A building with heating never counts, the first loads without are simulated directly
+    ps.get_load(*LOCATION, BUILDING)
+    for i, appliance in enumerate(APPLIANCES[:ps.LOAD_COMPONENT_REQUESTS - 1]):
+        ps.get_load(*LOCATION, BUILDING.replace(**dict(NO_HVAC, **{appliance: 0.0})))
+        assert len(runs) == 2 + i
+    assert ps.load_component_cache.stats()['size'] == 0
+
+    ps.get_load(*LOCATION, BUILDING.replace(**NO_HVAC))
+    # The base, each appliance and all the appliances
+    assert len(runs) == ps.LOAD_COMPONENT_REQUESTS + 1 + len(APPLIANCES) + 1
+    count = len(runs)
+    ps.get_load(*LOCATION, BUILDING.replace(en_stove=0.0, en_dryer=0.0, **NO_HVAC))
+    assert len(runs) == count
+
+
+def test_load_does_not_depend_on_history(empty_caches):
+    # Simulated directly or combined depending on the loads requested before, the loads agree within the tolerance
+    equipment = [BUILDING] + [BUILDING.replace(**dict(NO_HVAC, **{appliance: 0.0})) for appliance in APPLIANCES[:3]]
+    loads = []
+    for order in [equipment, equipment[::-1]]:
+        for cache in [ps.load_cache, ps.load_component_cache, ps.load_component_requests]:
+            cache.clear()
+        loads.append({load_parameters: np.array(ps.get_load(*LOCATION, load_parameters))
+                      for load_parameters in order})
+    assert (loads[0][BUILDING] == loads[1][BUILDING]).all()
+    for load_parameters in equipment:
+        assert np.abs(loads[0][load_parameters] - loads[1][load_parameters]).sum() / loads[0][
+            load_parameters].sum() < TOLERANCE
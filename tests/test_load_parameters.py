@@ -0,0 +1,67 @@
+import json
+import pickle
+
+import pytest
+
+from pre_simulator import LoadParameters
+
+PARAMETERS = dict(monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],
+                  occ_schedule=[1] * 24, occupants=4, retrofitted=0, floors=2, t_cool=24, t_heat=20,
+                  t_sched=[1] * 24, year_built=2000, floor_area=200, en_cool=1, en_dishwasher=1, en_dryer=1,
+                  en_fridge=1, en_heating=1, en_misc=1, en_stove=1, en_washing_machine=1)
+
+
+def test_equal_whatever_the_types():
+    parameters = LoadParameters(**PARAMETERS)
+    same = LoadParameters(**{name: tuple(float(item) for item in value) if isinstance(value, list) else float(value)
+                             for name, value in PARAMETERS.items()})
+    assert parameters == same
+    assert hash(parameters) == hash(same)
+    assert parameters.digest() == same.digest()
+    assert len({parameters, same}) == 1
+
+
+def test_different_parameters():
+    parameters = LoadParameters(**PARAMETERS)
+    other = parameters.replace(en_dryer=0)
+    assert parameters != other
+    assert parameters.digest() != other.digest()
+    assert parameters.building_key() == other.building_key()
+    assert parameters.building_key() != parameters.replace(occupants=3).building_key()
+    assert parameters != PARAMETERS
+
+
+def test_replace_returns_new_parameters():
+    parameters = LoadParameters(**PARAMETERS)
+    other = parameters.replace(t_heat=19, monthly_util=[1000] * 12)
+    assert parameters.t_heat == 20.0
+    assert other.t_heat == 19.0
+    assert other.monthly_util == (1000.0,) * 12
+    assert other.occ_schedule == parameters.occ_schedule
+    with pytest.raises(TypeError):
+        parameters.replace(unknown=1)
+
+
+def test_immutable():
+    parameters = LoadParameters(**PARAMETERS)
+    with pytest.raises(AttributeError):
+        parameters.t_heat = 19
+    with pytest.raises(AttributeError):
+        del parameters.t_heat
+    with pytest.raises(AttributeError):
+        parameters.other = 1
+
+
+def test_store_round_trip():
+    # dcc.Store keeps the parameters of the browser as JSON
+    parameters = LoadParameters(**PARAMETERS)
+    restored = LoadParameters(**json.loads(json.dumps(parameters.as_dict())))
+    assert restored == parameters
+    assert restored.digest() == parameters.digest()
+
+
+def test_pickle_round_trip():
+    parameters = LoadParameters(**PARAMETERS)
+    restored = pickle.loads(pickle.dumps(parameters))
+    assert restored == parameters
+    assert restored.key() == parameters.key()
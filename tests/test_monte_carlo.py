@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import monte_carlo
+from dispatch import dispatch_battery
+from finance import compute_cash_flows
+from monte_carlo import MonteCarloResults, simulate_uncertainty
+from pre_simulator import UNIT_PV_CAPACITY
+
+NO_SPREAD = dict(irradiance_spread=0.0, load_spread=0.0, rate_spread=0.0, escalation_range=(0.0, 0.0))
+
+
+@pytest.fixture
+def site(monkeypatch):
+    hours = np.arange(8760)
+    dc_output = UNIT_PV_CAPACITY * np.clip(np.sin((hours % 24 - 6) / 12 * np.pi), 0, None)
+    load = 400 + 1200 * ((hours % 24 >= 18) & (hours % 24 <= 21))
+    monkeypatch.setattr(monte_carlo, 'get_unit_pv_output', lambda *args: pd.DataFrame({'DCOutput': dc_output}))
+    monkeypatch.setattr(monte_carlo, 'get_load', lambda *args: tuple(load.astype(float)))
+    return dc_output / UNIT_PV_CAPACITY, load
+
+
+def test_no_spread_is_the_deterministic_simulation(site):
+    dc_output, load = site
+    results = simulate_uncertainty(46, 7, 5, 8, 10, 30, 180, None, 0.2, 0.1, cost=15000, samples=20, seed=0,
+                                   **NO_SPREAD)
+
+    _, _, grid_import, grid_export = dispatch_battery(5000 * dc_output - load, 8000 * 0.9)
+    annual_load = load.sum() / 1000
+    np.testing.assert_allclose(results.annual_import, grid_import.sum() / 1000)
+    np.testing.assert_allclose(results.annual_export, grid_export.sum() / 1000)
+    np.testing.assert_allclose(results.autonomy, 100 * (annual_load + grid_import.sum() / 1000) / annual_load)
+    cash_flows = compute_cash_flows(15000, annual_load, grid_import.sum() / 1000, grid_export.sum() / 1000, 0.2, 0.1)
+    np.testing.assert_allclose(results.net_value, cash_flows.net_value)
+    np.testing.assert_array_equal(results.payback, cash_flows.payback)
+
+    for band in results.bands().values():
+        np.testing.assert_allclose(band, band[0])
+
+
+def test_same_seed_same_samples(site):
+    first = simulate_uncertainty(46, 7, 5, 8, 10, 30, 180, None, 0.2, 0.1, samples=50, seed=1)
+    second = simulate_uncertainty(46, 7, 5, 8, 10, 30, 180, None, 0.2, 0.1, samples=50, seed=1)
+    np.testing.assert_array_equal(first.net_value, second.net_value)
+
+
+def test_bands_are_ordered(site):
+    bands = simulate_uncertainty(46, 7, 5, 8, 10, 30, 180, None, 0.2, 0.1, samples=500, seed=0).bands()
+    for name, band in bands.items():
+        assert band[0] <= band[1] <= band[2], name
+
+
+def test_samples_without_payback_are_the_longest():
+    payback = np.array([5.0, 6, 7, 8] + [np.nan] * 6)
+    values = np.arange(10.0)
+    results = MonteCarloResults(*[values] * 11, payback, values)
+    bands = results.bands()
+    assert bands['payback'][0] == pytest.approx(np.percentile(np.r_[payback[:4], [np.inf] * 6], 10))
+    assert np.isnan(bands['payback'][1]) and np.isnan(bands['payback'][2])
@@ -0,0 +1,47 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from pre_simulator import PROFILE_COLUMNS, OutputResults
+
+
+@pytest.fixture
+def output():
+    rng = np.random.default_rng(0)
+    profiles = rng.random((12, 24, len(PROFILE_COLUMNS)))
+    # Months without hours in the weather data have no average day
+    profiles[1, :, :] = np.nan
+    return OutputResults(rng.random(len(OutputResults.ANNUAL_FIELDS)) * 1000,
+                         rng.random((12, len(OutputResults.MONTHLY_FIELDS))) * 100, profiles, PROFILE_COLUMNS)
+
+
+def assert_same_results(actual, expected):
+    assert type(actual) is OutputResults
+    np.testing.assert_array_equal(actual.annual, expected.annual)
+    np.testing.assert_array_equal(actual.monthly, expected.monthly)
+    np.testing.assert_array_equal(actual.profiles, expected.profiles)
+    assert actual.profile_columns == expected.profile_columns
+
+
+def test_bytes_round_trip(output):
+    data = output.to_bytes()
+    assert isinstance(data, bytes)
+    assert_same_results(OutputResults.from_bytes(data), output)
+
+
+def test_pickle_round_trip(output):
+    data = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+    assert len(data) < len(output.to_bytes()) + 200
+    assert_same_results(pickle.loads(data), output)
+
+
+def test_fields(output):
+    assert output.annual_load == output.annual[OutputResults.ANNUAL_FIELDS.index('load')]
+    monthly_soc = output.monthly_soc
+    assert list(monthly_soc.index) == list(range(1, 13))
+    np.testing.assert_array_equal(monthly_soc, output.monthly[:, OutputResults.MONTHLY_FIELDS.index('soc')])
+    np.testing.assert_array_equal(output.profile(3, PROFILE_COLUMNS[1]), output.profiles[2, :, 1])
+    assert list(output.profile_frame(3).columns) == PROFILE_COLUMNS
+    with pytest.raises(AttributeError):
+        output.annual_unknown
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+from pipeline import STAGES, run_stages
+from pre_simulator import LoadParameters
+
+NAMES = ['economics', 'percentages', 'fig_payback']
+# The names and the stages upstream of them, in the order they are run
+STAGE_ORDER = ['weather', 'pv', 'load', 'dispatch', 'aggregation', 'economics', 'percentages', 'fig_payback']
+INPUTS = dict(latitude=45.977, longitude=7.65, pv_capacity=5, tilt=30, orientation=180, battery_capacity=8,
+              discharge_cutoff=10, buy_rate=17.4, sell_rate=10.0, cost=15000, load_parameters=LoadParameters(
+                  monthly_util=[1700, 1400, 1000, 700, 600, 700, 600, 600, 800, 1000, 1600, 2000],
+                  occ_schedule=[1.0] * 24, occupants=4, retrofitted=0, floors=2, t_cool=24, t_heat=20,
+                  t_sched=[1.0] * 24, year_built=2000, floor_area=200, en_cool=1.0, en_dishwasher=1.0,
+                  en_dryer=1.0, en_fridge=1.0, en_heating=1.0, en_misc=1.0, en_stove=1.0,
+                  en_washing_machine=1.0))
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # A clear-sky-like day against a load with an evening peak, instead of PVGIS and the building simulation
+    dates = pd.date_range('2019-01-01', periods=8760, freq='h', tz='Etc/GMT-1')
+    hours = np.arange(8760) % 24
+    calls = []
+
+    def get_pv_output(latitude, longitude, pv_capacity, tilt, orientation):
+        calls.append('pv')
+        return pd.DataFrame({'DCOutput': pv_capacity * 0.8 * np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)},
+                            index=dates)
+
+    def get_load(latitude, longitude, load_parameters):
+        calls.append('load')
+        return 400 + 1200 * ((hours >= 18) & (hours <= 21)).astype(float)
+
+    def get_pvgis_tmy(latitude, longitude):
+        calls.append('weather')
+        return dates
+
+    monkeypatch.setattr(pipeline, 'get_pvgis_tmy', get_pvgis_tmy)
+    monkeypatch.setattr(pipeline, 'get_pv_output', get_pv_output)
+    monkeypatch.setattr(pipeline, 'get_load', get_load)
+    for stage in STAGES.values():
+        stage.cache.clear()
+    yield calls
+    for stage in STAGES.values():
+        stage.cache.clear()
+
+
+def recomputed(trace):
+    return [step['stage'] for step in trace if not step['reused']]
+
+
+@pytest.mark.parametrize('name, value, stages', [
+    ('cost', 12000, ['fig_payback']),
+    ('buy_rate', 20.0, ['economics', 'percentages', 'fig_payback']),
+    ('discharge_cutoff', 20, ['dispatch', 'aggregation', 'economics', 'percentages', 'fig_payback']),
+    ('pv_capacity', 6, ['pv', 'dispatch', 'aggregation', 'economics', 'percentages', 'fig_payback']),
+    ('latitude', 46.5, STAGE_ORDER),
+])
+def test_change_recomputes_downstream_stages(calls, name, value, stages):
+    results, trace = run_stages(NAMES, **INPUTS)
+    assert recomputed(trace) == STAGE_ORDER
+
+    messages = []
+    changed, trace = run_stages(NAMES, messages.append, **dict(INPUTS, **{name: value}))
+    assert [step['stage'] for step in trace] == STAGE_ORDER
+    assert recomputed(trace) == stages
+    # Only the stages that are computed are reported
+    assert messages == list(dict.fromkeys(STAGES[stage].description for stage in stages
+                                          if STAGES[stage].description is not None))
+
+    # The results of the previous inputs are still memoized
+    again, trace = run_stages(NAMES, **INPUTS)
+    assert recomputed(trace) == []
+    assert again['economics'] is results['economics']
+
+
+def test_results_match_a_full_computation(calls):
+    run_stages(NAMES, **INPUTS)
+    changed, _ = run_stages(NAMES, **dict(INPUTS, battery_capacity=4))
+    assert calls.count('pv') == 1 and calls.count('load') == 1
+
+    for stage in STAGES.values():
+        stage.cache.clear()
+    full, _ = run_stages(NAMES, **dict(INPUTS, battery_capacity=4))
+    np.testing.assert_array_equal(changed['economics'].annual, full['economics'].annual)
+    np.testing.assert_array_equal(changed['economics'].monthly, full['economics'].monthly)
+    assert changed['percentages'] == full['percentages']
+
+
+def test_invalid_parameters():
+    with pytest.raises(TypeError, match='cost'):
+        run_stages(NAMES, **{name: value for name, value in INPUTS.items() if name != 'cost'})
+    with pytest.raises(TypeError, match='LoadParameters'):
+        run_stages(NAMES, **dict(INPUTS, load_parameters={}))
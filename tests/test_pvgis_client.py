@@ -0,0 +1,81 @@
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import pvgis_client
+from benchmark import FIXTURE, read_fixture
+
+
+@pytest.fixture
+def pvgis(monkeypatch):
+    """
+    Local PVGIS whose first request is answered only once the released event is set
+    """
+    body = read_fixture(FIXTURE)
+    released = threading.Event()
+    paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            paths.append(self.path)
+            if len(paths) == 1:
+                released.wait(30)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(pvgis_client, 'PVGIS_URL', 'http://127.0.0.1:{}/'.format(server.server_address[1]))
+    yield released, paths
+    released.set()
+    server.shutdown()
+
+
+def _child_get_tmy():
+    pvgis_client.get_tmy(45.977, 7.65)
+
+
+def test_coalesces_simultaneous_requests(pvgis):
+    released, paths = pvgis
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pvgis_client.get_tmy(45.977, 7.65)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    released.set()
+    for thread in threads:
+        thread.join(30)
+
+    assert len(paths) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+
+
+def test_forked_process_does_not_wait_for_parent_request(pvgis):
+    released, paths = pvgis
+    parent = threading.Thread(target=pvgis_client.get_tmy, args=(45.977, 7.65))
+    parent.start()
+    while not paths:
+        time.sleep(0.01)
+
+    # Forked while the request of the parent thread is in flight, as the job pool forks from a web worker
+    child = multiprocessing.get_context('fork').Process(target=_child_get_tmy)
+    child.start()
+    child.join(30)
+    hung = child.is_alive()
+    if hung:
+        child.kill()
+    released.set()
+    parent.join(30)
+
+    assert not hung
+    assert child.exitcode == 0
+    assert len(paths) == 2
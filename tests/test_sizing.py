@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sizing
+from dispatch import dispatch_battery
+from pre_simulator import UNIT_PV_CAPACITY, cost_estimator
+from sizing import pareto_mask, size_system
+
+
+def brute_force_pareto_mask(autonomy, payback):
+    autonomy = autonomy.ravel()
+    payback = np.where(np.isnan(payback), np.inf, payback).ravel()
+    better_or_equal = (autonomy[np.newaxis, :] >= autonomy[:, np.newaxis]) & (
+            payback[np.newaxis, :] <= payback[:, np.newaxis])
+    strictly_better = (autonomy[np.newaxis, :] > autonomy[:, np.newaxis]) | (
+            payback[np.newaxis, :] < payback[:, np.newaxis])
+    return ~np.any(better_or_equal & strictly_better, axis=1)
+
+
+def test_pareto_mask():
+    autonomy = np.array([[10, 20, 30], [30, 40, 40]], dtype=float)
+    payback = np.array([[5, 6, 9], [8, 12, np.nan]])
+    np.testing.assert_array_equal(pareto_mask(autonomy, payback), [[True, True, False], [True, True, False]])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pareto_mask_matches_brute_force(seed):
+    # Few distinct values, so that there are ties on both objectives
+    rng = np.random.default_rng(seed)
+    autonomy = rng.integers(0, 10, (20, 15)).astype(float)
+    payback = np.where(rng.random((20, 15)) < 0.2, np.nan, rng.integers(5, 15, (20, 15)))
+    np.testing.assert_array_equal(pareto_mask(autonomy, payback).ravel(), brute_force_pareto_mask(autonomy, payback))
+
+
+def test_cost_without_pv_or_battery():
+    assert cost_estimator(0, 8) == 6500
+    assert cost_estimator(0, 0) == 0
+    assert cost_estimator(5, 0) == cost_estimator(5, 8) - 6500
+
+
+@pytest.fixture
+def site(monkeypatch):
+    hours = np.arange(8760)
+    # 1 kWp: a clear-sky-like day, against a load with an evening peak
+    dc_output = UNIT_PV_CAPACITY * np.clip(np.sin((hours % 24 - 6) / 12 * np.pi), 0, None)
+    load = 400 + 1200 * ((hours % 24 >= 18) & (hours % 24 <= 21))
+    monkeypatch.setattr(sizing, 'get_unit_pv_output',
+                        lambda *args: pd.DataFrame({'DCOutput': dc_output}))
+    monkeypatch.setattr(sizing, 'get_load', lambda *args: tuple(load.astype(float)))
+    return dc_output / UNIT_PV_CAPACITY, load
+
+
+def test_size_system(site):
+    dc_output, load = site
+    pv_capacities = [0, 3, 6]
+    battery_capacities = [0, 5, 10]
+    results = size_system(46, 7, 30, 180, None, pv_capacities, battery_capacities, 10, 0.2, 0.1)
+
+    assert results.autonomy.shape == (3, 3)
+    np.testing.assert_allclose(results.autonomy[0], 0)
+    assert results.cost[0, 0] == 0
+    assert np.isnan(results.payback[0]).all()
+    assert (np.diff(results.autonomy[1:], axis=0) >= 0).all()
+    assert (np.diff(results.autonomy[1:], axis=1) >= 0).all()
+
+    # Same energy as the hourly dispatch of one system
+    _, _, grid_import, grid_export = dispatch_battery(6000 * dc_output - load, 5000 * 0.9)
+    assert results.annual_import[2, 1] == pytest.approx(grid_import.sum() / 1000)
+    assert results.annual_export[2, 1] == pytest.approx(grid_export.sum() / 1000)
+    assert results.cost[2, 1] == cost_estimator(6, 5)
+
+    front = results.pareto_front()
+    assert front == sorted(front, key=lambda design: design[2])
+    assert results.pareto.sum() == len(front)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+import weather_archive
+import weather_cache
+from weather_archive import ARCHIVE_COLUMNS, WeatherArchive, write_archive
+
+LATITUDES = [46.0, 46.5]
+LONGITUDES = [7.0, 7.5, 8.0]
+SEA = (46.5, 8.0)
+TIMES = pd.date_range('2019-01-01', periods=weather_archive.HOURS, freq='h', tz='UTC')
+
+
+def synthetic_tmy(latitude, longitude):
+    # Every value of a cell tells its location
+    values = np.full((len(TIMES), len(ARCHIVE_COLUMNS)), 100 * latitude + longitude)
+    values[:, ARCHIVE_COLUMNS.index('wind_direction')] = 10 * longitude
+    return pd.DataFrame(values, index=TIMES, columns=ARCHIVE_COLUMNS)
+
+
+def fetch(latitude, longitude):
+    if (latitude, longitude) == SEA:
+        response = requests.Response()
+        response.status_code = 400
+        raise requests.HTTPError('Location over the sea', response=response)
+    return synthetic_tmy(latitude, longitude)
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory):
+    path = tmp_path_factory.mktemp('weather_archive')
+    assert write_archive(str(path), LATITUDES, LONGITUDES, fetch, workers=2) == 5
+    return WeatherArchive(str(path))
+
+
+def test_nearest_cell(archive):
+    tmy = archive.lookup(46.1, 7.4, method='nearest')
+    pd.testing.assert_frame_equal(tmy, synthetic_tmy(46.0, 7.5), check_freq=False, check_dtype=False)
+
+
+def test_bilinear_interpolation(archive):
+    tmy = archive.lookup(46.25, 7.125, method='bilinear')
+    np.testing.assert_allclose(tmy['ghi'], 100 * 46.25 + 7.125, rtol=1e-6)
+    # Angles come from the nearest cell
+    np.testing.assert_allclose(tmy['wind_direction'], 70)
+
+
+def test_bilinear_next_to_the_sea_uses_nearest_cell(archive):
+    # The cell at 46.5, 8.0 is a corner of the interpolation but has no data
+    tmy = archive.lookup(46.4, 7.6, method='bilinear')
+    np.testing.assert_allclose(tmy['ghi'], 100 * 46.5 + 7.5)
+    assert archive.lookup(*SEA, method='nearest') is None
+
+
+def test_outside_of_the_grid(archive):
+    assert archive.lookup(45.7, 7.0) is None
+    assert archive.lookup(46.0, 8.3) is None
+
+
+def test_failed_fetch_stops_the_build(tmp_path):
+    def unavailable(latitude, longitude):
+        response = requests.Response()
+        response.status_code = 503
+        raise requests.HTTPError('Service unavailable', response=response)
+
+    with pytest.raises(requests.HTTPError):
+        write_archive(str(tmp_path), LATITUDES, LONGITUDES, unavailable)
+    # An interrupted build is not used
+    assert weather_archive.open_archive.__wrapped__(str(tmp_path)) is None
+
+
+def test_weather_cache_reads_archive_then_pvgis(archive, tmp_path, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(weather_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(weather_cache, 'get_archived_tmy', archive.lookup)
+    monkeypatch.setattr(weather_cache, 'get_tmy',
+                        lambda latitude, longitude, outputformat: fetched.append((latitude, longitude)) or
+                        synthetic_tmy(latitude, longitude))
+
+    tmy = weather_cache.get_pvgis_tmy(46.0, 7.0)
+    assert fetched == []
+    np.testing.assert_allclose(tmy['ghi'], 100 * 46.0 + 7.0)
+    assert list(tmp_path.iterdir()) == []
+
+    # Not covered by the archive: downloaded once, then read from the disk cache
+    for _ in range(2):
+        tmy = weather_cache.get_pvgis_tmy(40.0, 7.0)
+        np.testing.assert_allclose(tmy['ghi'], 100 * 40.0 + 7.0)
+    assert fetched == [(40.0, 7.0)]
+    assert len(list(tmp_path.glob('*.npz'))) == 1
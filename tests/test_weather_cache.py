@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import weather_cache
+
+
+def tmy(value, hours=8760):
+    index = pd.date_range('2019-01-01', periods=hours, freq='h', tz='UTC').tz_convert('Etc/GMT-1')
+    return pd.DataFrame({'ghi': np.full(hours, float(value)), 'temp_air': np.arange(hours, dtype=float)},
+                        index=index)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(weather_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(weather_cache, 'get_archived_tmy', lambda latitude, longitude: None)
+    monkeypatch.setattr(weather_cache, 'get_tmy', lambda latitude, longitude, outputformat: fetched.append(
+        (latitude, longitude)) or tmy(latitude))
+    return tmp_path, fetched
+
+
+def test_entry_round_trip(cache):
+    path, fetched = cache
+    first = weather_cache.get_pvgis_tmy(46.0, 7.0)
+    second = weather_cache.get_pvgis_tmy(46.0, 7.0)
+    assert fetched == [(46.0, 7.0)]
+    pd.testing.assert_frame_equal(second.reset_index(drop=True), first.reset_index(drop=True))
+    # Same instants, with the UTC offset of the data
+    np.testing.assert_array_equal(second.index.asi8, first.index.asi8)
+    assert second.index[0].utcoffset() == first.index[0].utcoffset()
+    # Only the entry is left, the temporary file was renamed
+    assert [name.endswith('.npz') for name in os.listdir(path)] == [True]
+
+
+def test_coordinates_rounded(cache):
+    _, fetched = cache
+    weather_cache.get_pvgis_tmy(45.97654, 7.64971)
+    weather_cache.get_pvgis_tmy(45.9766, 7.6496)
+    assert fetched == [(45.977, 7.65)]
+    assert weather_cache.cache_key(45.97654, 7.64971, 'json') == weather_cache.cache_key(45.977, 7.65, 'json')
+    assert weather_cache.cache_key(45.977, 7.65, 'json') != weather_cache.cache_key(45.977, 7.65, 'epw')
+
+
+def test_corrupted_entry_is_downloaded_again(cache):
+    path, fetched = cache
+    weather_cache.get_pvgis_tmy(46.0, 7.0)
+    entry = os.path.join(path, weather_cache.cache_key(46.0, 7.0, 'json') + '.npz')
+    with open(entry, 'wb') as file:
+        file.write(b'partial')
+    np.testing.assert_allclose(weather_cache.get_pvgis_tmy(46.0, 7.0)['ghi'], 46.0)
+    assert len(fetched) == 2
+
+
+def test_eviction_by_size_least_recently_used_first(cache, monkeypatch):
+    path, _ = cache
+    weather_cache.get_pvgis_tmy(1.0, 1.0)
+    size = os.path.getsize(os.path.join(path, weather_cache.cache_key(1.0, 1.0, 'json') + '.npz'))
+    monkeypatch.setattr(weather_cache, 'CACHE_MAX_BYTES', int(2.5 * size))
+
+    def entry(latitude):
+        return os.path.join(path, weather_cache.cache_key(latitude, 1.0, 'json') + '.npz')
+
+    weather_cache.get_pvgis_tmy(2.0, 1.0)
+    os.utime(entry(1.0), (1, 1))
+    os.utime(entry(2.0), (2, 2))
+    # Reading an entry makes it the most recently used
+    weather_cache.get_pvgis_tmy(1.0, 1.0)
+    weather_cache.get_pvgis_tmy(3.0, 1.0)
+
+    assert os.path.exists(entry(1.0))
+    assert not os.path.exists(entry(2.0))
+    assert os.path.exists(entry(3.0))